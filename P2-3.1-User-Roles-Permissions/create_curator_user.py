@@ -19,6 +19,8 @@ import subprocess
 import logging
 import getpass
 
+from invenio_command import invenio_command
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,7 +34,7 @@ class CuratorUserCreator:
     
     def __init__(self):
         """Initialize the creator."""
-        self.cmd_prefix = ['pipenv', 'run', 'invenio']
+        self.cmd_prefix = invenio_command()
         logger.info("Curator user creator initialized")
     
     def run_invenio(self, args: list, ignore_errors: bool = False) -> tuple:
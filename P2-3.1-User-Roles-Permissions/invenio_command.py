@@ -0,0 +1,22 @@
+"""
+Shared invenio CLI command resolution for the P2-3.1 role scripts.
+
+`pipenv run` costs a second or more per call. When the interpreter is
+already the instance's virtualenv (as in the ECS image), the scripts call
+its `invenio` script directly. INVENIO_CMD overrides both.
+"""
+
+import os
+import sys
+import shlex
+
+
+def invenio_command() -> list:
+    """Command prefix for the invenio CLI."""
+    override = os.environ.get('INVENIO_CMD')
+    if override:
+        return shlex.split(override)
+    local = os.path.join(os.path.dirname(sys.executable), 'invenio')
+    if os.environ.get('VIRTUAL_ENV') and os.path.exists(local):
+        return [local]
+    return ['pipenv', 'run', 'invenio']
@@ -18,6 +18,8 @@ import subprocess
 import logging
 from pathlib import Path
 
+from invenio_command import invenio_command
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,7 +34,7 @@ class ProductionRoleSetup:
     def __init__(self):
         """Initialize the setup."""
         # In ECS, we're already in /opt/invenio/var/instance
-        self.cmd_prefix = ['pipenv', 'run', 'invenio']
+        self.cmd_prefix = invenio_command()
         logger.info("Production role setup initialized")
     
     def run_invenio(self, args: list, ignore_errors: bool = False) -> tuple:
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, deduplicated snapshot store for the S3 file backups.
+
+backup_s3_manual.sh writes a full dated copy every day
+(./s3_backup_YYYY-MM-DD), although almost nothing changes between days.
+This store keeps each file once per distinct chunk instead:
+
+  <store>/chunks/ab/<sha256>.zst  chunk contents, named by SHA-256, compressed
+  <store>/snapshots/<name>.json   per-snapshot manifest: path → size, mtime, chunk list
+
+Files are split into fixed-size chunks (--chunk-size-mb). Backed-up objects
+(PDFs, HOCR, images) are written once and never edited in place, so
+fixed-size chunks deduplicate as well as content-defined ones here at a
+fraction of the CPU. A file whose size and mtime match the previous snapshot
+reuses its chunk list without being read again. Chunks are compressed with
+zstd when the `zstandard` package is installed, otherwise with zlib; the
+codec is part of the chunk filename so both can coexist in one store.
+
+Snapshot creation hashes and compresses files in parallel (--workers);
+restore streams each file chunk by chunk, verifying every chunk's hash.
+Storage grows with the changed bytes, not with days × corpus size.
+
+Usage:
+    ./backup_s3_manual.sh ./s3_backup_latest
+    python cas_backup.py snapshot ./s3_backup_latest --store ./cas_store
+    python cas_backup.py snapshot ./s3_backup_2026-01-15 --store ./cas_store --name 2026-01-15
+    python cas_backup.py list --store ./cas_store
+    python cas_backup.py restore 2026-01-15 ./restore --store ./cas_store [--prefix records/]
+    python cas_backup.py prune --store ./cas_store --keep 30
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 4 * MIB
+# Written by s3_backup.py into its destination; not part of the bucket contents
+SKIP_FILES = {".backup_manifest.json"}
+CODEC_EXTENSIONS = {"zstd": ".zst", "zlib": ".zz"}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Store contains zstd chunks; install 'zstandard' to read them")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class ChunkStore:
+    """Content-addressed snapshot store rooted at a local directory."""
+
+    def __init__(self, root: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 8, codec: str = None):
+        """Initialize the store (created on first snapshot)."""
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.snapshot_dir = os.path.join(root, "snapshots")
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if self.codec == "zstd" and zstandard is None:
+            raise RuntimeError("zstd requested but 'zstandard' is not installed")
+        self._lock = threading.Lock()
+
+    # ---- chunks -------------------------------------------------------------
+
+    def _chunk_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest + CODEC_EXTENSIONS[codec])
+
+    def _find_chunk(self, digest: str) -> tuple:
+        for codec in CODEC_EXTENSIONS:
+            path = self._chunk_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        raise FileNotFoundError(f"Missing chunk {digest}")
+
+    def has_chunk(self, digest: str) -> bool:
+        return any(os.path.exists(self._chunk_path(digest, codec)) for codec in CODEC_EXTENSIONS)
+
+    def put_chunk(self, data: bytes) -> tuple:
+        """Store one chunk if new; returns (digest, compressed bytes written)."""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.has_chunk(digest):
+            return digest, 0
+        blob = compress(data, self.codec)
+        path = self._chunk_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: two workers may store the same new chunk at once
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+        return digest, len(blob)
+
+    def get_chunk(self, digest: str) -> bytes:
+        path, codec = self._find_chunk(digest)
+        with open(path, "rb") as f:
+            raw = f.read()
+        try:
+            data = decompress(raw, codec)
+        except DECOMPRESS_ERRORS as e:
+            raise ValueError(f"Chunk {digest} is corrupt ({e})") from e
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupt")
+        return data
+
+    # ---- snapshots ------------------------------------------------------------
+
+    def snapshot_names(self) -> list:
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(self.snapshot_dir) if name.endswith(".json"))
+
+    def load_snapshot(self, name: str) -> dict:
+        path = os.path.join(self.snapshot_dir, f"{name}.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No snapshot named '{name}' in {self.root}")
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _store_file(self, path: str, rel: str, stats: dict) -> dict:
+        st = os.stat(path)
+        chunks = []
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(self.chunk_size), b""):
+                digest, written = self.put_chunk(block)
+                chunks.append(digest)
+                with self._lock:
+                    stats["read_bytes"] += len(block)
+                    stats["stored_bytes"] += written
+                    stats["new_chunks"] += bool(written)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunks": chunks}
+
+    def create_snapshot(self, source: str, name: str = None, rehash: bool = False) -> dict:
+        """Snapshot a directory tree; unchanged files reuse the previous snapshot's chunks."""
+        name = name or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H%M%SZ")
+        if name in self.snapshot_names():
+            raise ValueError(f"Snapshot '{name}' already exists")
+        previous = self.snapshot_names()
+        parent = {} if rehash or not previous else self.load_snapshot(previous[-1])["files"]
+
+        logger.info("=" * 60)
+        logger.info(f"Snapshot '{name}': {source} → {self.root} ({self.codec})")
+        logger.info("=" * 60)
+        start = time.time()
+        files, pending = {}, []
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename in SKIP_FILES or filename.endswith(".part"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                rel = os.path.relpath(path, source).replace(os.sep, "/")
+                st = os.stat(path)
+                old = parent.get(rel)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    files[rel] = old
+                else:
+                    pending.append((path, rel))
+
+        stats = {"files": len(files) + len(pending), "unchanged": len(files), "read_bytes": 0,
+                 "stored_bytes": 0, "new_chunks": 0, "failed": []}
+        logger.info(f"{stats['files']} files: {stats['unchanged']} unchanged, {len(pending)} to hash")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._store_file, path, rel, stats): rel for path, rel in pending}
+            for future in as_completed(futures):
+                rel = futures[future]
+                try:
+                    files[rel] = future.result()
+                except OSError as e:
+                    logger.error(f"✗ {rel}: {e}")
+                    stats["failed"].append(rel)
+
+        snapshot = {"version": 1, "name": name, "source": os.path.abspath(source),
+                    "created": datetime.now(timezone.utc).isoformat(), "chunk_size": self.chunk_size,
+                    "files": dict(sorted(files.items()))}
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{name}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=1)
+        os.replace(f"{path}.tmp", path)
+        stats["name"] = name
+        stats["logical_bytes"] = sum(f["size"] for f in files.values())
+        stats["elapsed_s"] = round(time.time() - start, 2)
+        return stats
+
+    def restore(self, name: str, target: str, prefix: str = "") -> dict:
+        """Stream a snapshot's files back out, chunk by chunk, in parallel across files."""
+        files = {rel: meta for rel, meta in self.load_snapshot(name)["files"].items() if rel.startswith(prefix)}
+        root = os.path.abspath(target)
+        logger.info(f"Restoring {len(files)} files from snapshot '{name}' → {root}")
+        start = time.time()
+
+        def restore_file(rel, meta):
+            path = os.path.abspath(os.path.join(root, rel))
+            if not path.startswith(root + os.sep):
+                raise ValueError(f"Refusing to write outside {root}: {rel}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.part"
+            with open(tmp, "wb") as f:
+                for digest in meta["chunks"]:
+                    f.write(self.get_chunk(digest))
+            if os.path.getsize(tmp) != meta["size"]:
+                raise ValueError(f"size mismatch ({os.path.getsize(tmp)} != {meta['size']})")
+            os.replace(tmp, path)
+            os.utime(path, ns=(meta["mtime_ns"], meta["mtime_ns"]))
+            return meta["size"]
+
+        stats = {"files": len(files), "restored": 0, "bytes": 0, "failed": []}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(restore_file, rel, meta): rel for rel, meta in files.items()}
+            for future in as_completed(futures):
+                try:
+                    stats["bytes"] += future.result()
+                    stats["restored"] += 1
+                except (OSError, ValueError) as e:
+                    logger.error(f"✗ {futures[future]}: {e}")
+                    stats["failed"].append(futures[future])
+        elapsed = time.time() - start
+        stats["elapsed_s"] = round(elapsed, 2)
+        stats["mib_per_s"] = round(stats["bytes"] / MIB / elapsed, 2) if elapsed else 0.0
+        return stats
+
+    def prune(self, keep: int) -> dict:
+        """Delete all but the newest `keep` snapshots, then any chunk no snapshot references."""
+        names = self.snapshot_names()
+        for name in names[:-keep] if keep else names:
+            os.remove(os.path.join(self.snapshot_dir, f"{name}.json"))
+            logger.info(f"  Removed snapshot {name}")
+        live = {d for name in self.snapshot_names() for meta in self.load_snapshot(name)["files"].values()
+                for d in meta["chunks"]}
+        removed = freed = 0
+        for dirpath, _, filenames in os.walk(self.chunk_dir):
+            for filename in filenames:
+                if filename.split(".")[0] not in live:
+                    path = os.path.join(dirpath, filename)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+        return {"snapshots": len(self.snapshot_names()), "chunks_removed": removed, "bytes_freed": freed}
+
+    def usage(self) -> int:
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(self.chunk_dir) for f in fs)
+
+
+def main():
+    """Main entry point."""
+    # --store/--workers go after the subcommand, as in the usage examples
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--store", default="./cas_store", help="store directory")
+    common.add_argument("--workers", type=int, default=8, help="files hashed/restored in parallel")
+    parser = argparse.ArgumentParser(description="Content-addressed, deduplicated backup snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser("snapshot", parents=[common],
+                          help="snapshot a directory (e.g. the output of backup_s3_manual.sh)")
+    snap.add_argument("source")
+    snap.add_argument("--name", help="snapshot name (default: UTC timestamp)")
+    snap.add_argument("--chunk-size-mb", type=int, default=DEFAULT_CHUNK_SIZE // MIB)
+    snap.add_argument("--codec", choices=sorted(CODEC_EXTENSIONS), help="default: zstd if installed, else zlib")
+    snap.add_argument("--rehash", action="store_true", help="re-read files even if size and mtime are unchanged")
+
+    sub.add_parser("list", parents=[common], help="list snapshots")
+
+    rest = sub.add_parser("restore", parents=[common], help="restore a snapshot into a directory")
+    rest.add_argument("name")
+    rest.add_argument("target")
+    rest.add_argument("--prefix", default="", help="only restore paths under this prefix")
+
+    prune = sub.add_parser("prune", parents=[common], help="drop old snapshots and unreferenced chunks")
+    prune.add_argument("--keep", type=int, required=True, help="number of newest snapshots to keep")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        store = ChunkStore(args.store, args.chunk_size_mb * MIB, args.workers, args.codec)
+        stats = store.create_snapshot(args.source, args.name, args.rehash)
+        logger.info("=" * 60)
+        logger.info(f"Files          : {stats['files']} ({stats['unchanged']} unchanged, not re-read)")
+        logger.info(f"Logical size   : {stats['logical_bytes'] / MIB:.1f} MiB")
+        logger.info(f"Read + hashed  : {stats['read_bytes'] / MIB:.1f} MiB in {stats['elapsed_s']}s")
+        logger.info(f"New chunk data : {stats['stored_bytes'] / MIB:.1f} MiB in {stats['new_chunks']} chunks")
+        logger.info(f"Store size     : {store.usage() / MIB:.1f} MiB")
+        if stats["failed"]:
+            logger.error(f"✗ {len(stats['failed'])} file(s) could not be read")
+            sys.exit(1)
+        logger.info(f"✓ Snapshot '{stats['name']}' created")
+        return
+
+    store = ChunkStore(args.store, workers=args.workers)
+    if args.command == "list":
+        for name in store.snapshot_names():
+            files = store.load_snapshot(name)["files"]
+            logger.info(f"  {name:<24} {len(files):>8} files {sum(f['size'] for f in files.values()) / MIB:>10.1f} MiB")
+        logger.info(f"Store size: {store.usage() / MIB:.1f} MiB")
+    elif args.command == "restore":
+        stats = store.restore(args.name, args.target, args.prefix)
+        logger.info(f"Restored {stats['restored']}/{stats['files']} files, {stats['bytes'] / MIB:.1f} MiB "
+                    f"in {stats['elapsed_s']}s = {stats['mib_per_s']} MiB/s")
+        if stats["failed"]:
+            logger.error(f"✗ {len(stats['failed'])} file(s) failed to restore")
+            sys.exit(1)
+        logger.info("✓ Restore completed successfully")
+    elif args.command == "prune":
+        stats = store.prune(args.keep)
+        logger.info(f"✓ {stats['snapshots']} snapshot(s) kept, {stats['chunks_removed']} chunks "
+                    f"({stats['bytes_freed'] / MIB:.1f} MiB) removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Parallel, verified, incremental backup of the InvenioRDM S3 bucket.
+
+Replaces the single `aws s3 sync` in backup_s3_manual.sh with:
+  - A local manifest (key, size, ETag, last-modified) of everything already
+    backed up, so only new or changed objects are copied and the
+    destination is never listed.
+  - Source listing split across top-level prefixes and run in parallel.
+  - A tunable transfer pool: N objects in flight, each using boto3's
+    multipart transfer with its own part size and concurrency.
+  - Post-transfer verification against the source ETag (MD5, including
+    multipart ETags) and size, plus a throughput report.
+
+Destination is a local directory or another bucket (s3://bucket/prefix).
+Works against any S3-compatible endpoint (MinIO, moto server) via
+--endpoint-url.
+
+Usage:
+    python s3_backup.py ./s3_backup
+    python s3_backup.py s3://turath-dr-backup/daily --workers 16
+    python s3_backup.py ./s3_backup --endpoint-url http://127.0.0.1:9000 --bucket test-bucket
+
+Safe to run repeatedly (only changed objects are transferred).
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "turath-inveniordm-data"
+MANIFEST_NAME = ".backup_manifest.json"
+MIB = 1024 * 1024
+# Part sizes commonly used by uploaders (boto3/aws-cli default is 8 MiB)
+COMMON_PART_SIZES = (8 * MIB, 5 * MIB, 16 * MIB, 15 * MIB, 64 * MIB, 100 * MIB)
+
+
+def parse_s3_url(url: str) -> tuple:
+    """Split s3://bucket/prefix into (bucket, prefix)."""
+    bucket, _, prefix = url[len("s3://"):].partition("/")
+    return bucket, prefix.strip("/")
+
+
+def load_manifest(path: str) -> dict:
+    """Load a backup manifest, or an empty one if none exists yet."""
+    if not os.path.exists(path):
+        return {"version": 1, "objects": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str) -> None:
+    """Write the manifest atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def file_etag(path: str, size: int, etag: str) -> bool:
+    """
+    Check a local file against an S3 ETag.
+
+    Single-part ETags are the MD5 of the object. Multipart ETags are
+    md5(md5(part1) + md5(part2) + ...)-N, so the part size is inferred from
+    the part count N and the usual uploader defaults.
+    """
+    etag = etag.strip('"')
+    if "-" not in etag:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(MIB), b""):
+                md5.update(block)
+        return md5.hexdigest() == etag
+
+    parts = int(etag.split("-")[1])
+    candidates = [ps for ps in COMMON_PART_SIZES if math.ceil(size / ps) == parts]
+    if parts > 1:
+        guess = math.ceil(size / parts / MIB) * MIB
+        if math.ceil(size / guess) == parts and guess not in candidates:
+            candidates.append(guess)
+    for part_size in candidates:
+        digests = b""
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(part_size), b""):
+                digests += hashlib.md5(block).digest()
+        if f"{hashlib.md5(digests).hexdigest()}-{parts}" == etag:
+            return True
+    return False
+
+
+class S3BackupTool:
+    """Incremental S3 → local/S3 backup driven by a manifest."""
+
+    def __init__(self, source_bucket: str, destination: str, manifest_path: str = None,
+                 prefix: str = "", workers: int = 8, part_size_mb: int = 16,
+                 part_concurrency: int = 4, endpoint_url: str = None, client=None):
+        """Initialize the backup tool."""
+        self.s3 = client or boto3.client("s3", endpoint_url=endpoint_url)
+        self.source_bucket = source_bucket
+        self.prefix = prefix
+        self.destination = destination
+        self.dest_is_s3 = destination.startswith("s3://")
+        if self.dest_is_s3:
+            self.dest_bucket, self.dest_prefix = parse_s3_url(destination)
+        self.manifest_path = manifest_path or (
+            f"./s3_backup_manifest_{source_bucket}.json" if self.dest_is_s3
+            else os.path.join(destination, MANIFEST_NAME)
+        )
+        self.workers = workers
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size_mb * MIB,
+            multipart_chunksize=part_size_mb * MIB,
+            max_concurrency=part_concurrency,
+        )
+        self._lock = threading.Lock()
+        logger.info("S3 backup tool initialized")
+
+    # ── Listing ──────────────────────────────────────────────────────
+
+    def _list_prefix(self, prefix: str, recursive: bool = True) -> tuple:
+        """List objects (and, if not recursive, sub-prefixes) under a prefix."""
+        objects, prefixes = [], []
+        kwargs = {"Bucket": self.source_bucket, "Prefix": prefix}
+        if not recursive:
+            kwargs["Delimiter"] = "/"
+        for page in self.s3.get_paginator("list_objects_v2").paginate(**kwargs):
+            for obj in page.get("Contents", []):
+                # Console "folder" markers hold no data; written as a file they
+                # would block every key below them (as `aws s3 sync` skips them)
+                if obj["Key"].endswith("/"):
+                    continue
+                objects.append({
+                    "key": obj["Key"],
+                    "size": obj["Size"],
+                    "etag": obj["ETag"].strip('"'),
+                    "last_modified": obj["LastModified"].isoformat(),
+                })
+            prefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+        return objects, prefixes
+
+    def list_source(self) -> list:
+        """List the source, fanning out over top-level prefixes in parallel."""
+        base = f"{self.prefix}/" if self.prefix else ""
+        objects, prefixes = self._list_prefix(base, recursive=False)
+        logger.info(f"Listing s3://{self.source_bucket}/{base} across {len(prefixes)} prefixes...")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for sub_objects, _ in pool.map(self._list_prefix, prefixes):
+                objects.extend(sub_objects)
+        return objects
+
+    # ── Transfer + verification ─────────────────────────────────────
+
+    def _local_path(self, key: str) -> str:
+        root = os.path.abspath(self.destination)
+        path = os.path.abspath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Refusing to write outside destination: {key}")
+        return path
+
+    def _dest_key(self, key: str) -> str:
+        return f"{self.dest_prefix}/{key}" if self.dest_prefix else key
+
+    def transfer(self, obj: dict) -> None:
+        """Copy one object to the destination."""
+        if self.dest_is_s3:
+            self.s3.copy({"Bucket": self.source_bucket, "Key": obj["key"]},
+                         self.dest_bucket, self._dest_key(obj["key"]), Config=self.transfer_config)
+        else:
+            path = self._local_path(obj["key"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.part"
+            self.s3.download_file(self.source_bucket, obj["key"], tmp, Config=self.transfer_config)
+            os.replace(tmp, path)
+
+    def verify(self, obj: dict) -> str:
+        """Return 'ok', 'size-only' (ETag not comparable) or a failure reason."""
+        if self.dest_is_s3:
+            head = self.s3.head_object(Bucket=self.dest_bucket, Key=self._dest_key(obj["key"]))
+            if head["ContentLength"] != obj["size"]:
+                return "size mismatch"
+            dest_etag = head["ETag"].strip('"')
+            if dest_etag == obj["etag"]:
+                return "ok"
+            # Multipart copies get a new ETag; fall back to size equality
+            return "size-only" if "-" in dest_etag or "-" in obj["etag"] else "etag mismatch"
+        path = self._local_path(obj["key"])
+        if os.path.getsize(path) != obj["size"]:
+            return "size mismatch"
+        return "ok" if file_etag(path, obj["size"], obj["etag"]) else "etag mismatch"
+
+    def backup_object(self, obj: dict) -> tuple:
+        try:
+            self.transfer(obj)
+            return obj, self.verify(obj)
+        except Exception as e:
+            return obj, f"error: {e}"
+
+    # ── Run ──────────────────────────────────────────────────────────
+
+    def run(self, dry_run: bool = False) -> dict:
+        """Back up every new or changed object and return run statistics."""
+        logger.info("=" * 60)
+        logger.info(f"S3 Backup: s3://{self.source_bucket}/{self.prefix} → {self.destination}")
+        logger.info("=" * 60)
+
+        manifest = load_manifest(self.manifest_path)
+        known = manifest["objects"]
+        start = time.time()
+        source = self.list_source()
+        list_s = time.time() - start
+
+        pending = [o for o in source
+                   if known.get(o["key"], {}).get("etag") != o["etag"]
+                   or known.get(o["key"], {}).get("size") != o["size"]]
+        source_keys = {o["key"] for o in source}
+        removed = [k for k in known if k not in source_keys]
+        logger.info(f"✓ Listed {len(source)} objects in {list_s:.1f}s: "
+                    f"{len(pending)} new/changed, {len(source) - len(pending)} unchanged, "
+                    f"{len(removed)} no longer in source (kept in backup)")
+
+        stats = {"listed": len(source), "pending": len(pending), "copied": 0, "bytes": 0,
+                 "verified": 0, "size_only": 0, "failed": [], "removed_in_source": len(removed),
+                 "list_s": round(list_s, 2)}
+        if dry_run or not pending:
+            stats["elapsed_s"] = round(time.time() - start, 2)
+            return stats
+
+        transfer_start = time.time()
+        total_bytes = sum(o["size"] for o in pending)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(self.backup_object, o) for o in pending]
+                for future in as_completed(futures):
+                    obj, status = future.result()
+                    if status in ("ok", "size-only"):
+                        with self._lock:
+                            known[obj["key"]] = {**obj, "backed_up_at": datetime.now(timezone.utc).isoformat(),
+                                                 "verified": status}
+                            stats["copied"] += 1
+                            stats["bytes"] += obj["size"]
+                            stats["verified" if status == "ok" else "size_only"] += 1
+                    else:
+                        logger.error(f"✗ {obj['key']}: {status}")
+                        stats["failed"].append({"key": obj["key"], "reason": status})
+                    if stats["copied"] and stats["copied"] % 500 == 0:
+                        elapsed = time.time() - transfer_start
+                        logger.info(f"  {stats['copied']}/{len(pending)} objects, "
+                                    f"{stats['bytes'] / MIB:.0f}/{total_bytes / MIB:.0f} MiB, "
+                                    f"{stats['bytes'] / MIB / elapsed:.1f} MiB/s")
+        finally:
+            manifest["source"] = f"s3://{self.source_bucket}/{self.prefix}"
+            manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+            save_manifest(manifest, self.manifest_path)
+
+        transfer_s = time.time() - transfer_start
+        stats["transfer_s"] = round(transfer_s, 2)
+        stats["mib_per_s"] = round(stats["bytes"] / MIB / transfer_s, 2) if transfer_s else 0.0
+        stats["elapsed_s"] = round(time.time() - start, 2)
+        return stats
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Parallel, verified, incremental S3 backup")
+    parser.add_argument("destination", nargs="?", default=f"./s3_backup_{BUCKET_NAME}",
+                        help="local directory or s3://bucket/prefix")
+    parser.add_argument("--bucket", default=BUCKET_NAME, help="source bucket")
+    parser.add_argument("--prefix", default="", help="only back up keys under this prefix")
+    parser.add_argument("--manifest", help="manifest path (default: <destination>/.backup_manifest.json)")
+    parser.add_argument("--workers", type=int, default=8, help="objects transferred in parallel")
+    parser.add_argument("--part-size-mb", type=int, default=16, help="multipart part size")
+    parser.add_argument("--part-concurrency", type=int, default=4, help="parallel parts per object")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint (MinIO, moto server)")
+    parser.add_argument("--dry-run", action="store_true", help="list and diff only")
+    args = parser.parse_args()
+
+    tool = S3BackupTool(args.bucket, args.destination, args.manifest, args.prefix.strip("/"),
+                        args.workers, args.part_size_mb, args.part_concurrency, args.endpoint_url)
+    stats = tool.run(dry_run=args.dry_run)
+
+    logger.info("=" * 60)
+    logger.info(f"Objects listed     : {stats['listed']} ({stats['list_s']}s)")
+    logger.info(f"New/changed        : {stats['pending']}")
+    if not args.dry_run and stats["pending"]:
+        logger.info(f"Copied + verified  : {stats['verified']} (ETag) + {stats['size_only']} (size only)")
+        logger.info(f"Transferred        : {stats['bytes'] / MIB:.1f} MiB in {stats['transfer_s']}s "
+                    f"= {stats['mib_per_s']} MiB/s")
+    logger.info(f"Manifest           : {tool.manifest_path}")
+    if stats["failed"]:
+        logger.error(f"✗ {len(stats['failed'])} object(s) failed — rerun to retry them")
+        sys.exit(1)
+    logger.info("✓ S3 backup completed successfully")
+
+
+if __name__ == "__main__":
+    main()
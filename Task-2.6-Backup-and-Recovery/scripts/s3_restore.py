@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Parallel, prioritised restore of the InvenioRDM file store from a backup.
+
+Reads the manifest written by s3_backup.py and restores objects
+concurrently, hottest content first, so a DR environment becomes usable
+long before the last PDF arrives:
+
+  1. Metadata (JSON/XML/CSV) and HOCR — needed for search, the text
+     overlay and the IIIF search service
+  2. Everything else (images, derivatives)
+  3. PDFs
+Within each class, keys matching --hot-list (e.g. frequently viewed books)
+go first, then the most recently modified objects.
+
+Transfers share a token-bucket bandwidth cap (--max-mbps), a live progress
+line reports MB/s and ETA, and the summary reports the final MB/s.
+
+The backup and the restore target can each be a local directory or an
+S3 location (s3://bucket/prefix); --endpoint-url points boto3 at MinIO or a
+moto server for drills.
+
+Usage:
+    python s3_restore.py --from ./s3_backup --to s3://turath-inveniordm-data-recovery
+    python s3_restore.py --from s3://turath-dr-backup/daily --to ./restore \\
+        --manifest ./s3_backup_manifest_turath-inveniordm-data.json --workers 16 --max-mbps 200
+    python s3_restore.py --from ./s3_backup --to ./restore --hot-list hot_books.txt --dry-run
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from s3_backup import MANIFEST_NAME, MIB, file_etag, load_manifest, parse_s3_url
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = MIB
+METADATA_EXTENSIONS = (".json", ".xml", ".csv", ".txt")
+HOCR_EXTENSIONS = (".hocr", ".html", ".htm")
+PRIORITY_LABELS = {0: "metadata/HOCR", 1: "other", 2: "PDF"}
+
+
+def priority_class(key: str) -> int:
+    """0 = metadata/HOCR, 1 = other files, 2 = PDFs."""
+    lower = key.lower()
+    if lower.endswith(METADATA_EXTENSIONS + HOCR_EXTENSIONS):
+        return 0
+    if lower.endswith(".pdf"):
+        return 2
+    return 1
+
+
+def restore_order(objects: list, hot: list = ()) -> list:
+    """Sort manifest entries into restore order (see module docstring)."""
+    # Two stable sorts: newest first (ISO-8601 sorts lexicographically), then class/hot
+    newest_first = sorted(objects, key=lambda o: o.get("last_modified", ""), reverse=True)
+    return sorted(newest_first, key=lambda o: (priority_class(o["key"]), not any(h in o["key"] for h in hot)))
+
+
+class TokenBucket:
+    """Shared bytes-per-second limiter; a rate of 0 disables it."""
+
+    def __init__(self, rate_bytes: float):
+        self.rate = rate_bytes
+        self.tokens = rate_bytes
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, n: int) -> None:
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n or self.tokens >= self.rate:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(min(wait, 0.25))
+
+
+class ThrottledReader:
+    """File-like wrapper that charges every read to the bucket and progress counter."""
+
+    def __init__(self, raw, bucket: TokenBucket, progress):
+        self.raw = raw
+        self.bucket = bucket
+        self.progress = progress
+
+    def _read_block(self, n: int) -> bytes:
+        data = self.raw.read(n)
+        if data:
+            self.bucket.consume(len(data))
+            self.progress(len(data))
+        return data
+
+    def read(self, n: int = -1) -> bytes:
+        # like a file, read(n) returns n bytes unless EOF comes first (s3transfer
+        # sizes multipart uploads from a short read) and read()/read(-1) returns
+        # everything left; either way throttle one block at a time
+        remaining = n if n is not None and n >= 0 else None
+        blocks = []
+        while remaining is None or remaining > 0:
+            data = self._read_block(CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE))
+            if not data:
+                break
+            blocks.append(data)
+            if remaining is not None:
+                remaining -= len(data)
+        return b"".join(blocks)
+
+
+class S3RestoreTool:
+    """Restore a manifest-described backup in priority order."""
+
+    def __init__(self, source: str, target: str, manifest_path: str = None, workers: int = 8,
+                 max_mbps: float = 0, endpoint_url: str = None, client=None):
+        """Initialize the restore tool."""
+        self.source = source
+        self.target = target
+        self.source_is_s3 = source.startswith("s3://")
+        self.target_is_s3 = target.startswith("s3://")
+        self.manifest_path = manifest_path or (None if self.source_is_s3 else os.path.join(source, MANIFEST_NAME))
+        if not self.manifest_path:
+            raise ValueError("--manifest is required when restoring from an S3 backup")
+        self.s3 = client
+        if (self.source_is_s3 or self.target_is_s3) and client is None:
+            import boto3
+            self.s3 = boto3.client("s3", endpoint_url=endpoint_url)
+        self.workers = workers
+        self.bucket = TokenBucket(max_mbps * 1e6 / 8 if max_mbps else 0)
+        self.verify_etags = False
+        self.done_bytes = 0
+        self._lock = threading.Lock()
+        logger.info("S3 restore tool initialized")
+
+    def _add_progress(self, n: int) -> None:
+        with self._lock:
+            self.done_bytes += n
+
+    @staticmethod
+    def _local(root: str, key: str) -> str:
+        root = os.path.abspath(root)
+        path = os.path.abspath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Refusing to access path outside {root}: {key}")
+        return path
+
+    @staticmethod
+    def _s3_key(prefix: str, key: str) -> str:
+        return f"{prefix}/{key}" if prefix else key
+
+    def _open_source(self, key: str):
+        if self.source_is_s3:
+            bucket, prefix = parse_s3_url(self.source)
+            return self.s3.get_object(Bucket=bucket, Key=self._s3_key(prefix, key))["Body"]
+        return open(self._local(self.source, key), "rb")
+
+    def restore_object(self, obj: dict) -> tuple:
+        """Copy one object through the throttle; returns (obj, status)."""
+        key = obj["key"]
+        try:
+            raw = self._open_source(key)
+            try:
+                reader = ThrottledReader(raw, self.bucket, self._add_progress)
+                if self.target_is_s3:
+                    bucket, prefix = parse_s3_url(self.target)
+                    self.s3.upload_fileobj(reader, bucket, self._s3_key(prefix, key))
+                    size = self.s3.head_object(Bucket=bucket, Key=self._s3_key(prefix, key))["ContentLength"]
+                else:
+                    path = self._local(self.target, key)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp = f"{path}.part"
+                    with open(tmp, "wb") as out:
+                        for block in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                            out.write(block)
+                    os.replace(tmp, path)
+                    size = os.path.getsize(path)
+            finally:
+                raw.close()
+            if size != obj["size"]:
+                return obj, f"size mismatch ({size} != {obj['size']})"
+            if not self.target_is_s3 and self.verify_etags and obj.get("etag") \
+                    and not file_etag(path, size, obj["etag"]):
+                return obj, "etag mismatch"
+            return obj, "ok"
+        except Exception as e:
+            return obj, f"error: {e}"
+
+    def _report_progress(self, total_bytes: int, start: float, stop: threading.Event) -> None:
+        while not stop.wait(5):
+            elapsed = time.time() - start
+            rate = self.done_bytes / elapsed if elapsed else 0
+            eta = (total_bytes - self.done_bytes) / rate if rate else float("inf")
+            logger.info(f"  {self.done_bytes / MIB:.0f}/{total_bytes / MIB:.0f} MiB "
+                        f"({100 * self.done_bytes / max(total_bytes, 1):.1f}%), "
+                        f"{rate / 1e6:.1f} MB/s, ETA {eta:.0f}s")
+
+    def run(self, hot: list = (), prefix: str = "", dry_run: bool = False, verify_etags: bool = False) -> dict:
+        """Restore everything in the manifest (optionally only under `prefix`)."""
+        self.verify_etags = verify_etags
+        logger.info("=" * 60)
+        logger.info(f"Restore: {self.source} → {self.target}")
+        logger.info("=" * 60)
+
+        objects = [o for o in load_manifest(self.manifest_path)["objects"].values()
+                   if o["key"].startswith(prefix)]
+        ordered = restore_order(objects, hot)
+        total_bytes = sum(o["size"] for o in ordered)
+        for cls, label in PRIORITY_LABELS.items():
+            group = [o for o in ordered if priority_class(o["key"]) == cls]
+            logger.info(f"  {label:<14}: {len(group)} objects, {sum(o['size'] for o in group) / MIB:.1f} MiB")
+
+        stats = {"objects": len(ordered), "bytes": total_bytes, "restored": 0, "failed": [],
+                 "first_class_done_s": {}}
+        if dry_run or not ordered:
+            return stats
+
+        start = time.time()
+        stop = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(total_bytes, start, stop), daemon=True)
+        reporter.start()
+        remaining = {cls: sum(1 for o in ordered if priority_class(o["key"]) == cls) for cls in PRIORITY_LABELS}
+        try:
+            # The executor's work queue is FIFO, so submission order is restore order
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(self.restore_object, o) for o in ordered]
+                for future in as_completed(futures):
+                    obj, status = future.result()
+                    cls = priority_class(obj["key"])
+                    remaining[cls] -= 1
+                    if not remaining[cls]:
+                        stats["first_class_done_s"][PRIORITY_LABELS[cls]] = round(time.time() - start, 2)
+                    if status == "ok":
+                        stats["restored"] += 1
+                    else:
+                        logger.error(f"✗ {obj['key']}: {status}")
+                        stats["failed"].append({"key": obj["key"], "reason": status})
+        finally:
+            stop.set()
+            reporter.join()
+
+        elapsed = time.time() - start
+        stats["elapsed_s"] = round(elapsed, 2)
+        stats["mb_per_s"] = round(self.done_bytes / 1e6 / elapsed, 2) if elapsed else 0.0
+        return stats
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Parallel, prioritised restore from an s3_backup.py backup")
+    parser.add_argument("--from", dest="source", required=True, help="backup: local dir or s3://bucket/prefix")
+    parser.add_argument("--to", dest="target", required=True, help="restore target: local dir or s3://bucket/prefix")
+    parser.add_argument("--manifest", help="backup manifest (default: <from>/.backup_manifest.json)")
+    parser.add_argument("--workers", type=int, default=8, help="objects restored in parallel")
+    parser.add_argument("--max-mbps", type=float, default=0, help="bandwidth cap in megabits/s (0 = none)")
+    parser.add_argument("--hot-list", help="file of key substrings (e.g. parent ids) to restore first")
+    parser.add_argument("--prefix", default="", help="only restore keys under this prefix")
+    parser.add_argument("--verify-etags", action="store_true", help="also check MD5/ETag of local restores")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint (MinIO, moto server)")
+    parser.add_argument("--dry-run", action="store_true", help="show the restore plan only")
+    args = parser.parse_args()
+
+    hot = []
+    if args.hot_list:
+        with open(args.hot_list, encoding="utf-8") as f:
+            hot = [line.strip() for line in f if line.strip()]
+
+    tool = S3RestoreTool(args.source, args.target, args.manifest, args.workers, args.max_mbps, args.endpoint_url)
+    stats = tool.run(hot=hot, prefix=args.prefix, dry_run=args.dry_run, verify_etags=args.verify_etags)
+
+    logger.info("=" * 60)
+    logger.info(f"Objects in plan : {stats['objects']} ({stats['bytes'] / MIB:.1f} MiB)")
+    if not args.dry_run and stats["objects"]:
+        logger.info(f"Restored        : {stats['restored']} in {stats['elapsed_s']}s = {stats['mb_per_s']} MB/s")
+        for label, seconds in stats["first_class_done_s"].items():
+            logger.info(f"  {label:<14} complete after {seconds}s")
+    if stats["failed"]:
+        logger.error(f"✗ {len(stats['failed'])} object(s) failed to restore")
+        sys.exit(1)
+    logger.info("✓ Restore completed successfully")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Tests for the cas_backup.py CLI (run with `python -m pytest` from this directory).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cas_backup.py")
+
+
+class CasBackupCliTest(unittest.TestCase):
+    def cas(self, *args):
+        proc = subprocess.run([sys.executable, SCRIPT, *args], capture_output=True, text=True, cwd=self.tmp)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        return proc.stderr
+
+    def test_documented_commands(self):
+        with tempfile.TemporaryDirectory() as self.tmp:
+            files = {"records/a.json": b"{}", "files/book.pdf": os.urandom(300000)}
+            for path, data in files.items():
+                os.makedirs(os.path.join(self.tmp, "backup", os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(self.tmp, "backup", path), "wb") as f:
+                    f.write(data)
+
+            self.cas("snapshot", "./backup", "--store", "./cas_store")
+            self.cas("snapshot", "./backup", "--store", "./cas_store", "--name", "2026-01-15")
+            self.assertIn("2026-01-15", self.cas("list", "--store", "./cas_store"))
+            self.cas("restore", "2026-01-15", "./restore", "--store", "./cas_store", "--workers", "2")
+            self.cas("restore", "2026-01-15", "./restore-records", "--store", "./cas_store", "--prefix", "records/")
+            self.assertIn("1 snapshot(s) kept", self.cas("prune", "--store", "./cas_store", "--keep", "1"))
+
+            for path, data in files.items():
+                with open(os.path.join(self.tmp, "restore", path), "rb") as f:
+                    self.assertEqual(f.read(), data)
+            self.assertEqual(os.listdir(os.path.join(self.tmp, "restore-records")), ["records"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests for s3_restore.py (run with `python -m pytest` from this directory; needs moto).
+"""
+
+import io
+import os
+import tempfile
+import unittest
+
+import boto3
+from moto import mock_aws
+
+from s3_backup import MIB, save_manifest
+from s3_restore import CHUNK_SIZE, S3RestoreTool, ThrottledReader, TokenBucket
+
+
+class ThrottledReaderTest(unittest.TestCase):
+    def reader(self, data):
+        self.charged = []
+        return ThrottledReader(io.BytesIO(data), TokenBucket(0), self.charged.append)
+
+    def test_read_n_returns_n_bytes_across_blocks(self):
+        data = os.urandom(3 * CHUNK_SIZE + 7)
+        reader = self.reader(data)
+        self.assertEqual(reader.read(2 * CHUNK_SIZE + 1), data[:2 * CHUNK_SIZE + 1])
+        self.assertTrue(all(n <= CHUNK_SIZE for n in self.charged))
+        self.assertEqual(reader.read(), data[2 * CHUNK_SIZE + 1:])
+        self.assertEqual(reader.read(10), b"")
+        self.assertEqual(sum(self.charged), len(data))
+
+    def test_short_read_only_at_eof(self):
+        reader = self.reader(b"x" * 10)
+        self.assertEqual(reader.read(CHUNK_SIZE * 4), b"x" * 10)
+
+
+@mock_aws
+class RestoreToS3Test(unittest.TestCase):
+    def test_large_object_uses_multipart(self):
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="recovery")
+        data = os.urandom(20 * MIB)
+        with tempfile.TemporaryDirectory() as backup:
+            os.makedirs(os.path.join(backup, "files"))
+            with open(os.path.join(backup, "files", "book.pdf"), "wb") as f:
+                f.write(data)
+            save_manifest({"version": 1, "objects": {"files/book.pdf": {
+                "key": "files/book.pdf", "size": len(data), "etag": "", "last_modified": ""}}},
+                os.path.join(backup, ".backup_manifest.json"))
+            stats = S3RestoreTool(backup, "s3://recovery/dr", workers=2, client=s3).run()
+
+        self.assertEqual(stats["restored"], 1, stats["failed"])
+        head = s3.head_object(Bucket="recovery", Key="dr/files/book.pdf")
+        self.assertIn("-", head["ETag"], "expected a multipart upload ETag")
+        self.assertEqual(s3.get_object(Bucket="recovery", Key="dr/files/book.pdf")["Body"].read(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Turath Arabic Text Normalization
+=================================
+Supports: P3-2.2 (RAG pipeline helpers)
+
+Light orthographic normalization for matching OCR'd Arabic text, close to
+what the OpenSearch Arabic analyzer does before stemming:
+
+  - strip tashkeel (harakat, tanween, shadda, sukun, dagger alef)
+  - strip tatweel (ـ)
+  - unify alef forms (أ إ آ ٱ → ا), alef maqsura (ى → ي), ta marbuta (ة → ه)
+  - unify hamza carriers (ؤ → و, ئ → ي)
+  - map Arabic-Indic digits to ASCII, lowercase Latin text
+
+`light_stem` additionally strips the definite article and common
+proclitics (وال، بال، كال، فال، لل), so "التاريخ" and "تاريخ" match.
+"""
+
+import re
+
+_DIACRITICS_RE = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_TOKEN_RE = re.compile(r"\w+")
+_ARTICLES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_TRANSLATE = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي",
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+})
+
+
+def normalize_arabic(text):
+    """Return `text` with Arabic orthographic variants folded together."""
+    return _DIACRITICS_RE.sub("", text).translate(_TRANSLATE).lower()
+
+
+def tokenize(text):
+    """Normalize and split `text` into word tokens."""
+    return _TOKEN_RE.findall(normalize_arabic(text))
+
+
+def light_stem(token):
+    """Strip a leading definite article/proclitic, keeping at least 2 letters."""
+    for prefix in _ARTICLES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
@@ -0,0 +1,306 @@
+"""
+Turath Autocomplete Prefix Index
+=================================
+Supports: P2-1.1 (Enhanced HOCR Search), P3-3.2 (Search Robustness Tests)
+
+/autocomplete/{pid}?q=نج currently scans a record's OCR words on every
+keystroke (and only the first 5 pages, to keep that affordable). This
+module precomputes the answer offline:
+
+  - term frequencies per record and collection-wide (section "*"), over
+    normalized Arabic tokens (arabic_text.normalize_arabic), each with its
+    most frequent surface form for display
+  - per section, terms sorted by their UTF-8 bytes, so every prefix is one
+    contiguous range found by binary search
+  - precomputed top-k for every prefix of up to --prefix-len characters;
+    longer prefixes select the top-k from their (short) range directly
+
+Everything lives in one file that the service mmaps at startup; only the
+small section directory is read eagerly:
+
+    header   "TAC1", version, sections, top_k, prefix_len, footer location
+    sections (each array 8-byte aligned)
+             key_off u32[n+1], keys (UTF-8), counts u32[n],
+             disp_off u32[n+1], display (UTF-8),
+             pfx_off u32[m+1], prefixes (UTF-8), pfx_top i32[m, top_k]
+    footer   pids ("\\n"-joined UTF-8), section table i64[sections, 16]
+             (offset and length of each section array)
+
+Input is a harvest directory (rag_harvest.py) or a packed page-text store
+(page_text_store.py), read one record at a time.
+
+Usage:
+    python autocomplete_index.py build --harvest rag_harvest_output --out autocomplete.idx
+    python autocomplete_index.py build --store page_store --out autocomplete.idx
+    python autocomplete_index.py query --index autocomplete.idx 7cxkj-kvp29 نج
+    python autocomplete_index.py query --index autocomplete.idx "*" تار
+"""
+
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from arabic_text import normalize_arabic, tokenize
+
+SEPARATOR = "=" * 65
+MAGIC = b"TAC1"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIQQQ")  # magic, version, sections, top_k, prefix_len, pid blob, its length, table
+COLLECTION = "*"
+PUNCTUATION = "!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~،؛؟«»…“”"
+ARRAYS = ("key_off", "keys", "counts", "disp_off", "display", "pfx_off", "prefixes", "pfx_top")
+
+
+class TermCounter:
+    """Normalized-term frequencies plus the most common surface form of each term."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.surfaces = defaultdict(Counter)
+
+    def add_text(self, text):
+        for word in text.split():
+            surface = word.strip(PUNCTUATION)
+            tokens = tokenize(surface)
+            for token in tokens:
+                self.counts[token] += 1
+                self.surfaces[token][surface if len(tokens) == 1 else token] += 1
+
+    def update(self, other):
+        self.counts.update(other.counts)
+        for token, surfaces in other.surfaces.items():
+            self.surfaces[token].update(surfaces)
+
+
+def _offsets_and_blob(strings):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def encode_section(terms, top_k, prefix_len):
+    """Serialize one TermCounter into the section arrays (name → bytes-like)."""
+    keys = sorted(terms.counts, key=lambda t: t.encode("utf-8"))
+    counts = np.array([terms.counts[t] for t in keys], dtype="<u4")
+    display = [terms.surfaces[t].most_common(1)[0][0] for t in keys]
+    key_off, key_blob = _offsets_and_blob(keys)
+    disp_off, disp_blob = _offsets_and_blob(display)
+
+    # Rank once by (-count, key); each prefix's top-k is then its first k ranked members
+    rank = np.lexsort((np.arange(len(keys)), -counts.astype(np.int64)))
+    by_prefix = defaultdict(list)
+    for i in rank:
+        term = keys[i]
+        for n in range(1, min(prefix_len, len(term)) + 1):
+            bucket = by_prefix[term[:n]]
+            if len(bucket) < top_k:
+                bucket.append(i)
+    prefixes = sorted(by_prefix, key=lambda p: p.encode("utf-8"))
+    pfx_off, pfx_blob = _offsets_and_blob(prefixes)
+    pfx_top = np.full((len(prefixes), top_k), -1, dtype="<i4")
+    for row, prefix in enumerate(prefixes):
+        top = by_prefix[prefix]
+        pfx_top[row, :len(top)] = top
+    return {"key_off": key_off, "keys": key_blob, "counts": counts, "disp_off": disp_off,
+            "display": disp_blob, "pfx_off": pfx_off, "prefixes": pfx_blob, "pfx_top": pfx_top}
+
+
+def _write_aligned(f, data):
+    """Write at the next 8-byte boundary; returns (offset, length)."""
+    f.write(b"\0" * (-f.tell() % 8))
+    start = f.tell()
+    f.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+    return start, f.tell() - start
+
+
+def build_autocomplete_index(records, out_path, top_k=10, prefix_len=2):
+    """records: iterable of (pid, iterable of page texts), one record at a time."""
+    start = time.perf_counter()
+    collection = TermCounter()
+    pids, table = [], []
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+
+        def write_section(pid, terms):
+            arrays = encode_section(terms, top_k, prefix_len)
+            pids.append(pid)
+            table.append([v for name in ARRAYS for v in _write_aligned(f, arrays[name])])
+
+        for pid, pages in records:
+            terms = TermCounter()
+            for text in pages:
+                terms.add_text(text)
+            write_section(pid, terms)
+            collection.update(terms)
+        write_section(COLLECTION, collection)
+
+        pid_at, pid_bytes = _write_aligned(f, "\n".join(pids).encode("utf-8"))
+        table_at, _ = _write_aligned(f, np.array(table, dtype="<i8"))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(pids), top_k, prefix_len, pid_at, pid_bytes, table_at))
+    os.replace(tmp, out_path)
+    return {"records": len(pids) - 1, "terms": len(collection.counts), "bytes": os.path.getsize(out_path),
+            "elapsed_s": round(time.perf_counter() - start, 2)}
+
+
+class _Section:
+    """NumPy/mmap views over one section's arrays."""
+
+    def __init__(self, mm, row, top_k):
+        spans = dict(zip(ARRAYS, zip(row[0::2], row[1::2])))
+        self.mm = mm
+        self.keys_at = spans["keys"][0]
+        self.display_at = spans["display"][0]
+        self.prefixes_at = spans["prefixes"][0]
+        self.counts = self._view(spans["counts"], "<u4")
+        self.disp_off = self._view(spans["disp_off"], "<u4")
+        self.pfx_top = self._view(spans["pfx_top"], "<i4").reshape(-1, top_k)
+        # Plain lists make the bisect loop cheaper than NumPy scalar access
+        self.key_bounds = self._view(spans["key_off"], "<u4").tolist()
+        self.pfx_bounds = self._view(spans["pfx_off"], "<u4").tolist()
+        self.n_terms = len(self.key_bounds) - 1
+        self.n_prefixes = len(self.pfx_bounds) - 1
+
+    def _view(self, span, dtype):
+        offset, length = span
+        return np.frombuffer(self.mm, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    def key(self, i):
+        return self.mm[self.keys_at + self.key_bounds[i]:self.keys_at + self.key_bounds[i + 1]]
+
+    def prefix(self, i):
+        return self.mm[self.prefixes_at + self.pfx_bounds[i]:self.prefixes_at + self.pfx_bounds[i + 1]]
+
+    def display(self, i):
+        a, b = int(self.disp_off[i]), int(self.disp_off[i + 1])
+        return self.mm[self.display_at + a:self.display_at + b].decode("utf-8")
+
+    @staticmethod
+    def _lower_bound(get, n, target):
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if get(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def top(self, prefix, k, prefix_len):
+        target = prefix.encode("utf-8")
+        if len(prefix) <= prefix_len:
+            row = self._lower_bound(self.prefix, self.n_prefixes, target)
+            if row == self.n_prefixes or self.prefix(row) != target:
+                return []
+            return [int(i) for i in self.pfx_top[row, :k] if i >= 0]
+        lo = self._lower_bound(self.key, self.n_terms, target)
+        # No UTF-8 sequence contains 0xFF, so this bounds every key starting with target
+        hi = self._lower_bound(self.key, self.n_terms, target + b"\xff")
+        if lo == hi:
+            return []
+        window = self.counts[lo:hi].astype(np.int64)
+        order = np.lexsort((np.arange(hi - lo), -window))[:k]
+        return [lo + int(i) for i in order]
+
+
+class AutocompleteIndex:
+    """mmap reader: suggest(pid, q) → [(surface form, count), ...] by descending frequency."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, n_sections, self.top_k, self.prefix_len,
+         pid_at, pid_bytes, table_at) = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} autocomplete index")
+        pids = self.mm[pid_at:pid_at + pid_bytes].decode("utf-8").split("\n")
+        self.table = np.frombuffer(self.mm, dtype="<i8", count=n_sections * 2 * len(ARRAYS),
+                                   offset=table_at).reshape(n_sections, 2 * len(ARRAYS))
+        self.sections = {pid: i for i, pid in enumerate(pids)}
+
+    @lru_cache(maxsize=1024)
+    def _section(self, pid):
+        i = self.sections.get(pid)
+        return None if i is None else _Section(self.mm, self.table[i].tolist(), self.top_k)
+
+    def suggest(self, pid, q, k=10):
+        section = self._section(pid)
+        prefix = normalize_arabic(q).strip()
+        if section is None or not prefix:
+            return []
+        return [(section.display(i), int(section.counts[i]))
+                for i in section.top(prefix, min(k, self.top_k), self.prefix_len)]
+
+    def term_list(self, base, pid, q, k=10):
+        """IIIF Content Search 1.0 TermList, as /autocomplete/{pid} returns it."""
+        return {"@context": "http://iiif.io/api/search/1/context.json",
+                "@id": f"{base}/autocomplete/{pid}?q={q}",
+                "@type": "search:TermList",
+                "terms": [{"match": w, "url": f"{base}/search/{pid}?q={w}", "count": c}
+                          for w, c in self.suggest(pid, q, k)]}
+
+
+def iter_harvest_records(harvest_dir):
+    """(pid, page texts) per record from rag_harvest.py shards."""
+    from rag_dedup import iter_harvest_pages
+
+    for pid, group in itertools.groupby(iter_harvest_pages(harvest_dir), key=lambda t: t[0]):
+        yield pid, (page["text"] for _, _, page in group)
+
+
+def iter_store_records(store_dir):
+    """(pid, [whole-book text]) per record from a packed page-text store."""
+    from page_text_store import PageTextStore
+
+    store = PageTextStore(store_dir)
+    for pid in store.mapping:
+        book = store.book(pid)
+        if book is not None:
+            yield pid, [bytes(book.text).decode("utf-8")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Autocomplete Prefix Index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="build the index file")
+    source = build.add_mutually_exclusive_group(required=True)
+    source.add_argument("--harvest", help="rag_harvest.py output directory")
+    source.add_argument("--store", help="page_text_store.py store directory")
+    build.add_argument("--out", default="autocomplete.idx")
+    build.add_argument("--top-k", type=int, default=10)
+    build.add_argument("--prefix-len", type=int, default=2, help="precompute top-k for prefixes up to this length")
+
+    query = sub.add_parser("query", help="print suggestions for a prefix")
+    query.add_argument("--index", default="autocomplete.idx")
+    query.add_argument("pid", help=f'record id, or "{COLLECTION}" for collection-wide')
+    query.add_argument("q")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        records = iter_harvest_records(args.harvest) if args.harvest else iter_store_records(args.store)
+        stats = build_autocomplete_index(records, args.out, args.top_k, args.prefix_len)
+        print(SEPARATOR)
+        print(f"Autocomplete index → {args.out}")
+        print(SEPARATOR)
+        print(f"  Records            : {stats['records']}")
+        print(f"  Distinct terms     : {stats['terms']}")
+        print(f"  File size          : {stats['bytes'] / 1e6:.2f} MB, built in {stats['elapsed_s']}s")
+        print(SEPARATOR)
+        return
+
+    for word, count in AutocompleteIndex(args.index).suggest(args.pid, args.q):
+        print(f"{count:>8}  {word}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Turath Batch Metadata Extractor
+================================
+Supports: P3-2.2 (RAG Feasibility Test) / P2-1.1
+
+extract_turath_metadata() (rag_feasibility_test.py) handles one record at
+a time: it rebuilds its helper closures on every call and re-walks the
+nested vocabulary dicts (turath:language, turath:rights,
+turath:resource_type) of every record, although a whole harvest only ever
+contains a few dozen distinct vocabulary entries.
+
+BatchMetadataExtractor takes an iterable of records and resolves
+vocabulary labels through a shared VocabularyLabels cache:
+
+    (vocabulary, entry id, lang) → label
+    (vocabulary, entry ids)      → joined labels for every requested language
+
+so each distinct entry, and each distinct combination such as
+Arabic + English, is resolved once per process. All requested languages
+(default en and ar) come out of the same pass. Rows are compact
+MetadataRow namedtuples; vocabulary fields hold one label per language, in
+the order of `langs`.
+
+    extractor = BatchMetadataExtractor(("en", "ar"))
+    for row in extractor.extract(records):
+        row.language            # ("Arabic; English", "العربية; الإنجليزية")
+        extractor.as_dict(row)  # == extract_turath_metadata(record)
+
+Usage:
+    python batch_metadata.py --target local --limit 1000 --out metadata.csv
+"""
+
+import argparse
+import csv
+from collections import namedtuple
+
+SEPARATOR = "=" * 65
+LANGS = ("en", "ar")
+VOCAB_FIELDS = ("language", "resource_type", "rights")
+
+MetadataRow = namedtuple(
+    "MetadataRow",
+    "pid title creator_arabic publisher date language description resource_type "
+    "coverage_start coverage_end source rights identifier")
+
+
+class VocabularyLabels:
+    """Label cache shared across records (and extractors) in one process."""
+
+    def __init__(self, langs=LANGS):
+        self.langs = tuple(langs)
+        self.labels = {}
+        self._joined = {}
+        self._single = {}
+        self.hits = 0
+        self.misses = 0
+
+    def label(self, vocabulary, item, lang, default):
+        """Title of one vocabulary entry in `lang`, falling back to `default`."""
+        if not isinstance(item, dict):
+            return str(item)
+        entry_id = item.get("id")
+        title = item.get("title", {})
+        # only a title is shared by every copy of the entry; the fallback is per record
+        if entry_id is None or lang not in title:
+            return title.get(lang, default)
+        key = (vocabulary, entry_id, lang)
+        label = self.labels.get(key)
+        if label is None:
+            label = self.labels[key] = title[lang]
+        return label
+
+    def _entry_id(self, item):
+        """The id to cache `item`'s labels under, or None if it has no id or lacks a title in any language."""
+        if not isinstance(item, dict):
+            return None
+        title = item.get("title", {})
+        return item.get("id") if all(lang in title for lang in self.langs) else None
+
+    def joined(self, vocabulary, items):
+        """"; "-joined labels of a multi-valued vocabulary field, one string per language."""
+        if not isinstance(items, list):
+            items = [items]
+        ids = tuple(self._entry_id(i) for i in items)
+        cacheable = None not in ids
+        if cacheable:
+            key = (vocabulary, ids)
+            labels = self._joined.get(key)
+            if labels is not None:
+                self.hits += 1
+                return labels
+        self.misses += 1
+        # str(item) is extract_turath_metadata's fallback for an untitled entry
+        labels = tuple("; ".join(self.label(vocabulary, i, lang, str(i)) for i in items) for lang in self.langs)
+        if cacheable:
+            self._joined[key] = labels
+        return labels
+
+    def single(self, vocabulary, item):
+        """Labels of a single-valued vocabulary field ("" unless it is an entry dict)."""
+        if not isinstance(item, dict):
+            return ("",) * len(self.langs)
+        entry_id = self._entry_id(item)
+        if entry_id is not None:
+            labels = self._single.get((vocabulary, entry_id))
+            if labels is not None:
+                self.hits += 1
+                return labels
+        self.misses += 1
+        labels = tuple(self.label(vocabulary, item, lang, "") for lang in self.langs)
+        if entry_id is not None:
+            self._single[(vocabulary, entry_id)] = labels
+        return labels
+
+
+def vocabulary_ids(record):
+    """Entry ids of the vocabulary fields ({"language": ["ara"], ...}), for id-based filters."""
+    cf = record.get("custom_fields", {})
+    ids = {}
+    for field, value in (("language", cf.get("turath:language")),
+                         ("resource_type", cf.get("turath:resource_type")
+                          or record.get("metadata", {}).get("resource_type")),
+                         ("rights", cf.get("turath:rights"))):
+        items = value if isinstance(value, list) else [value] if value else []
+        ids[field] = [item["id"] for item in items if isinstance(item, dict) and item.get("id")]
+    return ids
+
+
+def _str_field(value):
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value if v)
+    return str(value) if value else ""
+
+
+class BatchMetadataExtractor:
+    """Extract Turath custom metadata from many records with shared vocabulary resolution."""
+
+    def __init__(self, langs=LANGS, labels=None):
+        self.labels = labels or VocabularyLabels(langs)
+        self.langs = self.labels.langs
+
+    def extract_one(self, record):
+        cf = record.get("custom_fields", {})
+        labels = self.labels
+        return MetadataRow(
+            record.get("id", ""),
+            _str_field(cf.get("turath:title", "")) or record.get("metadata", {}).get("title", "Unknown"),
+            "; ".join(cf.get("turath:creator_arabic", []) or []),
+            "; ".join(cf.get("turath:publisher", []) or []),
+            _str_field(cf.get("turath:date", "")),
+            labels.joined("languages", cf.get("turath:language", [])),
+            " | ".join(cf.get("turath:description", []) or []),
+            labels.single("resourcetypes", cf.get("turath:resource_type")),
+            _str_field(cf.get("turath:coverage_temporal_start", "")),
+            _str_field(cf.get("turath:coverage_temporal_end", "")),
+            "; ".join(cf.get("turath:source", []) or []),
+            labels.single("licenses", cf.get("turath:rights")),
+            "; ".join(cf.get("turath:identifier", []) or []),
+        )
+
+    def extract(self, records):
+        """Yield a MetadataRow per record, one record in memory at a time."""
+        extract_one = self.extract_one
+        for record in records:
+            yield extract_one(record)
+
+    def as_dict(self, row, lang="en"):
+        """The row in extract_turath_metadata()'s dict form, vocabulary labels in `lang`."""
+        i = self.langs.index(lang)
+        d = row._asdict()
+        for field in VOCAB_FIELDS:
+            d[field] = d[field][i]
+        return d
+
+
+def write_csv(rows, path, langs=LANGS):
+    """Write rows with one column per vocabulary field and language (language_en, language_ar, …)."""
+    header = [f"{f}_{lang}" if f in VOCAB_FIELDS else f for f in MetadataRow._fields
+              for lang in (langs if f in VOCAB_FIELDS else (None,))]
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([v for field, value in zip(MetadataRow._fields, row)
+                             for v in (value if field in VOCAB_FIELDS else (value,))])
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Batch Metadata Extractor")
+    parser.add_argument("--target", choices=["local", "prod"], default="local")
+    parser.add_argument("--base-url", help="override the InvenioRDM base URL")
+    parser.add_argument("--query", default="", help="records search query (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="max records")
+    parser.add_argument("--langs", default=",".join(LANGS), help="comma-separated label languages")
+    parser.add_argument("--out", default="turath_metadata.csv")
+    args = parser.parse_args()
+
+    from rag_harvest import list_records  # rag_harvest imports this module
+
+    base_url = args.base_url or ("https://invenio.turath-project.com" if args.target == "prod"
+                                 else "https://127.0.0.1:5000")
+    langs = tuple(lang for lang in args.langs.split(",") if lang)
+    extractor = BatchMetadataExtractor(langs)
+    count = write_csv(extractor.extract(list_records(base_url, q=args.query, limit=args.limit)), args.out, langs)
+
+    labels = extractor.labels
+    print(SEPARATOR)
+    print(f"Turath Batch Metadata — {base_url}")
+    print(SEPARATOR)
+    print(f"  Records            : {count} → {args.out}")
+    print(f"  Languages          : {', '.join(langs)}")
+    print(f"  Vocabulary labels  : {len(labels.labels)} cached, {labels.hits} hits / {labels.misses} misses")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Turath Autocomplete Prefix Index Benchmark
+===========================================
+Supports: P2-1.1 / P3-3.2
+
+Builds an autocomplete index over a synthetic corpus and times suggestions
+for 1-, 2- and 3-character Arabic prefixes two ways:
+
+  scan     count prefix matches over the record's OCR words on each request
+           (what the service does today, but over every page, not just 5)
+  index    AutocompleteIndex.suggest (mmap, binary search, precomputed top-k)
+
+It also times collection-wide ("*") suggestions, index load (startup) time,
+and checks that both paths rank the same top term.
+
+Usage:
+    python bench_autocomplete_index.py
+    python bench_autocomplete_index.py --records 200 --pages 400 --words 400
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from arabic_text import normalize_arabic, tokenize
+from autocomplete_index import COLLECTION, AutocompleteIndex, build_autocomplete_index
+from local_standin import SyntheticCorpus
+
+SEPARATOR = "=" * 65
+
+
+def scan_suggest(corpus, pid, q, k=10):
+    prefix = normalize_arabic(q)
+    counts = Counter()
+    for page_no in range(1, corpus.pages + 1):
+        for word, *_ in corpus.page_words(pid, page_no):
+            for token in tokenize(word):
+                if token.startswith(prefix):
+                    counts[token] += 1
+    return counts.most_common(k)
+
+
+def timed(fn, queries):
+    samples = []
+    for args in queries:
+        t = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.95)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Autocomplete Prefix Index Benchmark")
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--queries", type=int, default=300, help="queries per prefix length")
+    parser.add_argument("--prefix-len", type=int, default=2, help="precomputed prefix length")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.records, args.pages, args.words, vocab_size=20000)
+    records = ((pid, (corpus.page_text(pid, p) for p in range(1, args.pages + 1))) for pid in corpus.pids)
+    rng = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "autocomplete.idx")
+        stats = build_autocomplete_index(records, path, prefix_len=args.prefix_len)
+        start = time.perf_counter()
+        index = AutocompleteIndex(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        words = [w for w in corpus.vocab if len(w) >= 3]
+        rows = []
+        for n in (1, 2, 3):
+            queries = [(rng.choice(corpus.pids), rng.choice(words)[:n]) for _ in range(args.queries)]
+            for pid, q in queries[:20]:
+                expected = scan_suggest(corpus, pid, q, 1)
+                got = index.suggest(pid, q, 1)
+                assert [c for _, c in expected] == [c for _, c in got], (pid, q, expected, got)
+            scan = timed(lambda pid, q: scan_suggest(corpus, pid, q), queries[:max(10, args.queries // 20)])
+            indexed = timed(index.suggest, queries)
+            collection = timed(index.suggest, [(COLLECTION, q) for _, q in queries])
+            rows.append((n, scan, indexed, collection))
+        example = index.suggest(corpus.pids[0], "نج", 3)
+
+    print(SEPARATOR)
+    print("Turath Autocomplete Prefix Index Benchmark")
+    print(f"{args.records} records x {args.pages} pages x {args.words} words, "
+          f"top-k precomputed for prefixes ≤ {args.prefix_len} chars")
+    print(SEPARATOR)
+    print(f"  Build              : {stats['elapsed_s']}s, {stats['terms']} distinct terms, "
+          f"{stats['bytes'] / 1e6:.2f} MB")
+    print(f"  Startup (mmap)     : {load_ms:.2f} ms")
+    print(f"  Example 'نج'       : {example}")
+    star = '"*" p50 µs'
+    print(f"\n  {'Prefix':<8}{'scan p50 µs':>14}{'index p50 µs':>14}{'index p95 µs':>14}{star:>13}")
+    for n, scan, indexed, collection in rows:
+        print(f"  {n} char  {scan[0]:>14.0f}{indexed[0]:>14.1f}{indexed[1]:>14.1f}{collection[0]:>13.1f}")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
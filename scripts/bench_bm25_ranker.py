@@ -0,0 +1,132 @@
+"""
+Turath BM25 Ranker Benchmark
+=============================
+Supports: P3-3.2
+
+Runs the run_search_tests.py query set through the local BM25 engine
+(bm25_ranker.py), reporting index size, build time and query throughput.
+With --compare it also sends each query to a live /api/records endpoint
+with sort=bestmatch and reports overlap@k between the two rankings and the
+hit totals side by side.
+
+Without --source, a synthetic record export is generated from the local
+stand-in corpus (local_standin.py).
+
+Usage:
+    python bench_bm25_ranker.py
+    python bench_bm25_ranker.py --source records.jsonl --compare --target prod
+    python bench_bm25_ranker.py --compare --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bm25_ranker import BM25Index, QuerySyntaxError, iter_documents
+from local_standin import SyntheticCorpus
+
+SEPARATOR = "=" * 65
+
+# (query, kwargs) pairs issued by run_search_tests.run_tests
+SUITE_QUERIES = [
+    ("001_تاريخ_نجد", {}),
+    ("تاريخ", {}),
+    (r"custom_fields.turath\:title:تاريخ", {}),
+    (r"custom_fields.turath\:date:2010", {}),
+    (r'custom_fields.turath\:fulltext:"تاريخ نجد"', {}),
+    (r"custom_fields.turath\:fulltext:تاريخ", {}),
+    ("تاريخ", {"f": "resource_type:publication-book"}),
+    (r"custom_fields.turath\:fulltext:نجد", {"size": 1}),
+    ("تاريخ", {"size": 2, "page": 1, "sort": "bestmatch"}),
+    ("تاريخ", {"size": 2, "page": 2, "sort": "bestmatch"}),
+]
+
+
+def write_synthetic_export(path, records, pages, words):
+    corpus = SyntheticCorpus(records, pages, words)
+    with open(path, "w", encoding="utf-8") as f:
+        for pid in corpus.pids:
+            record = corpus.record(pid)
+            record["custom_fields"]["turath:fulltext"] = [corpus.page_text(pid, p) for p in range(1, pages + 1)]
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath BM25 Ranker Benchmark")
+    parser.add_argument("--source", help="records JSONL export or harvest dir (default: synthetic)")
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the query set")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--compare", action="store_true", help="compare with live sort=bestmatch")
+    parser.add_argument("--target", choices=["local", "prod"], default="local")
+    parser.add_argument("--base-url", help="override the InvenioRDM base URL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if not source:
+            source = os.path.join(tmp, "records.jsonl")
+            write_synthetic_export(source, args.records, args.pages, args.words)
+        start = time.perf_counter()
+        index = BM25Index.build(iter_documents(source))
+        build_s = time.perf_counter() - start
+
+    print(SEPARATOR)
+    print("Turath BM25 Ranker Benchmark")
+    print(f"{len(index.pids)} records indexed in {build_s:.2f}s, "
+          f"{index.size_bytes() / 1e6:.2f} MB compressed postings")
+    print(SEPARATOR)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for q, kwargs in SUITE_QUERIES:
+            index.search(q, **kwargs)
+    elapsed = time.perf_counter() - start
+    n = args.repeat * len(SUITE_QUERIES)
+    print(f"  Throughput: {n / elapsed:.1f} queries/s ({elapsed * 1000 / n:.2f} ms/query)")
+
+    print(f"\n  {'Query':<48}{'Local':>7}{'ms':>8}")
+    for q, kwargs in SUITE_QUERIES:
+        start = time.perf_counter()
+        total, _ = index.search(q, **kwargs)
+        label = q + (f" {kwargs}" if kwargs else "")
+        print(f"  {label[:47]:<48}{total:>7}{(time.perf_counter() - start) * 1000:>8.2f}")
+
+    if args.compare:
+        from run_search_tests import search
+
+        base_url = args.base_url or ("https://invenio.turath-project.com" if args.target == "prod"
+                                     else "https://127.0.0.1:5000")
+        print(f"\n  Overlap with live bestmatch @ {base_url} (top {args.k}):")
+        print(f"  {'Query':<48}{'Live':>7}{'Local':>7}{'Overlap':>9}")
+        overlaps = []
+        for q, kwargs in SUITE_QUERIES:
+            params = {"size": args.k, "sort": "bestmatch", **{k: v for k, v in kwargs.items() if k == "f"}}
+            try:
+                live_total, live_hits, _ = search(base_url, q, **params)
+            except Exception as e:
+                print(f"  {q[:47]:<48}  ⚠️  live query failed: {e}")
+                continue
+            local_total, local_hits = index.search(q, **params)
+            live_ids = {h["id"] for h in live_hits}
+            local_ids = {pid for pid, _ in local_hits}
+            overlap = len(live_ids & local_ids) / max(len(live_ids), 1)
+            overlaps.append(overlap)
+            print(f"  {q[:47]:<48}{live_total:>7}{local_total:>7}{overlap:>9.2f}")
+        if overlaps:
+            print(f"  Mean overlap@{args.k}: {sum(overlaps) / len(overlaps):.2f}")
+    print(SEPARATOR)
+
+    try:
+        index.search('custom_fields.turath:fulltext:"unclosed quote')
+        print("  ⚠️  Malformed query was accepted")
+    except QuerySyntaxError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Turath Streaming Fulltext Aggregator Benchmark
+===============================================
+Supports: P1-2.3 / P2-1.1
+
+Writes one large synthetic book as HOCR (default 800 pages), then builds
+its turath:fulltext four ways, reading and parsing the pages each time:
+
+  join         collect every page string, then "\\n".join(pages)
+  concat       fulltext += page_text + "\\n" for every page
+  streaming    FulltextAggregator → text file (64K-char buffer) + page offsets
+  streaming    write_fulltext_document → JSON index document
+
+and reports wall time and peak Python heap (tracemalloc) against the size
+of the resulting text.
+
+Usage:
+    python bench_fulltext_aggregator.py
+    python bench_fulltext_aggregator.py --pages 1500 --words 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fulltext_aggregator import aggregate_to_file, iter_hocr_pages, page_at, read_page, write_fulltext_document
+from hocr import hocr_dir
+from local_standin import SyntheticCorpus
+
+SEPARATOR = "=" * 65
+
+
+def join_pages(directory):
+    pages = [" ".join(w for w, *_ in words) for _, words in iter_hocr_pages(directory)]
+    return "\n".join(pages)
+
+
+def concat_pages(directory):
+    fulltext = ""
+    for _, words in iter_hocr_pages(directory):
+        fulltext += " ".join(w for w, *_ in words) + "\n"
+    return fulltext
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Streaming Fulltext Aggregator Benchmark")
+    parser.add_argument("--pages", type=int, default=800)
+    parser.add_argument("--words", type=int, default=400, help="words per page")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(1, args.pages, args.words)
+    pid = corpus.pids[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus.write_hocr_tree(tmp)
+        corpus.page_words.cache_clear()
+        directory = hocr_dir(corpus.parent_id(pid), tmp)
+        text_path, doc_path = os.path.join(tmp, "fulltext.txt"), os.path.join(tmp, "doc.json")
+
+        joined, join_s, join_peak = measure(lambda: join_pages(directory))
+        text_mb = len(joined.encode("utf-8")) / 1e6
+        concat, concat_s, concat_peak = measure(lambda: concat_pages(directory))
+        offsets, stream_s, stream_peak = measure(lambda: aggregate_to_file(iter_hocr_pages(directory), text_path))
+        _, doc_s, doc_peak = measure(lambda: write_fulltext_document(iter_hocr_pages(directory), doc_path, pid))
+
+        with open(text_path, encoding="utf-8") as f:
+            assert f.read() == joined
+        with open(doc_path, encoding="utf-8") as f:
+            assert json.load(f)["custom_fields"]["turath:fulltext"] == joined
+        middle = offsets[len(offsets) // 2]
+        assert page_at(offsets, middle["start"] + 5) == middle["page_id"]
+        assert read_page(text_path, offsets, middle["page_id"]) == joined[middle["start"]:middle["end"]]
+        del joined, concat
+
+    print(SEPARATOR)
+    print("Turath Streaming Fulltext Aggregator Benchmark")
+    print(f"1 book x {args.pages} pages x {args.words} words → {text_mb:.1f} MB of UTF-8 fulltext")
+    print(SEPARATOR)
+    print(f"  {'Method':<30}{'Time s':>9}{'Peak heap MB':>15}{'x text':>9}")
+    for label, seconds, peak in [("join (list + join)", join_s, join_peak),
+                                 ("concat (+=)", concat_s, concat_peak),
+                                 ("streaming → text file", stream_s, stream_peak),
+                                 ("streaming → JSON document", doc_s, doc_peak)]:
+        print(f"  {label:<30}{seconds:>9.2f}{peak / 1e6:>15.2f}{peak / 1e6 / text_mb:>9.2f}")
+    print(f"\n  Page offset map    : {len(offsets)} entries")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Turath HOCR Page Index Benchmark
+=================================
+Supports: P2-1.1 / P2-2.1
+
+Writes a synthetic {parent_id}/hocr/NNN.hocr tree, then serves random
+/annotations-style requests (one page's words) and /search-style page
+listings two ways:
+
+  per-request  pid → parent_id, list hocr/, open + parse NNN.hocr
+  indexed      PageIndex lookup + one pread() of words.bin
+
+It also times a full index build, a no-op incremental rebuild and an
+incremental rebuild after new books appear.
+
+Local disks answer metadata calls in microseconds; EFS takes milliseconds.
+--metadata-latency-ms adds a sleep to each listing/open on the per-request
+path to approximate that (the index path makes no such calls).
+
+Usage:
+    python bench_hocr_page_index.py
+    python bench_hocr_page_index.py --records 300 --pages 100 --metadata-latency-ms 2
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from hocr import hocr_dir, page_files, page_id, parse_hocr
+from hocr_page_index import PageIndex, build_index
+from local_standin import SyntheticCorpus
+
+SEPARATOR = "=" * 65
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath HOCR Page Index Benchmark")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--new-books", type=int, default=5, help="books added before the incremental rebuild")
+    parser.add_argument("--metadata-latency-ms", type=float, default=0.0,
+                        help="simulated EFS latency per listing/open on the per-request path")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.records + args.new_books, args.pages, args.words)
+    initial, extra = corpus.pids[:args.records], corpus.pids[args.records:]
+    delay = args.metadata_latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir, index_dir = os.path.join(tmp, "books"), os.path.join(tmp, "index")
+        start = time.perf_counter()
+        mapping = corpus.write_hocr_tree(base_dir, initial)
+        write_s = time.perf_counter() - start
+
+        full = build_index(base_dir, index_dir, mapping, full=True)
+        noop = build_index(base_dir, index_dir, mapping)
+        mapping.update(corpus.write_hocr_tree(base_dir, extra))
+        incremental = build_index(base_dir, index_dir, mapping)
+
+        rng = random.Random(7)
+        requests = [(rng.choice(initial), page_id(rng.randint(1, args.pages))) for _ in range(args.requests)]
+
+        def per_request_words(pid, pid_page):
+            directory = hocr_dir(mapping[pid], base_dir)
+            time.sleep(delay)
+            names = dict((page_id(n), name) for n, name in page_files(directory))
+            time.sleep(delay)
+            with open(os.path.join(directory, names[pid_page]), "rb") as f:
+                return parse_hocr(f.read())[2]
+
+        def per_request_listing(pid):
+            time.sleep(delay)
+            return page_files(hocr_dir(mapping[pid], base_dir))
+
+        results = {}
+        with PageIndex(index_dir) as index:
+            for label, fn in [("annotations, per-request", lambda r: per_request_words(*r)),
+                              ("annotations, indexed", lambda r: index.words(*r)),
+                              ("page listing, per-request", lambda r: per_request_listing(r[0])),
+                              ("page listing, indexed", lambda r: index.pages(r[0]))]:
+                samples = []
+                for r in requests:
+                    t = time.perf_counter()
+                    fn(r)
+                    samples.append(time.perf_counter() - t)
+                results[label] = percentiles(samples)
+            assert index.words(*requests[0]) == per_request_words(*requests[0])
+
+    print(SEPARATOR)
+    print("Turath HOCR Page Index Benchmark")
+    print(f"{args.records} books x {args.pages} pages x {args.words} words "
+          f"(tree written in {write_s:.1f}s), simulated metadata latency {args.metadata_latency_ms} ms")
+    print(SEPARATOR)
+    print(f"  Full build         : {full['pages']} pages in {full['elapsed_s']}s, "
+          f"words.bin {full['words_bytes'] / 1e6:.1f} MB")
+    print(f"  No-op rebuild      : {noop['changed']} books parsed in {noop['elapsed_s']}s")
+    print(f"  {f'+{args.new_books} books rebuild':<19}: {incremental['changed']} books parsed in {incremental['elapsed_s']}s")
+    print(f"\n  {'Request':<28}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, (p50, p95) in results.items():
+        print(f"  {label:<28}{p50:>10.3f}{p95:>10.3f}")
+    speedup = results["annotations, per-request"][0] / results["annotations, indexed"][0]
+    print(f"\n  Annotations speed-up (p50): {speedup:.1f}x")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Turath Packed Page-Text Store Benchmark
+========================================
+Supports: P2-2.1 / P3-2.2
+
+Writes a synthetic HOCR tree, packs it with page_text_store.py and serves
+random page requests three ways:
+
+  hocr         open NNN.hocr, parse it, build text + citations
+  packed       PageTextStore.text_with_citations (same output, from mmap)
+  zero-copy    PageTextStore.page (memoryview text, NumPy bbox views)
+
+For each it reports p50/p95 latency and the Python heap allocated per
+request (tracemalloc peak). The mmap'd files live in the OS page cache and
+are shared between worker processes, so they do not show up as heap.
+
+Usage:
+    python bench_page_text_store.py
+    python bench_page_text_store.py --records 100 --pages 200 --words 600
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from hocr import hocr_dir, page_id, read_hocr
+from local_standin import SyntheticCorpus
+from page_text_store import PageTextStore, pack_tree
+
+SEPARATOR = "=" * 65
+
+
+def tree_bytes(root):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Packed Page-Text Store Benchmark")
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.records, args.pages, args.words)
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir, store_dir = os.path.join(tmp, "books"), os.path.join(tmp, "store")
+        mapping = corpus.write_hocr_tree(base_dir)
+        packed = pack_tree(base_dir, store_dir, mapping)
+        store = PageTextStore(store_dir)
+
+        def from_hocr(pid, pid_page):
+            _, _, words = read_hocr(os.path.join(hocr_dir(mapping[pid], base_dir), f"{pid_page[1:]}.hocr"))
+            return " ".join(w for w, *_ in words), [(w, f"{x},{y},{bw},{bh}") for w, x, y, bw, bh in words]
+
+        rng = random.Random(11)
+        requests = [(rng.choice(corpus.pids), page_id(rng.randint(1, args.pages))) for _ in range(args.requests)]
+        assert from_hocr(*requests[0]) == store.text_with_citations(*requests[0])
+        for pid in corpus.pids:  # open every book up front so timings exclude mmap setup
+            store.book(pid)
+
+        results = {}
+        for label, fn in [("hocr (read + parse)", from_hocr),
+                          ("packed (text + citations)", store.text_with_citations),
+                          ("zero-copy (views)", store.page)]:
+            samples = []
+            for r in requests:
+                t = time.perf_counter()
+                fn(*r)
+                samples.append(time.perf_counter() - t)
+            tracemalloc.start()
+            for r in requests[:200]:
+                tracemalloc.reset_peak()
+                result = fn(*r)
+                del result
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            samples.sort()
+            results[label] = (statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000, peak)
+        hocr_mb = tree_bytes(base_dir) / 1e6
+
+    print(SEPARATOR)
+    print("Turath Packed Page-Text Store Benchmark")
+    print(f"{args.records} books x {args.pages} pages x {args.words} words, {args.requests} random page requests")
+    print(SEPARATOR)
+    print(f"  HOCR on disk       : {hocr_mb:.1f} MB")
+    print(f"  Packed store       : {packed['bytes'] / 1e6:.1f} MB, packed in {packed['elapsed_s']}s")
+    print(f"\n  {'Path':<28}{'p50 ms':>9}{'p95 ms':>9}{'heap/request':>15}")
+    for label, (p50, p95, peak) in results.items():
+        print(f"  {label:<28}{p50:>9.3f}{p95:>9.3f}{peak / 1024:>12.1f} KB")
+    base = results["hocr (read + parse)"][0]
+    print(f"\n  Speed-up vs HOCR (p50): packed {base / results['packed (text + citations)'][0]:.1f}x, "
+          f"zero-copy {base / results['zero-copy (views)'][0]:.1f}x")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
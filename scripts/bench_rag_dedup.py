@@ -0,0 +1,112 @@
+"""
+Turath RAG Dedup Benchmark
+===========================
+Supports: P3-2.2
+
+Writes a synthetic harvest (same shard format as rag_harvest.py) in which a
+known fraction of records are reprints of earlier ones and every record
+repeats the same front-matter pages, with light OCR noise (dropped words,
+diacritics, alef variants) on the copies. Runs rag_dedup.py over it and
+reports reduction ratio, precision/recall of the duplicate flags against
+ground truth, and throughput.
+
+Usage:
+    python bench_rag_dedup.py
+    python bench_rag_dedup.py --records 500 --pages 40 --reprint-ratio 0.3
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from local_standin import SyntheticCorpus
+from rag_dedup import run_dedup
+
+SEPARATOR = "=" * 65
+
+FRONT_MATTER = [
+    "بسم الله الرحمن الرحيم الحمد لله رب العالمين والصلاة والسلام على اشرف الانبياء والمرسلين "
+    "وبعد فهذا كتاب في تاريخ نجد والجزيرة العربية جمعه مؤلفه من الكتب والرسائل والروايات",
+    "حقوق الطبع محفوظة للناشر الطبعة الاولى دار الملك عبد العزيز الرياض المملكة العربية السعودية "
+    "لا يجوز نسخ او نقل اي جزء من هذا الكتاب دون اذن خطي من الناشر",
+]
+NOISE = {"ا": "أ", "ي": "ى", "ه": "ة"}
+
+
+def add_ocr_noise(text, rng, drop=0.02):
+    words = [w for w in text.split() if rng.random() > drop]
+    out = []
+    for w in words:
+        if rng.random() < 0.05:
+            w = "".join(NOISE.get(c, c) for c in w)
+        if rng.random() < 0.05:
+            w = w + "َ"
+        out.append(w)
+    return " ".join(out)
+
+
+def write_synthetic_harvest(out_dir, records, pages, words, reprint_ratio, seed=7):
+    """Returns the set of (pid, page_id) that are true duplicates of an earlier page."""
+    corpus = SyntheticCorpus(records, pages, words, seed=seed)
+    rng = random.Random(seed)
+    truth = set()
+    originals = []
+    with open(os.path.join(out_dir, "shard-000-of-001.jsonl"), "w", encoding="utf-8") as f:
+        for i, pid in enumerate(corpus.pids):
+            source = rng.choice(originals) if originals and rng.random() < reprint_ratio else None
+            if source is None:
+                originals.append(pid)
+            doc_pages = []
+            for n, fm in enumerate(FRONT_MATTER, 1):
+                doc_pages.append({"page_id": f"p{n:03d}", "text": add_ocr_noise(fm, rng), "citations": []})
+                if i:
+                    truth.add((pid, f"p{n:03d}"))
+            for page_no in range(1, pages + 1):
+                page_id = f"p{page_no + len(FRONT_MATTER):03d}"
+                if source:
+                    text = add_ocr_noise(corpus.page_text(source, page_no), rng)
+                    truth.add((pid, page_id))
+                else:
+                    text = corpus.page_text(pid, page_no)
+                doc_pages.append({"page_id": page_id, "text": text, "citations": []})
+            f.write(json.dumps({"pid": pid, "metadata": {"pid": pid}, "pages": doc_pages},
+                               ensure_ascii=False) + "\n")
+    return truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath RAG Dedup Benchmark")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--reprint-ratio", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--shingle", type=int, default=3, help="words per shingle")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as harvest, tempfile.TemporaryDirectory() as out:
+        truth = write_synthetic_harvest(harvest, args.records, args.pages, args.words, args.reprint_ratio)
+        report = run_dedup(harvest, out, threshold=args.threshold, shingle=args.shingle)
+        with open(os.path.join(out, "duplicates.jsonl"), encoding="utf-8") as f:
+            flagged = {(d["pid"], d["page_id"]) for d in map(json.loads, f)}
+
+    true_pos = len(flagged & truth)
+    print(SEPARATOR)
+    print("Turath RAG Dedup Benchmark")
+    print(f"{args.records} records x {args.pages + len(FRONT_MATTER)} pages, "
+          f"{args.reprint_ratio:.0%} reprints, threshold {args.threshold}")
+    print(SEPARATOR)
+    print(f"  Pages in          : {report['pages_in']}")
+    print(f"  Canonical chunks  : {report['canonical_chunks']}")
+    print(f"  Reduction ratio   : {report['reduction_ratio']:.1%} "
+          f"(ground truth {len(truth) / report['pages_in']:.1%})")
+    print(f"  Precision         : {true_pos / max(len(flagged), 1):.3f}")
+    print(f"  Recall            : {true_pos / max(len(truth), 1):.3f}")
+    print(f"  Throughput        : {report['pages_per_s']} pages/s ({report['mb_per_s']} MB/s)")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
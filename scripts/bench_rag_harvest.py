@@ -0,0 +1,107 @@
+"""
+Turath RAG Harvest Scaling Benchmark
+=====================================
+Supports: P3-2.2
+
+Starts the local stand-in server (local_standin.py) in a subprocess and runs
+the sharded harvester (rag_harvest.py) with 1, 2, 4, … up to os.cpu_count()
+worker processes, reporting throughput and speedup over a single worker.
+
+Usage:
+    python bench_rag_harvest.py
+    python bench_rag_harvest.py --records 400 --pages 10 --max-workers 8
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from local_standin import free_port
+from rag_harvest import run_harvest
+
+SEPARATOR = "=" * 65
+
+
+def worker_steps(max_workers):
+    steps = []
+    n = 1
+    while n < max_workers:
+        steps.append(n)
+        n *= 2
+    steps.append(max_workers)
+    return steps
+
+
+def start_standin(args, port):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_standin.py")
+    proc = subprocess.Popen(
+        [sys.executable, script, "--port", str(port), "--records", str(args.records),
+         "--pages", str(args.pages), "--words", str(args.words),
+         "--processes", str(args.server_processes)],
+        stdout=subprocess.DEVNULL,
+        start_new_session=True,  # its own process group, so stop_standin() reaches the forked workers
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            requests.get(f"{url}/", timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    stop_standin(proc)
+    raise RuntimeError("Local stand-in server did not start")
+
+
+def stop_standin(proc):
+    """Terminate the stand-in and every worker process it forked."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    proc.wait()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Turath RAG Harvest Scaling Benchmark")
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--words", type=int, default=400, help="words per page")
+    parser.add_argument("--max-workers", type=int, default=cpus)
+    parser.add_argument("--io-threads", type=int, default=4)
+    parser.add_argument("--server-processes", type=int, default=cpus)
+    args = parser.parse_args()
+
+    port = free_port()
+    proc, url = start_standin(args, port)
+    print(SEPARATOR)
+    print("Turath RAG Harvest Scaling Benchmark")
+    print(f"Stand-in: {url} — {args.records} records x {args.pages} pages x {args.words} words")
+    print(SEPARATOR)
+    print(f"  {'Workers':>7}{'Time (s)':>10}{'Records/s':>11}{'Pages/s':>10}{'Speedup':>9}")
+    baseline = None
+    try:
+        for workers in worker_steps(args.max_workers):
+            with tempfile.TemporaryDirectory() as out:
+                manifest = run_harvest(url, url, out, workers=workers, max_pages=args.pages,
+                                       io_threads=args.io_threads)
+            elapsed = manifest["elapsed_s"]
+            baseline = baseline or elapsed
+            print(f"  {workers:>7}{elapsed:>10.2f}{manifest['records_per_s']:>11.1f}"
+                  f"{manifest['pages_per_s']:>10.1f}{baseline / elapsed:>8.2f}x")
+            if manifest["totals"]["errors"]:
+                print(f"          ⚠️  {manifest['totals']['errors']} record(s) failed")
+    finally:
+        stop_standin(proc)
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
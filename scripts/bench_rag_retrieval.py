@@ -0,0 +1,126 @@
+"""
+Turath Offline Retrieval Benchmark
+===================================
+Supports: P3-2.2
+
+Builds a retrieval index (rag_retrieval.py) over a synthetic harvest — or a
+real one passed with --harvest — and compares IVF search against brute
+force: recall@k (overlap with the exact top-k) and per-query latency for a
+range of nprobe values. Queries are 2–3 word phrases sampled from pages.
+
+Usage:
+    python bench_rag_retrieval.py
+    python bench_rag_retrieval.py --records 1000 --pages 20 --k 10
+    python bench_rag_retrieval.py --harvest rag_harvest_output/
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from local_standin import SyntheticCorpus
+from rag_feasibility_test import extract_turath_metadata
+from rag_retrieval import RetrievalIndex, build_index, iter_chunks
+
+SEPARATOR = "=" * 65
+
+
+def write_synthetic_harvest(out_dir, records, pages, words, topics=40, seed=3):
+    """
+    Synthetic harvest with topical structure: each record draws about half
+    of its words from one of `topics` small topic vocabularies, the rest from
+    the shared Zipf background — uniform random text would have no clusters
+    for IVF to exploit and would understate real-world recall.
+    """
+    corpus = SyntheticCorpus(records, pages, words)
+    rng = random.Random(seed)
+    topic_vocab = [rng.sample(corpus.vocab[50:], 60) for _ in range(topics)]
+    with open(os.path.join(out_dir, "shard-000-of-001.jsonl"), "w", encoding="utf-8") as f:
+        for pid in corpus.pids:
+            vocab = rng.choice(topic_vocab)
+            doc_pages = []
+            for page_no in range(1, pages + 1):
+                page_words = [(rng.choice(vocab) if rng.random() < 0.5 else w, *box)
+                              for w, *box in corpus.page_words(pid, page_no)]
+                doc_pages.append({"page_id": f"p{page_no:03d}",
+                                  "text": " ".join(w for w, *_ in page_words),
+                                  "citations": [[w, f"{x},{y},{bw},{bh}"] for w, x, y, bw, bh in page_words]})
+            doc = {"pid": pid, "metadata": extract_turath_metadata(corpus.record(pid)), "pages": doc_pages}
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+
+def sample_queries(source, n, seed=5):
+    rng = random.Random(seed)
+    texts = [c["text"] for c in iter_chunks(source)]
+    queries = []
+    for _ in range(n):
+        words = rng.choice(texts).split()
+        start = rng.randrange(max(1, len(words) - 3))
+        queries.append(" ".join(words[start:start + rng.randint(2, 3)]))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Offline Retrieval Benchmark")
+    parser.add_argument("--harvest", help="existing harvest dir or chunks.jsonl (default: synthetic)")
+    parser.add_argument("--records", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words", type=int, default=250, help="words per page")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.harvest
+        if not source:
+            source = os.path.join(tmp, "harvest")
+            os.makedirs(source)
+            write_synthetic_harvest(source, args.records, args.pages, args.words)
+        config = build_index(source, os.path.join(tmp, "index"))
+        index = RetrievalIndex(os.path.join(tmp, "index"))
+        queries = sample_queries(source, args.queries)
+        vecs = index.embed_queries(queries)
+
+        print(SEPARATOR)
+        print("Turath Offline Retrieval Benchmark")
+        print(f"{config['chunks']} chunks, {config['dim']}-d, {config['nlist']} IVF lists, "
+              f"built in {config['build_s']}s; {len(queries)} queries, k={args.k}")
+        print(SEPARATOR)
+        print(f"  {'Method':<22}{'Recall@k':>10}{'ms/query':>10}{'Speedup':>9}")
+
+        start = time.perf_counter()
+        exact = index.search_brute(vecs, args.k)
+        brute_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"  {'brute force (batched)':<22}{1.0:>10.3f}{brute_ms:>10.3f}{1.0:>8.2f}x")
+
+        start = time.perf_counter()
+        for vec in vecs:
+            index.search_brute(vec[None, :], args.k)
+        single_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"  {'brute force (single)':<22}{1.0:>10.3f}{single_ms:>10.3f}{1.0:>8.2f}x")
+
+        nprobe = 1
+        while nprobe <= config["nlist"]:
+            start = time.perf_counter()
+            approx = [index.search_ivf(vec[None, :], args.k, nprobe)[0] for vec in vecs]
+            ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+            recall = sum(len(set(a[0]) & set(e[0])) / max(len(e[0]), 1)
+                         for a, e in zip(approx, exact)) / len(queries)
+            print(f"  {'IVF nprobe=' + str(nprobe):<22}{recall:>10.3f}{ivf_ms:>10.3f}"
+                  f"{single_ms / ivf_ms:>8.2f}x")
+            nprobe *= 2
+
+        sample = index.query(queries[0], k=1)
+        if sample:
+            h = sample[0]
+            print(SEPARATOR)
+            print(f"  Sample: \"{queries[0]}\" → {h['pid']} {h['page_id']} \"{h['title']}\" "
+                  f"({len(h['citations'])} bbox citations)")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
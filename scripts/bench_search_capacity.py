@@ -0,0 +1,271 @@
+"""
+Turath Search-Service Capacity Sweep
+=====================================
+Supports: P3-3.2 / P2-1.1 (IIIF search-service sizing)
+
+Drives the IIIF query set from run_search_tests.py (Group 5) with a
+closed-loop load of 1, 2, 4, … up to N concurrent clients:
+
+  search        /search/{pid}?q=نجد
+  annotations   /annotations/{pid}/pNNN
+  autocomplete  /autocomplete/{pid}?q=نج
+
+Each step runs for a fixed window after a short warm-up. For every step it
+records throughput X, mean latency R and p50/p95/p99, overall and per
+endpoint, plus Little's-law concurrency X·R (how many requests the service
+actually held in flight; a shortfall against the client count means the
+client, not the service, is the bottleneck).
+
+The saturation point is read off the curve two ways:
+
+  N* = X_max · R_1     Little's law: the concurrency at which a service
+                       with no queueing (latency R_1, the 1-client latency)
+                       would reach the peak throughput X_max
+  knee                 the step maximising power X / R — past it, added
+                       clients only add queueing delay
+
+The report gives the knee's sustainable throughput per task (divide a
+load-balanced host by --tasks) and a 70% autoscaling target. Results are
+also written as CSV, one row per (concurrency, endpoint).
+
+Usage:
+    python bench_search_capacity.py --standin                   # local stand-in server
+    python bench_search_capacity.py --target prod --max-concurrency 128 --tasks 2
+    python bench_search_capacity.py --iiif-url http://10.0.1.5:5001 --base-url http://10.0.1.5:5000
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+import urllib3
+
+from bench_rag_harvest import start_standin, stop_standin, worker_steps
+from local_standin import free_port
+from rag_harvest import list_records
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+SEPARATOR = "=" * 65
+ENDPOINTS = ("search", "annotations", "autocomplete")
+SEARCH_TERM = "نجد"
+AUTOCOMPLETE_PREFIX = "نج"
+SCALING_TARGET = 0.7
+
+
+def build_queries(iiif_url, pids, endpoints=ENDPOINTS, max_page=1):
+    """(endpoint, url) pairs: every endpoint for every pid, annotations over pages 1..max_page."""
+    queries = []
+    for pid in pids:
+        if "search" in endpoints:
+            queries.append(("search", f"{iiif_url}/search/{pid}?q={quote(SEARCH_TERM)}"))
+        if "autocomplete" in endpoints:
+            queries.append(("autocomplete", f"{iiif_url}/autocomplete/{pid}?q={quote(AUTOCOMPLETE_PREFIX)}"))
+        if "annotations" in endpoints:
+            for page in range(1, max_page + 1):
+                queries.append(("annotations", f"{iiif_url}/annotations/{pid}/p{page:03d}"))
+    return queries
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def summarise(samples, duration):
+    """Step statistics from [(latency_s, ok)]."""
+    latencies = sorted(latency for latency, ok in samples if ok)
+    errors = sum(1 for _, ok in samples if not ok)
+    if not latencies:
+        return {"requests": 0, "errors": errors, "throughput": 0.0, "mean_s": 0.0,
+                "p50_s": 0.0, "p95_s": 0.0, "p99_s": 0.0, "in_flight": 0.0}
+    throughput = len(latencies) / duration
+    mean = statistics.fmean(latencies)
+    return {"requests": len(latencies), "errors": errors, "throughput": throughput, "mean_s": mean,
+            "p50_s": percentile(latencies, 0.5), "p95_s": percentile(latencies, 0.95),
+            "p99_s": percentile(latencies, 0.99), "in_flight": throughput * mean}
+
+
+def run_step(queries, concurrency, duration, warmup=1.0, timeout=30):
+    """
+    Closed loop: `concurrency` clients each issue the next request as soon as
+    the last one returns. Every request that completes inside the measurement
+    window is counted, whenever it started, so slow requests straddling the
+    window's start are not dropped from throughput or the tail percentiles.
+    """
+    start = time.perf_counter()
+    window = (start + warmup, start + warmup + duration)
+    stop = threading.Event()
+    per_client = [[] for _ in range(concurrency)]
+
+    def client(i):
+        rng = random.Random(i)
+        samples = per_client[i]
+        with requests.Session() as session:
+            while not stop.is_set():
+                endpoint, url = rng.choice(queries)
+                t = time.perf_counter()
+                try:
+                    resp = session.get(url, verify=False, timeout=timeout)
+                    ok = resp.ok
+                except requests.RequestException:
+                    ok = False
+                end = time.perf_counter()
+                if window[0] <= end <= window[1]:
+                    samples.append((endpoint, end - t, ok))
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(max(0.0, window[1] - time.perf_counter()))
+    stop.set()
+    for thread in threads:
+        thread.join(timeout + 1)
+
+    samples = [s for client_samples in per_client for s in client_samples]
+    rows = {"all": summarise([(latency, ok) for _, latency, ok in samples], duration)}
+    for endpoint in sorted({endpoint for endpoint, _ in queries}):
+        rows[endpoint] = summarise([(latency, ok) for e, latency, ok in samples if e == endpoint], duration)
+    return rows
+
+
+def find_knee(sweep):
+    """
+    (N*, R_1, knee step) from [(concurrency, stats)] using the overall ("all")
+    stats; R_1 is the latency of the first step with successful requests.
+    Returns None if no step had any.
+    """
+    measured = [(c, s) for c, s in sweep if s["requests"]]
+    if not measured:
+        return None
+    r1 = measured[0][1]["mean_s"]
+    x_max = max(s["throughput"] for _, s in measured)
+    knee = max(measured, key=lambda cs: cs[1]["throughput"] / cs[1]["mean_s"])
+    return x_max * r1, r1, knee
+
+
+def write_csv(path, sweep_rows):
+    fields = ["concurrency", "endpoint", "requests", "errors", "throughput_rps",
+              "mean_ms", "p50_ms", "p95_ms", "p99_ms", "in_flight"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for concurrency, rows in sweep_rows:
+            for endpoint, s in rows.items():
+                writer.writerow([concurrency, endpoint, s["requests"], s["errors"], round(s["throughput"], 2),
+                                 round(s["mean_s"] * 1000, 2), round(s["p50_s"] * 1000, 2),
+                                 round(s["p95_s"] * 1000, 2), round(s["p99_s"] * 1000, 2),
+                                 round(s["in_flight"], 2)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Search-Service Capacity Sweep")
+    parser.add_argument("--target", choices=["local", "prod"], default="local")
+    parser.add_argument("--base-url", help="override the InvenioRDM base URL (used to list records)")
+    parser.add_argument("--iiif-url", help="override the IIIF search service URL")
+    parser.add_argument("--standin", action="store_true", help="start local_standin.py and sweep it")
+    parser.add_argument("--records", type=int, default=50, help="records to query (and stand-in size)")
+    parser.add_argument("--pages", type=int, default=10, help="annotation pages per record (and stand-in size)")
+    parser.add_argument("--words", type=int, default=300, help="stand-in words per page")
+    parser.add_argument("--server-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset to mix")
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds discarded per step")
+    parser.add_argument("--tasks", type=int, default=1, help="service tasks behind the URL (per-task figures)")
+    parser.add_argument("--csv", default="search_capacity.csv")
+    parser.add_argument("--report", default="search_capacity_report.txt")
+    args = parser.parse_args()
+
+    proc = None
+    if args.standin:
+        proc, base_url = start_standin(args, free_port())
+        iiif_url = base_url
+    elif args.target == "prod":
+        base_url = "https://invenio.turath-project.com"
+        iiif_url = "https://invenio.turath-project.com:5001"
+    else:
+        base_url = "https://127.0.0.1:5000"
+        iiif_url = "https://127.0.0.1:5001"
+    base_url = args.base_url or base_url
+    iiif_url = args.iiif_url or iiif_url
+
+    try:
+        pids = [r["id"] for r in list_records(base_url, limit=args.records)]
+        if not pids:
+            raise SystemExit(f"No records found at {base_url}")
+        endpoints = [e for e in args.endpoints.split(",") if e]
+        queries = build_queries(iiif_url, pids, endpoints, args.pages)
+
+        sweep_rows = []
+        for concurrency in worker_steps(args.max_concurrency):
+            rows = run_step(queries, concurrency, args.duration, args.warmup)
+            sweep_rows.append((concurrency, rows))
+            write_csv(args.csv, sweep_rows)  # after every step, so an aborted sweep keeps its data
+            s = rows["all"]
+            print(f"  c={concurrency:<4} {s['throughput']:>8.1f} req/s  p95 {s['p95_s'] * 1000:>8.1f} ms  "
+                  f"p99 {s['p99_s'] * 1000:>8.1f} ms  errors {s['errors']}", flush=True)
+    finally:
+        if proc:
+            stop_standin(proc)
+
+    sweep = [(c, rows["all"]) for c, rows in sweep_rows]
+    knee_result = find_knee(sweep)
+    if knee_result is None:
+        raise SystemExit(f"No successful requests at any concurrency against {iiif_url} — "
+                         f"check --iiif-url (raw data in {args.csv})")
+    n_star, r1, (knee_c, knee) = knee_result
+    per_task = knee["throughput"] / args.tasks
+
+    lines = [
+        SEPARATOR,
+        "Turath Search-Service Capacity Sweep",
+        f"{iiif_url} — {len(pids)} records, endpoints {', '.join(endpoints)}, "
+        f"{args.duration:g}s per step",
+        SEPARATOR,
+        f"  {'Clients':>7}{'req/s':>9}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'X·R':>7}{'errors':>8}",
+    ]
+    for c, s in sweep:
+        marker = "  ← knee" if c == knee_c else ""
+        lines.append(f"  {c:>7}{s['throughput']:>9.1f}{s['mean_s'] * 1000:>9.1f}{s['p50_s'] * 1000:>9.1f}"
+                     f"{s['p95_s'] * 1000:>9.1f}{s['p99_s'] * 1000:>9.1f}{s['in_flight']:>7.1f}"
+                     f"{s['errors']:>8}{marker}")
+    lines.append("\n  Per endpoint at the knee:")
+    for endpoint, s in dict(sweep_rows)[knee_c].items():
+        if endpoint != "all":
+            lines.append(f"    {endpoint:<14}{s['throughput']:>9.1f} req/s  p95 {s['p95_s'] * 1000:>8.1f} ms  "
+                         f"p99 {s['p99_s'] * 1000:>8.1f} ms")
+    lines += [
+        "",
+        f"  Peak throughput    : {max(s['throughput'] for _, s in sweep):.1f} req/s",
+        f"  Base latency R_1   : {r1 * 1000:.1f} ms (first step with successful requests)",
+        f"  Saturation N*      : {n_star:.1f} concurrent requests (X_max · R_1)",
+        f"  Knee (max X/R)     : {knee_c} clients — {knee['throughput']:.1f} req/s, "
+        f"p95 {knee['p95_s'] * 1000:.1f} ms, p99 {knee['p99_s'] * 1000:.1f} ms",
+        f"  Per task ({args.tasks})       : {per_task:.1f} req/s sustainable, "
+        f"{knee_c / args.tasks:.1f} in-flight requests",
+        f"  Scale-out target   : {per_task * SCALING_TARGET:.1f} req/s per task "
+        f"({SCALING_TARGET:.0%} of knee throughput)",
+        SEPARATOR,
+    ]
+    if sweep[-1][0] == knee_c:
+        lines.insert(-1, "  ⚠️  Knee is the last step — rerun with a higher --max-concurrency.")
+    if sweep[-1][1]["in_flight"] < 0.8 * sweep[-1][0]:
+        lines.insert(-1, "  ⚠️  X·R well below the client count — the load generator is saturated, "
+                         "not the service; run it from a larger host.")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(args.report, "w", encoding="utf-8") as f:
+        f.write(report + "\n")
+    print(f"Wrote {args.csv} and {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Turath Streaming JSON Benchmark
+================================
+Supports: P3-2.2 / P3-3.2
+
+Compares buffered decoding (`resp.json()`: join body, decode, json.loads)
+against the streaming decoder in `stream_json.py` on synthetic payloads
+shaped like the two large responses the scripts consume:
+
+  - annotations : /annotations/{pid}/{page_id} with thousands of words
+  - records     : /api/records hits carrying the OCR fulltext blob
+
+Reports wall time and peak traced memory (tracemalloc) per request.
+The body itself is generated before tracing starts, so only the memory
+used while receiving and decoding it is counted.
+
+Usage:
+    python bench_stream_json.py
+    python bench_stream_json.py --words 20000 --hits 10 --fulltext-kb 2000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from stream_json import CHUNK_SIZE, iter_json_items, orjson
+
+SEPARATOR = "=" * 65
+
+ARABIC_WORDS = ["تاريخ", "نجد", "الجزيرة", "العربية", "كتاب", "في", "من", "على", "الملك", "الرياض"]
+
+
+def make_annotations_body(n_words):
+    base = "https://127.0.0.1:5001/annotations/abc12-def34/p001"
+    resources = [
+        {
+            "@id": f"{base}/{i}",
+            "@type": "oa:Annotation",
+            "motivation": "sc:painting",
+            "resource": {"@type": "cnt:ContentAsText",
+                         "chars": ARABIC_WORDS[i % len(ARABIC_WORDS)],
+                         "format": "text/plain"},
+            "on": f"https://127.0.0.1:5000/records/abc12-def34/canvas/p001#xywh={i % 900},{i // 30},60,25",
+        }
+        for i in range(n_words)
+    ]
+    doc = {"@context": "http://iiif.io/api/presentation/2/context.json",
+           "@id": base, "@type": "sc:AnnotationList", "resources": resources}
+    return json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+
+def make_records_body(n_hits, fulltext_kb):
+    words = " ".join(ARABIC_WORDS)
+    fulltext = (words + " ") * max(1, (fulltext_kb * 1024) // len((words + " ").encode("utf-8")))
+    hits = [
+        {"id": f"rec{i:05d}",
+         "metadata": {"title": f"001_تاريخ_نجد_{i}"},
+         "custom_fields": {"turath:title": f"تاريخ نجد {i}", "turath:fulltext": fulltext}}
+        for i in range(n_hits)
+    ]
+    doc = {"hits": {"hits": hits, "total": n_hits}, "sortBy": "bestmatch",
+           "links": {"self": "https://127.0.0.1:5000/api/records?q=x"}}
+    return json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+
+def iter_chunks(body, chunk_size=CHUNK_SIZE):
+    view = memoryview(body)
+    for i in range(0, len(body), chunk_size):
+        yield bytes(view[i:i + chunk_size])
+
+
+def consume_annotation(r):
+    """Mirror the per-item work done by fetch_page_text_with_citations."""
+    chars = r.get("resource", {}).get("chars", "").strip()
+    on = r.get("on", "")
+    return chars, on.split("#xywh=")[-1] if "#xywh=" in on else ""
+
+
+def consume_hit(h):
+    """Keep only what run_search_tests / the RAG harvest use from a hit."""
+    return h.get("id"), len(h.get("custom_fields", {}).get("turath:fulltext", ""))
+
+
+def buffered(body, path, consume):
+    data = json.loads(b"".join(iter_chunks(body)).decode("utf-8"))
+    for key in path:
+        data = data.get(key, {})
+    return [consume(item) for item in data]
+
+
+def streaming(body, path, consume, backend):
+    return [consume(item) for item in iter_json_items(iter_chunks(body), path, backend=backend)]
+
+
+def measure(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_case(name, body, path, consume):
+    print(f"\n[ {name}: {len(body) / 1e6:.1f} MB body ]")
+    print(f"  {'Decoder':<26}{'Time (ms)':>12}{'Peak mem (MB)':>16}")
+    base_t, base_peak = measure(buffered, body, path, consume)
+    print(f"  {'buffered resp.json()':<26}{base_t * 1000:>12.1f}{base_peak / 1e6:>16.2f}")
+    backends = ["json"] + (["orjson"] if orjson is not None else [])
+    for backend in backends:
+        t, peak = measure(streaming, body, path, consume, backend)
+        print(f"  {'streaming (' + backend + ')':<26}{t * 1000:>12.1f}{peak / 1e6:>16.2f}"
+              f"   ({base_peak / max(peak, 1):.1f}x less memory)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Streaming JSON Benchmark")
+    parser.add_argument("--words", type=int, default=5000, help="words per annotation page")
+    parser.add_argument("--hits", type=int, default=10, help="record hits per search page")
+    parser.add_argument("--fulltext-kb", type=int, default=500, help="OCR fulltext size per hit")
+    args = parser.parse_args()
+
+    print(SEPARATOR)
+    print("Turath Streaming JSON Benchmark")
+    print(SEPARATOR)
+    run_case(f"Annotations ({args.words} words)", make_annotations_body(args.words),
+             ("resources",), consume_annotation)
+    run_case(f"Records search ({args.hits} hits x {args.fulltext_kb} KB fulltext)",
+             make_records_body(args.hits, args.fulltext_kb), ("hits", "hits"), consume_hit)
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
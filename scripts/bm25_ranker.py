@@ -0,0 +1,448 @@
+"""
+Turath Local BM25 Ranker
+=========================
+Supports: P3-3.2 (Search Robustness Tests), P2-1.1 (Enhanced HOCR Search)
+
+An in-process BM25 engine over exported records, so ranking changes and
+recall can be tested offline instead of firing `sort=bestmatch` queries at
+production OpenSearch.
+
+Indexed per record:
+  text fields    title, creator_arabic, description, publisher, fulltext
+                 (normalized + light-stemmed Arabic tokens, with positions)
+  keyword fields date, resource_type, language, rights (exact match / f=)
+
+Scoring is BM25 (k1=1.2, b=0.75) per field, multiplied by a field boost and
+summed across fields, which is close to OpenSearch's multi_match
+`most_fields` behaviour on the Arabic analyzer.
+
+Postings are stored compressed as three varint streams per (field, term):
+    doc-id deltas | term frequencies | position deltas (per doc)
+and decoded with vectorized NumPy; phrase matching intersects
+(doc, position - offset) keys across the phrase terms.
+
+Query syntax (the subset used by run_search_tests.py):
+    تاريخ                                    all text fields
+    custom_fields.turath\\:title:تاريخ        field-qualified term
+    custom_fields.turath\\:fulltext:"تاريخ نجد" field-qualified phrase (positions)
+    custom_fields.turath\\:date:2010           keyword field
+    f="resource_type:publication-book"         filter (also turath:language:eng)
+Clauses are ANDed. An unbalanced quote raises QuerySyntaxError, the local
+equivalent of the HTTP 400 the live API returns.
+
+Input is a records JSONL export (one InvenioRDM record per line, e.g. from
+`export` below) or a rag_harvest.py directory (fulltext = joined pages).
+
+Usage:
+    python bm25_ranker.py export --target prod --out records.jsonl
+    python bm25_ranker.py query records.jsonl 'custom_fields.turath\\:fulltext:"تاريخ نجد"'
+    python bm25_ranker.py query rag_harvest_output/ تاريخ --f resource_type:publication-book
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import time
+from array import array
+
+import numpy as np
+
+from arabic_text import light_stem, tokenize
+
+SEPARATOR = "=" * 65
+
+FIELD_BOOSTS = {"title": 3.0, "creator_arabic": 2.0, "description": 1.5, "publisher": 1.0, "fulltext": 1.0}
+KEYWORD_FIELDS = ("date", "resource_type", "language", "rights")
+K1 = 1.2
+B = 0.75
+
+_CLAUSE_RE = re.compile(r'(?:((?:[^\s:"\\]|\\.)+):)?("[^"]*"|[^\s"]+)')
+
+
+class QuerySyntaxError(ValueError):
+    """Raised for queries the live API would reject with HTTP 400."""
+
+
+# ── Varint postings ─────────────────────────────────────────────────
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(data):
+    """Decode a packed varint stream into an int64 array (vectorized)."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    group_start = np.repeat(starts, ends - starts + 1)
+    shifts = 7 * (np.arange(len(raw)) - group_start)
+    payload = (raw & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(payload, starts)
+
+
+def analyze(text):
+    return [light_stem(t) for t in tokenize(text or "")]
+
+
+# ── Document loading ────────────────────────────────────────────────
+
+def _join(value, sep="; "):
+    if isinstance(value, list):
+        return sep.join(str(v) for v in value if v)
+    return str(value) if value else ""
+
+
+def _vocab_keys(value):
+    """Ids and English labels of a vocabulary field, lowercased, for filtering."""
+    items = value if isinstance(value, list) else [value] if value else []
+    keys = set()
+    for item in items:
+        if isinstance(item, dict):
+            keys.update(str(v).lower() for v in (item.get("id"), item.get("title", {}).get("en")) if v)
+        elif item:
+            keys.add(str(item).lower())
+    return keys
+
+
+def record_document(record):
+    """Map a raw InvenioRDM record to indexable fields."""
+    cf = record.get("custom_fields", {})
+    md = record.get("metadata", {})
+    return {
+        "pid": record.get("id", ""),
+        "created": record.get("created", ""),
+        "text": {
+            "title": " ".join(filter(None, [md.get("title", ""), _join(cf.get("turath:title"))])),
+            "creator_arabic": _join(cf.get("turath:creator_arabic")),
+            "description": _join(cf.get("turath:description"), " | "),
+            "publisher": _join(cf.get("turath:publisher")),
+            "fulltext": _join(cf.get("turath:fulltext"), " "),
+        },
+        "keywords": {
+            "date": {_join(cf.get("turath:date")).lower()} - {""},
+            "resource_type": _vocab_keys(cf.get("turath:resource_type") or md.get("resource_type")),
+            "language": _vocab_keys(cf.get("turath:language")),
+            "rights": _vocab_keys(cf.get("turath:rights")),
+        },
+    }
+
+
+def harvest_document(doc):
+    """
+    Map a rag_harvest.py record line (extract_turath_metadata + pages) to
+    indexable fields. Keyword fields hold the English labels plus the
+    vocabulary ids the harvester records, so id filters match as they do
+    on a records export.
+    """
+    meta = doc["metadata"]
+    ids = meta.get("vocabulary_ids") or {}
+    return {
+        "pid": doc["pid"],
+        "created": "",
+        "text": {
+            "title": meta.get("title", ""),
+            "creator_arabic": meta.get("creator_arabic", ""),
+            "description": meta.get("description", ""),
+            "publisher": meta.get("publisher", ""),
+            "fulltext": " ".join(p["text"] for p in doc["pages"]),
+        },
+        "keywords": {
+            "date": {meta.get("date", "").lower()} - {""},
+            "resource_type": _harvest_keys(meta.get("resource_type", ""), ids.get("resource_type")),
+            "language": _harvest_keys(meta.get("language", ""), ids.get("language")),
+            "rights": _harvest_keys(meta.get("rights", ""), ids.get("rights")),
+        },
+    }
+
+
+def _harvest_keys(labels, ids):
+    keys = {v.strip().lower() for v in labels.split(";")} | {str(i).lower() for i in ids or []}
+    return keys - {""}
+
+
+def iter_documents(source):
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, "shard-*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    yield harvest_document(json.loads(line))
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield record_document(json.loads(line))
+
+
+# ── Query parsing ───────────────────────────────────────────────────
+
+def field_name(raw):
+    """custom_fields.turath\\:fulltext → fulltext; metadata.title → title."""
+    name = raw.replace("\\:", ":").rsplit(":", 1)[-1].rsplit(".", 1)[-1]
+    return name
+
+
+def parse_query(q):
+    """Return a list of (field or None, [terms], is_phrase) clauses."""
+    if q.count('"') % 2:
+        raise QuerySyntaxError(f"Unbalanced quote in query: {q}")
+    clauses = []
+    for match in _CLAUSE_RE.finditer(q):
+        raw_field, value = match.groups()
+        field = field_name(raw_field) if raw_field else None
+        phrase = value.startswith('"')
+        value = value.strip('"')
+        if field in KEYWORD_FIELDS:
+            clauses.append((field, [value.lower()], False))
+            continue
+        terms = analyze(value)
+        if terms:
+            clauses.append((field, terms, phrase and len(terms) > 1))
+    return clauses
+
+
+def parse_filter(f):
+    """'resource_type:publication-book' / 'turath:language:eng' → (field, value)."""
+    raw_field, _, value = f.rpartition(":")
+    if not raw_field:
+        raise QuerySyntaxError(f"Invalid filter: {f}")
+    return field_name(raw_field), value.lower()
+
+
+# ── Index ───────────────────────────────────────────────────────────
+
+class BM25Index:
+    """
+    Postings per (field, term) are three varint streams: doc-id deltas,
+    term frequencies, and position deltas (restarting at every doc), so
+    term queries never decode positions and each stream decodes in one
+    vectorized pass. Scores accumulate in dense per-document arrays.
+    """
+
+    def __init__(self, boosts=None):
+        self.boosts = dict(boosts or FIELD_BOOSTS)
+        self.pids = []
+        self.created = []
+        self.postings = {f: {} for f in self.boosts}
+        self._last_doc = {f: {} for f in self.boosts}
+        self.lengths = {f: array("I") for f in self.boosts}
+        self.df = {f: {} for f in self.boosts}
+        self.keywords = {f: {} for f in KEYWORD_FIELDS}
+
+    @classmethod
+    def build(cls, documents, boosts=None):
+        index = cls(boosts)
+        for doc in documents:
+            index.add(doc)
+        index.finalize()
+        return index
+
+    def add(self, doc):
+        doc_id = len(self.pids)
+        self.pids.append(doc["pid"])
+        self.created.append(doc.get("created", ""))
+        for field in self.boosts:
+            terms = analyze(doc["text"].get(field, ""))
+            self.lengths[field].append(len(terms))
+            positions = {}
+            for pos, term in enumerate(terms):
+                positions.setdefault(term, []).append(pos)
+            postings = self.postings[field]
+            last = self._last_doc[field]
+            df = self.df[field]
+            for term, plist in positions.items():
+                df[term] = df.get(term, 0) + 1
+                streams = postings.get(term)
+                if streams is None:
+                    streams = postings[term] = (bytearray(), bytearray(), bytearray())
+                docs, tfs, pos_deltas = streams
+                encode_varint(doc_id - last.get(term, 0), docs)
+                last[term] = doc_id
+                encode_varint(len(plist), tfs)
+                prev = 0
+                for p in plist:
+                    encode_varint(p - prev, pos_deltas)
+                    prev = p
+        for field, values in doc["keywords"].items():
+            for value in values:
+                self.keywords[field].setdefault(value, set()).add(doc_id)
+
+    def finalize(self):
+        """Freeze postings to immutable bytes and compute per-field statistics."""
+        for postings in self.postings.values():
+            for term, streams in postings.items():
+                postings[term] = tuple(bytes(b) for b in streams)
+        self._last_doc = None
+        self.lengths = {f: np.frombuffer(lengths, dtype=np.uint32).astype(np.float64)
+                        for f, lengths in self.lengths.items()}
+        self.avg_length = {f: (lengths.mean() if len(lengths) else 0.0) or 1.0
+                           for f, lengths in self.lengths.items()}
+        n = len(self.pids)
+        self.keyword_masks = {}
+        for field, values in self.keywords.items():
+            for value, docs in values.items():
+                mask = np.zeros(n, dtype=bool)
+                mask[list(docs)] = True
+                self.keyword_masks[(field, value)] = mask
+
+    def size_bytes(self):
+        return sum(len(b) for postings in self.postings.values()
+                   for streams in postings.values() for b in streams)
+
+    def idf(self, field, term):
+        n = len(self.pids)
+        df = self.df[field].get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _docs_tfs(self, field, term):
+        streams = self.postings[field].get(term)
+        if streams is None:
+            return None, None
+        return np.cumsum(decode_varints(streams[0])), decode_varints(streams[1])
+
+    def _positions(self, field, term):
+        """Return (docs, tfs, absolute positions grouped by doc)."""
+        docs, tfs = self._docs_tfs(field, term)
+        if docs is None:
+            return None, None, None
+        running = np.cumsum(decode_varints(self.postings[field][term][2]))
+        before = np.concatenate(([0], running))[np.cumsum(tfs) - tfs]
+        return docs, tfs, running - np.repeat(before, tfs)
+
+    def _bm25(self, field, docs, tfs, idf):
+        norm = K1 * (1 - B + B * self.lengths[field][docs] / self.avg_length[field])
+        return self.boosts[field] * idf * tfs * (K1 + 1) / (tfs + norm)
+
+    def _field_scores(self, field, terms, phrase):
+        """Dense (scores, mask) for one clause restricted to one text field."""
+        n = len(self.pids)
+        scores = np.zeros(n)
+        mask = np.ones(n, dtype=bool)
+        if phrase:
+            keys = None
+            for i, term in enumerate(terms):
+                docs, tfs, positions = self._positions(field, term)
+                if docs is None:
+                    return scores, np.zeros(n, dtype=bool)
+                # A phrase occurrence at p means term i sits at p + i in the same doc
+                term_keys = (np.repeat(docs, tfs) << 32) | (positions - i)
+                term_keys = term_keys[positions >= i]
+                keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+            phrase_tf = np.bincount(keys >> 32, minlength=n)
+            docs = np.flatnonzero(phrase_tf)
+            idf = sum(self.idf(field, t) for t in terms)
+            scores[docs] = self._bm25(field, docs, phrase_tf[docs].astype(np.float64), idf)
+            mask[:] = False
+            mask[docs] = True
+            return scores, mask
+        # Unquoted multi-word value: every word must occur in this field
+        for term in terms:
+            docs, tfs = self._docs_tfs(field, term)
+            if docs is None:
+                return scores, np.zeros(n, dtype=bool)
+            scores[docs] += self._bm25(field, docs, tfs.astype(np.float64), self.idf(field, term))
+            term_mask = np.zeros(n, dtype=bool)
+            term_mask[docs] = True
+            mask &= term_mask
+        return scores, mask
+
+    def _clause_scores(self, field, terms, phrase):
+        n = len(self.pids)
+        if field in KEYWORD_FIELDS:
+            mask = self.keyword_masks.get((field, terms[0]), np.zeros(n, dtype=bool))
+            return mask.astype(np.float64), mask
+        fields = [field] if field in self.boosts else list(self.boosts) if field is None else []
+        scores = np.zeros(n)
+        mask = np.zeros(n, dtype=bool)
+        for f in fields:
+            field_scores, field_mask = self._field_scores(f, terms, phrase)
+            scores += np.where(field_mask, field_scores, 0.0)
+            mask |= field_mask
+        return scores, mask
+
+    def search(self, q, size=10, page=1, sort="bestmatch", f=None):
+        """Return (total, [(pid, score), ...]) for one results page."""
+        n = len(self.pids)
+        scores = np.zeros(n)
+        mask = np.ones(n, dtype=bool)
+        for field, terms, phrase in parse_query(q):
+            clause_scores, clause_mask = self._clause_scores(field, terms, phrase)
+            scores += clause_scores
+            mask &= clause_mask
+        for flt in ([f] if isinstance(f, str) else f or []):
+            mask &= self.keyword_masks.get(parse_filter(flt), np.zeros(n, dtype=bool))
+        docs = np.flatnonzero(mask)
+        if sort == "newest":
+            ranked = sorted(docs.tolist(), key=lambda d: (self.created[d], d), reverse=True)
+        else:
+            ranked = docs[np.lexsort((docs, -scores[docs]))].tolist()
+        start = (page - 1) * size
+        return len(docs), [(self.pids[d], round(float(scores[d]), 4)) for d in ranked[start:start + size]]
+
+
+# ── Export ──────────────────────────────────────────────────────────
+
+def export_records(base_url, out_path, q="", limit=None):
+    """Write full records (including turath:fulltext) as JSONL for offline indexing."""
+    import requests
+    from rag_harvest import list_records
+
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        for hit in list_records(base_url, q=q, limit=limit):
+            resp = requests.get(f"{base_url}/api/records/{hit['id']}", verify=False, timeout=30)
+            resp.raise_for_status()
+            out.write(json.dumps(resp.json(), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Local BM25 Ranker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export full records from the API to JSONL")
+    export.add_argument("--target", choices=["local", "prod"], default="local")
+    export.add_argument("--base-url", help="override the InvenioRDM base URL")
+    export.add_argument("--out", default="records.jsonl")
+    export.add_argument("--limit", type=int, default=None)
+    query = sub.add_parser("query", help="rank records for a query")
+    query.add_argument("source", help="records JSONL export or rag_harvest.py directory")
+    query.add_argument("q")
+    query.add_argument("--f", action="append", help="filter, e.g. resource_type:publication-book")
+    query.add_argument("--size", type=int, default=10)
+    query.add_argument("--page", type=int, default=1)
+    query.add_argument("--sort", choices=["bestmatch", "newest"], default="bestmatch")
+    args = parser.parse_args()
+
+    print(SEPARATOR)
+    if args.command == "export":
+        base_url = args.base_url or ("https://invenio.turath-project.com" if args.target == "prod"
+                                     else "https://127.0.0.1:5000")
+        count = export_records(base_url, args.out, limit=args.limit)
+        print(f"✅ Exported {count} records from {base_url} → {args.out}")
+    else:
+        start = time.perf_counter()
+        index = BM25Index.build(iter_documents(args.source))
+        built = time.perf_counter() - start
+        print(f"Indexed {len(index.pids)} records in {built:.2f}s "
+              f"({index.size_bytes() / 1e6:.1f} MB compressed postings)")
+        start = time.perf_counter()
+        total, hits = index.search(args.q, size=args.size, page=args.page, sort=args.sort, f=args.f)
+        print(f"Query: {args.q} — {total} hits in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(SEPARATOR)
+        for pid, score in hits:
+            print(f"  {score:>8.3f}  {pid}")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Turath Streaming Fulltext Aggregator
+=====================================
+Supports: P1-2.3 / P2-1.1 (HOCR Full-Text Search)
+
+The indexing flow (docs/features/HOCR_Fulltext_Search.md) concatenates
+every page's OCR text into one string for custom_fields.turath:fulltext.
+For an 800-page book that means building multi-MB strings while all the
+page strings are still alive, so peak memory is several times the text.
+
+FulltextAggregator does it in one pass with a bounded buffer: pages are
+appended to a small in-memory buffer that is flushed to a sink (a file,
+or a JSON string being written to a file) whenever it fills. Alongside the
+text it records where each page starts and ends, in characters and in
+UTF-8 bytes:
+
+    [{"page_id": "p001", "start": 0, "end": 2510, "byte_start": 0, "byte_end": 4633}, ...]
+
+page_at() maps a character offset in the fulltext (e.g. from a highlight)
+back to its page; the byte offsets let a reader seek straight to one
+page in the written text file.
+
+write_fulltext_document() streams a complete
+{"id", "custom_fields": {"turath:fulltext"}, "page_offsets"} JSON document
+to disk, ready to be sent with requests (data=open(path, "rb")) without
+ever holding the whole text in memory.
+
+Usage:
+    python fulltext_aggregator.py /hocr_mount/books/book_00001/hocr --out book_00001.txt
+    python fulltext_aggregator.py /hocr_mount/books/book_00001/hocr --json --pid 7cxkj-kvp29 --out doc.json
+"""
+
+import argparse
+import bisect
+import json
+import os
+
+from hocr import page_files, page_id, read_hocr
+
+SEPARATOR = "=" * 65
+BUFFER_CHARS = 64 * 1024
+PAGE_SEPARATOR = "\n"
+
+
+class JsonStringWriter:
+    """Text sink that writes everything it receives as the body of a JSON string."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, text):
+        # json.dumps of a str is "...": strip the quotes, keep the escaping
+        self.out.write(json.dumps(text, ensure_ascii=False)[1:-1])
+
+
+class FulltextAggregator:
+    """Append pages to a sink through a bounded buffer, recording page offsets."""
+
+    def __init__(self, sink, buffer_chars=BUFFER_CHARS):
+        self.sink = sink
+        self.buffer_chars = buffer_chars
+        self._buffer = []
+        self._buffered = 0
+        self.chars = 0
+        self.bytes = 0
+        self.page_offsets = []
+
+    def _append(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        self.chars += len(text)
+        self.bytes += len(text.encode("utf-8"))
+        if self._buffered >= self.buffer_chars:
+            self.flush()
+
+    def add_page(self, page_id_str, words):
+        """Append one page given its words (strings or (word, x, y, w, h) tuples)."""
+        if self.page_offsets:
+            self._append(PAGE_SEPARATOR)
+        start, byte_start = self.chars, self.bytes
+        # One page is small; building its string is cheap and keeps the per-word loop in C
+        self._append(" ".join(w if isinstance(w, str) else w[0] for w in words))
+        self.page_offsets.append({"page_id": page_id_str, "start": start, "end": self.chars,
+                                  "byte_start": byte_start, "byte_end": self.bytes})
+
+    def flush(self):
+        if self._buffer:
+            self.sink.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        """Flush and return the page offset map."""
+        self.flush()
+        return self.page_offsets
+
+
+def iter_hocr_pages(directory):
+    """(page_id, words) for each NNN.hocr in page order, one page in memory at a time."""
+    for page_no, filename in page_files(directory):
+        yield page_id(page_no), read_hocr(os.path.join(directory, filename))[2]
+
+
+def aggregate_to_file(pages, path, buffer_chars=BUFFER_CHARS):
+    """Write the fulltext of `pages` to a UTF-8 text file; returns the page offset map."""
+    with open(path, "w", encoding="utf-8") as f:
+        aggregator = FulltextAggregator(f, buffer_chars)
+        for pid_page, words in pages:
+            aggregator.add_page(pid_page, words)
+        return aggregator.close()
+
+
+def write_fulltext_document(pages, path, pid, buffer_chars=BUFFER_CHARS):
+    """Stream an index document for one record to `path`; returns the page offset map."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'{{"id": {json.dumps(pid)}, "custom_fields": {{"turath:fulltext": "')
+        aggregator = FulltextAggregator(JsonStringWriter(f), buffer_chars)
+        for pid_page, words in pages:
+            aggregator.add_page(pid_page, words)
+        offsets = aggregator.close()
+        f.write('"}, "page_offsets": ')
+        json.dump(offsets, f)
+        f.write("}\n")
+    return offsets
+
+
+def page_at(page_offsets, offset):
+    """Page id containing a character offset of the fulltext (None if out of range)."""
+    starts = [p["start"] for p in page_offsets]
+    i = bisect.bisect_right(starts, offset) - 1
+    if i < 0 or offset > page_offsets[i]["end"]:
+        return None
+    return page_offsets[i]["page_id"]
+
+
+def read_page(path, page_offsets, page_id_str):
+    """Read one page's text back from an aggregated text file by seeking to its byte range."""
+    entry = next(p for p in page_offsets if p["page_id"] == page_id_str)
+    with open(path, "rb") as f:
+        f.seek(entry["byte_start"])
+        return f.read(entry["byte_end"] - entry["byte_start"]).decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Streaming Fulltext Aggregator")
+    parser.add_argument("hocr_dir", help="a book's hocr/ directory (NNN.hocr files)")
+    parser.add_argument("--out", required=True, help="output text file (or JSON document with --json)")
+    parser.add_argument("--json", action="store_true", help="write an index document instead of plain text")
+    parser.add_argument("--pid", default="", help="record id for the JSON document")
+    parser.add_argument("--offsets", help="also write the page offset map to this JSON file")
+    args = parser.parse_args()
+
+    pages = iter_hocr_pages(args.hocr_dir)
+    if args.json:
+        offsets = write_fulltext_document(pages, args.out, args.pid)
+    else:
+        offsets = aggregate_to_file(pages, args.out)
+    if args.offsets:
+        with open(args.offsets, "w", encoding="utf-8") as f:
+            json.dump(offsets, f)
+
+    print(SEPARATOR)
+    print(f"Fulltext — {args.hocr_dir} → {args.out}")
+    print(SEPARATOR)
+    print(f"  Pages              : {len(offsets)}")
+    print(f"  Characters         : {offsets[-1]['end'] if offsets else 0}")
+    print(f"  Output size        : {os.path.getsize(args.out) / 1e6:.2f} MB")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Turath HOCR Helpers
+====================
+Supports: P1-2.3 / P2-1.1 (HOCR Full-Text Search), P2-2.1 (Mirador Text Overlay)
+
+Shared reading and writing of the per-page HOCR files kept on the EFS
+mount (see docs/APIs/iiif.md, "HOCR File Layout"):
+
+    {HOCR_BASE_DIR}/{parent_id}/hocr/001.hocr, 002.hocr, ...
+
+parse_hocr() extracts the page size (ocr_page bbox) and every ocrx_word
+with its box converted from HOCR's "x1 y1 x2 y2" to the IIIF "x,y,w,h"
+convention used by /annotations. It is a regex scanner rather than a full
+HTML parser: HOCR is machine-written and ocrx_word spans are leaves, so
+this is much faster than BeautifulSoup and has no dependencies.
+"""
+
+import html
+import os
+import re
+
+HOCR_BASE_DIR = os.environ.get("HOCR_BASE_DIR", "/hocr_mount/books")
+
+_TAG_RE = re.compile(r"<(\w+)\s([^>]*)>")
+# Only spans whose attributes mention ocrx_word, so ocr_line wrappers are skipped
+_WORD_RE = re.compile(r"<span\s([^>]*\bocrx_word\b[^>]*)>(.*?)</span>", re.S)
+_CLASS_RE = re.compile(r"""class\s*=\s*["']([^"']*)["']""")
+_BBOX_RE = re.compile(r"bbox\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)")
+_INNER_TAG_RE = re.compile(r"<[^>]+>")
+_PAGE_FILE_RE = re.compile(r"^(\d+)\.hocr$")
+
+
+def _bbox(attrs):
+    m = _BBOX_RE.search(attrs)
+    return tuple(int(v) for v in m.groups()) if m else None
+
+
+def parse_hocr(data):
+    """Return (width, height, [(word, x, y, w, h), ...]) for one HOCR page."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    width = height = 0
+    for m in _TAG_RE.finditer(data):
+        cls = _CLASS_RE.search(m.group(2))
+        if cls and "ocr_page" in cls.group(1).split():
+            box = _bbox(m.group(2))
+            if box:
+                width, height = box[2] - box[0], box[3] - box[1]
+            break
+    words = []
+    for m in _WORD_RE.finditer(data):
+        text = html.unescape(_INNER_TAG_RE.sub("", m.group(2))).strip()
+        box = _bbox(m.group(1))
+        if text and box:
+            x1, y1, x2, y2 = box
+            words.append((text, x1, y1, x2 - x1, y2 - y1))
+    return width, height, words
+
+
+def read_hocr(path):
+    with open(path, "rb") as f:
+        return parse_hocr(f.read())
+
+
+def hocr_dir(parent_id, base_dir=HOCR_BASE_DIR):
+    return os.path.join(base_dir, parent_id, "hocr")
+
+
+def page_files(directory):
+    """Sorted [(page_no, filename)] for the NNN.hocr files in a book's hocr/ directory."""
+    pages = []
+    for name in os.listdir(directory):
+        m = _PAGE_FILE_RE.match(name)
+        if m:
+            pages.append((int(m.group(1)), name))
+    return sorted(pages)
+
+
+def page_id(page_no):
+    """1 → "p001", as used by /annotations/{pid}/{page_id}."""
+    return f"p{page_no:03d}"
+
+
+def page_number(page_id_str):
+    """"p001" → 1; raises ValueError for anything not in pXXX format."""
+    if len(page_id_str) < 2 or page_id_str[0] != "p" or not page_id_str[1:].isdigit():
+        raise ValueError(f"page_id must be in pXXX format: {page_id_str!r}")
+    return int(page_id_str[1:])
+
+
+def render_hocr(width, height, words, page_no=1):
+    """Minimal Tesseract-style HOCR for one page (used to build synthetic trees)."""
+    spans = "\n".join(
+        f"     <span class='ocrx_word' id='word_{page_no}_{n}' title='bbox {x} {y} {x + w} {y + h}; x_wconf 95'>"
+        f"{html.escape(word)}</span>"
+        for n, (word, x, y, w, h) in enumerate(words, 1)
+    )
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+        "<html xmlns=\"http://www.w3.org/1999/xhtml\" lang=\"ar\">\n<head><title></title>\n"
+        "<meta http-equiv=\"Content-Type\" content=\"text/html;charset=utf-8\"/>\n"
+        "<meta name='ocr-system' content='tesseract'/>\n</head>\n<body>\n"
+        f"  <div class='ocr_page' id='page_{page_no}' title='image \"{page_no:03d}.png\"; "
+        f"bbox 0 0 {width} {height}; ppageno {page_no - 1}'>\n"
+        f"   <span class='ocr_line' id='line_{page_no}_1' title='bbox 0 0 {width} {height}'>\n"
+        f"{spans}\n   </span>\n  </div>\n</body>\n</html>\n"
+    )
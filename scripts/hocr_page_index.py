@@ -0,0 +1,277 @@
+"""
+Turath HOCR Page Index
+=======================
+Supports: P2-1.1 (Enhanced HOCR Search), P2-2.1 (Mirador Text Overlay)
+
+/annotations/{pid}/{page_id} and /search/{pid} resolve pid → parent_id →
+{HOCR_BASE_DIR}/{parent_id}/hocr/ and then list and open files on EFS for
+every request; EFS metadata operations are slow. This module precomputes
+all of that once:
+
+    <index>/pages.sqlite   records(pid → parent_id)
+                           books(parent_id, hocr/ mtime, page count)
+                           pages(parent_id, page_no → file, width, height,
+                                 word count, offset + length in words.bin)
+    <index>/words.bin      every page's ocrx_words, packed back to back as
+                           UTF-8 lines "word<TAB>x<TAB>y<TAB>w<TAB>h"
+
+PageIndex answers "which pages does this record have", "how big is page N"
+and "give me page N's words" with one indexed SQLite lookup plus at most one
+pread() on a local file, instead of an API call, a directory listing and an
+HOCR parse.
+
+Rebuilds are incremental: a book is re-parsed only when its hocr/ directory
+mtime changes (pages added, removed or renamed). Replaced pages leave dead
+bytes in words.bin; --full rewrites it. pid → parent_id comes from a mapping
+file (JSON object, or "pid,parent_id" / "pid<TAB>parent_id" lines) or from the
+records API.
+
+Usage:
+    python hocr_page_index.py build --index hocr_index --mapping pid_parent.json
+    python hocr_page_index.py build --index hocr_index --base-url https://invenio.turath-project.com
+    python hocr_page_index.py lookup --index hocr_index 7cxkj-kvp29 p001
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from hocr import HOCR_BASE_DIR, hocr_dir, page_files, page_id, page_number, read_hocr
+
+SEPARATOR = "=" * 65
+DB_NAME = "pages.sqlite"
+WORDS_NAME = "words.bin"
+
+PageEntry = namedtuple("PageEntry", "page_id filename width height word_count offset length")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (pid TEXT PRIMARY KEY, parent_id TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS books (parent_id TEXT PRIMARY KEY, mtime_ns INTEGER, page_count INTEGER) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pages (
+    parent_id TEXT NOT NULL, page_no INTEGER NOT NULL, filename TEXT NOT NULL,
+    width INTEGER, height INTEGER, word_count INTEGER, offset INTEGER, length INTEGER,
+    PRIMARY KEY (parent_id, page_no)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER) WITHOUT ROWID;
+"""
+
+
+def pack_words(words):
+    return "".join(f"{w}\t{x}\t{y}\t{bw}\t{bh}\n" for w, x, y, bw, bh in words).encode("utf-8")
+
+
+def unpack_words(blob):
+    words = []
+    # split on the "\n" pack_words writes only: splitlines() also breaks on
+    # \x0b, \x0c, \x1c-\x1e, \x85, \u2028 and \u2029, which OCR text can contain
+    for line in blob.decode("utf-8").split("\n")[:-1]:
+        w, x, y, bw, bh = line.split("\t")
+        words.append((w, int(x), int(y), int(bw), int(bh)))
+    return words
+
+
+def load_mapping(path):
+    """pid → parent_id from a JSON object or two-column CSV/TSV lines."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("{"):
+        return json.loads(text)
+    mapping = {}
+    for line in text.splitlines():
+        parts = line.replace(",", "\t").split("\t")
+        if len(parts) >= 2 and parts[0].strip() and parts[0].strip() != "pid":
+            mapping[parts[0].strip()] = parts[1].strip()
+    return mapping
+
+
+def fetch_mapping(base_url, limit=None):
+    """pid → parent_id for every record, streamed from /api/records."""
+    from rag_harvest import list_records
+
+    return {hit["id"]: hit.get("custom_fields", {}).get("turath:parent_id")
+            for hit in list_records(base_url, limit=limit)
+            if hit.get("custom_fields", {}).get("turath:parent_id")}
+
+
+def _parse_book(base_dir, parent_id):
+    directory = hocr_dir(parent_id, base_dir)
+    pages = []
+    for page_no, filename in page_files(directory):
+        width, height, words = read_hocr(os.path.join(directory, filename))
+        pages.append((page_no, filename, width, height, len(words), pack_words(words)))
+    return pages
+
+
+def build_index(base_dir, index_dir, mapping=None, full=False, workers=8):
+    """Create or incrementally update the index; returns build stats."""
+    os.makedirs(index_dir, exist_ok=True)
+    db_path = os.path.join(index_dir, DB_NAME)
+    words_path = os.path.join(index_dir, WORDS_NAME)
+    if full:
+        for path in (db_path, words_path):
+            if os.path.exists(path):
+                os.remove(path)
+    start = time.perf_counter()
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+    if mapping:
+        db.executemany("INSERT OR REPLACE INTO records VALUES (?, ?)", mapping.items())
+
+    known = dict(db.execute("SELECT parent_id, mtime_ns FROM books"))
+    changed, present = [], set()
+    for entry in os.scandir(base_dir):
+        if not entry.is_dir():
+            continue
+        try:
+            mtime_ns = os.stat(hocr_dir(entry.name, base_dir)).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        present.add(entry.name)
+        if known.get(entry.name) != mtime_ns:
+            changed.append((entry.name, mtime_ns))
+    removed = set(known) - present
+
+    stats = {"books": len(present), "changed": len(changed), "removed": len(removed), "pages": 0}
+    dead = sum(length for (length,) in db.execute(
+        f"SELECT length FROM pages WHERE parent_id IN ({','.join('?' * len(removed))})", sorted(removed)
+    )) if removed else 0
+    for parent_id in removed:
+        db.execute("DELETE FROM pages WHERE parent_id = ?", (parent_id,))
+        db.execute("DELETE FROM books WHERE parent_id = ?", (parent_id,))
+
+    # Parsing is I/O bound on EFS: read books in parallel, append to words.bin in order
+    with open(words_path, "ab") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        offset = out.tell()
+        parsed = pool.map(lambda book: (book, _parse_book(base_dir, book[0])), changed)
+        for (parent_id, mtime_ns), pages in parsed:
+            dead += sum(length for (length,) in db.execute(
+                "SELECT length FROM pages WHERE parent_id = ?", (parent_id,)))
+            db.execute("DELETE FROM pages WHERE parent_id = ?", (parent_id,))
+            rows = []
+            for page_no, filename, width, height, word_count, blob in pages:
+                out.write(blob)
+                rows.append((parent_id, page_no, filename, width, height, word_count, offset, len(blob)))
+                offset += len(blob)
+            db.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.execute("INSERT OR REPLACE INTO books VALUES (?, ?, ?)", (parent_id, mtime_ns, len(rows)))
+            stats["pages"] += len(rows)
+        out.flush()
+        os.fsync(out.fileno())
+    db.execute("INSERT INTO meta VALUES ('dead_bytes', ?) ON CONFLICT(key) DO UPDATE SET value = value + ?",
+               (dead, dead))
+    db.commit()
+    stats["dead_bytes"] = db.execute("SELECT value FROM meta WHERE key = 'dead_bytes'").fetchone()[0]
+    stats["words_bytes"] = os.path.getsize(words_path)
+    stats["records"] = db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    db.close()
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+class PageIndex:
+    """Read side: O(1) local lookups for the HOCR-backed services."""
+
+    def __init__(self, index_dir):
+        self.db = sqlite3.connect(f"file:{os.path.join(index_dir, DB_NAME)}?mode=ro", uri=True,
+                                  check_same_thread=False)
+        self.words_fd = os.open(os.path.join(index_dir, WORDS_NAME), os.O_RDONLY)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+        os.close(self.words_fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _query(self, sql, args):
+        with self._lock:
+            return self.db.execute(sql, args).fetchall()
+
+    def parent_id(self, pid):
+        rows = self._query("SELECT parent_id FROM records WHERE pid = ?", (pid,))
+        return rows[0][0] if rows else None
+
+    def pages(self, pid):
+        """All pages of a record in order ([] if the pid or its HOCR is unknown)."""
+        rows = self._query(
+            "SELECT page_no, filename, width, height, word_count, offset, length FROM pages "
+            "WHERE parent_id = (SELECT parent_id FROM records WHERE pid = ?) ORDER BY page_no", (pid,))
+        return [PageEntry(page_id(r[0]), *r[1:]) for r in rows]
+
+    def page(self, pid, page_id_str):
+        """One page's entry, or None; raises ValueError if page_id is not pXXX."""
+        rows = self._query(
+            "SELECT page_no, filename, width, height, word_count, offset, length FROM pages "
+            "WHERE parent_id = (SELECT parent_id FROM records WHERE pid = ?) AND page_no = ?",
+            (pid, page_number(page_id_str)))
+        return PageEntry(page_id(rows[0][0]), *rows[0][1:]) if rows else None
+
+    def read_words(self, entry):
+        return unpack_words(os.pread(self.words_fd, entry.length, entry.offset))
+
+    def words(self, pid, page_id_str):
+        """[(word, x, y, w, h), ...] for one page, or None if it does not exist."""
+        entry = self.page(pid, page_id_str)
+        return None if entry is None else self.read_words(entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath HOCR Page Index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="create or incrementally update the index")
+    build.add_argument("--index", default="hocr_index", help="index directory")
+    build.add_argument("--base-dir", default=HOCR_BASE_DIR, help="HOCR mount ({parent_id}/hocr/NNN.hocr)")
+    build.add_argument("--mapping", help="pid → parent_id file (JSON, CSV or TSV)")
+    build.add_argument("--base-url", help="fetch pid → parent_id from this InvenioRDM instance")
+    build.add_argument("--full", action="store_true", help="rebuild from scratch (reclaims dead bytes)")
+    build.add_argument("--workers", type=int, default=8, help="books parsed in parallel")
+
+    lookup = sub.add_parser("lookup", help="show a record's pages or one page's words")
+    lookup.add_argument("--index", default="hocr_index")
+    lookup.add_argument("pid")
+    lookup.add_argument("page_id", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        mapping = load_mapping(args.mapping) if args.mapping else None
+        if args.base_url:
+            mapping = {**(mapping or {}), **fetch_mapping(args.base_url)}
+        stats = build_index(args.base_dir, args.index, mapping, full=args.full, workers=args.workers)
+        print(SEPARATOR)
+        print(f"HOCR page index — {args.base_dir} → {args.index}/")
+        print(SEPARATOR)
+        print(f"  Books on disk      : {stats['books']} ({stats['changed']} parsed, {stats['removed']} removed)")
+        print(f"  Pages parsed       : {stats['pages']}")
+        print(f"  Records mapped     : {stats['records']}")
+        print(f"  words.bin          : {stats['words_bytes'] / 1e6:.1f} MB ({stats['dead_bytes'] / 1e6:.1f} MB dead)")
+        print(f"  Build time         : {stats['elapsed_s']}s")
+        if stats["dead_bytes"] > stats["words_bytes"] / 2:
+            print("  ⚠️  More than half of words.bin is dead — run with --full to compact it.")
+        print(SEPARATOR)
+        return
+
+    with PageIndex(args.index) as index:
+        if args.page_id:
+            words = index.words(args.pid, args.page_id)
+            if words is None:
+                raise SystemExit(f"{args.pid}/{args.page_id}: not in index")
+            for word, x, y, w, h in words:
+                print(f"{word}\t{x},{y},{w},{h}")
+        else:
+            print(f"{args.pid} → {index.parent_id(args.pid)}")
+            for entry in index.pages(args.pid):
+                print(f"  {entry.page_id}  {entry.filename}  {entry.width}x{entry.height}  {entry.word_count} words")
+
+
+if __name__ == "__main__":
+    main()
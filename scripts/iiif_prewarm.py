@@ -0,0 +1,139 @@
+"""
+Turath IIIF Cache Pre-warmer
+=============================
+Supports: P2-3.2 (IIIF Tiling & Caching Strategy)
+
+Implements the pre-warming step from docs/architecture/IIIF_Tiling_Caching_Strategy.md:
+fetch a record's IIIF manifest, then request info.json and the common
+derivatives (full page, 50% zoom, Mirador thumbnail) for every canvas so
+Cantaloupe's FilesystemCache is populated before a reader opens the book.
+
+Image bodies are streamed and discarded; only status and byte counts are
+kept. Both IIIF Presentation 2 (sequences/canvases) and 3 (items) manifests
+are understood.
+
+Usage:
+    python iiif_prewarm.py 7cxkj-kvp29 er0yr-89563 --target prod
+    python iiif_prewarm.py --query "turath:collection:CoA" --limit 50 --workers 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+SEPARATOR = "=" * 65
+DEFAULT_SIZES = ("max", "pct:50", "!200,200")
+CHUNK = 64 * 1024
+
+
+def manifest_url(base_url, pid):
+    return f"{base_url}/api/iiif/record:{pid}/manifest"
+
+
+def _service_id(service):
+    if isinstance(service, list):
+        service = service[0] if service else {}
+    return (service.get("@id") or service.get("id") or "").rstrip("/")
+
+
+def image_services(manifest):
+    """Image service base URLs for every canvas, in reading order."""
+    services = []
+    for sequence in manifest.get("sequences", []):  # Presentation 2
+        for canvas in sequence.get("canvases", []):
+            for image in canvas.get("images", []):
+                services.append(_service_id(image.get("resource", {}).get("service", {})))
+    for canvas in manifest.get("items", []):  # Presentation 3
+        for page in canvas.get("items", []):
+            for annotation in page.get("items", []):
+                services.append(_service_id(annotation.get("body", {}).get("service", [])))
+    return [s for s in services if s]
+
+
+def warm_urls(service, sizes=DEFAULT_SIZES):
+    return [f"{service}/info.json"] + [f"{service}/full/{size}/0/default.jpg" for size in sizes]
+
+
+def fetch(session, url, timeout=120):
+    """GET `url`, draining the body; returns (ok, bytes)."""
+    try:
+        with session.get(url, stream=True, verify=False, timeout=timeout) as resp:
+            size = sum(len(chunk) for chunk in resp.iter_content(CHUNK))
+            return resp.ok, size
+    except requests.RequestException:
+        return False, 0
+
+
+def prewarm(base_url, pids, sizes=DEFAULT_SIZES, workers=4):
+    """Warm every page of every record in `pids`; returns a stats dict."""
+    start = time.time()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    stats = {"records": 0, "pages": 0, "requests": 0, "failed": 0, "bytes": 0, "missing": []}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for pid in pids:
+            ok = False
+            try:
+                resp = session.get(manifest_url(base_url, pid), verify=False, timeout=30)
+                ok = resp.ok
+            except requests.RequestException:
+                pass
+            if not ok:
+                stats["missing"].append(pid)
+                continue
+            services = image_services(resp.json())
+            urls = [url for service in services for url in warm_urls(service, sizes)]
+            for ok, size in pool.map(lambda url: fetch(session, url), urls):
+                stats["requests"] += 1
+                stats["failed"] += not ok
+                stats["bytes"] += size
+            stats["records"] += 1
+            stats["pages"] += len(services)
+
+    stats["elapsed_s"] = round(time.time() - start, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath IIIF Cache Pre-warmer")
+    parser.add_argument("pids", nargs="*", help="record ids (default: list via --query)")
+    parser.add_argument("--target", choices=["local", "prod"], default="local")
+    parser.add_argument("--base-url", help="override the InvenioRDM base URL")
+    parser.add_argument("--query", default="", help="records search query when no pids are given")
+    parser.add_argument("--limit", type=int, default=None, help="max records to warm")
+    parser.add_argument("--size", action="append", dest="sizes",
+                        help=f"IIIF size parameter, repeatable (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent image requests")
+    args = parser.parse_args()
+
+    base_url = args.base_url or ("https://invenio.turath-project.com" if args.target == "prod"
+                                 else "https://127.0.0.1:5000")
+    sizes = args.sizes or DEFAULT_SIZES
+    pids = args.pids
+    if not pids:
+        from rag_harvest import list_records  # only needed to list records; keeps `prewarm <pids>` light
+
+        pids = [r.get("id", "") for r in list_records(base_url, q=args.query, limit=args.limit)]
+
+    print(SEPARATOR)
+    print(f"Turath IIIF Pre-warm — {base_url}")
+    print(SEPARATOR)
+    stats = prewarm(base_url, pids, sizes, args.workers)
+    print(f"  Records warmed     : {stats['records']} ({stats['pages']} pages)")
+    print(f"  Image requests     : {stats['requests']} ({stats['failed']} failed)")
+    print(f"  Transferred        : {stats['bytes'] / 1e6:.1f} MB in {stats['elapsed_s']}s")
+    if stats["missing"]:
+        print(f"  ⚠️  No manifest for {len(stats['missing'])} record(s): {', '.join(stats['missing'][:5])}")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Turath Local Stand-in Server
+=============================
+Supports: P3-2.2 / P3-3.2 benchmarks
+
+A small synthetic replacement for the InvenioRDM records API and the IIIF
+Search microservice, so harvest and load benchmarks can run without
+touching production. One port serves both APIs:
+
+  GET /                                  → health check
+  GET /api/records?q=&size=&page=&sort=  → search (hits.hits[*], hits.total)
+  GET /api/records/{pid}                 → single record
+  GET /annotations/{pid}/{page_id}       → AnnotationList (one per OCR word)
+  GET /search/{pid}?q=                   → IIIF Content Search 1.0
+  GET /autocomplete/{pid}?q=             → IIIF TermList (from --autocomplete-index if given)
+
+The corpus is generated deterministically from a seed: every record has
+Turath custom fields and a fixed number of pages of Arabic words with
+pixel bounding boxes. Responses are shaped like the real services (see
+docs/APIs/iiif.md and docs/APIs/records.md).
+
+Usage:
+    python local_standin.py                              # 127.0.0.1:8765
+    python local_standin.py --records 500 --pages 40 --processes 4
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import sys
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from hocr import hocr_dir, render_hocr
+
+DEFAULT_PORT = 8765
+PAGE_WIDTH = 1700
+PAGE_HEIGHT = 2400
+
+# Frequent words that the search tests and RAG test query for
+COMMON_WORDS = ["تاريخ", "نجد", "الجزيرة", "العربية", "كتاب", "في", "من", "على",
+                "الملك", "الرياض", "مكة", "المدينة", "بن", "عبد", "الله", "قال"]
+ARABIC_LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+LANGUAGES = [
+    {"id": "ara", "title": {"en": "Arabic", "ar": "العربية"}},
+    {"id": "eng", "title": {"en": "English", "ar": "الإنجليزية"}},
+]
+RIGHTS = [
+    {"id": "public-domain", "title": {"en": "Public Domain", "ar": "ملكية عامة"}},
+    {"id": "cc-by-4.0", "title": {"en": "Creative Commons Attribution 4.0", "ar": "المشاع الإبداعي 4.0"}},
+]
+RESOURCE_TYPE = {"id": "publication-book", "title": {"en": "Book", "ar": "كتاب"}}
+
+
+class SyntheticCorpus:
+    """Deterministic Turath-like records with paged, bbox-annotated OCR words."""
+
+    def __init__(self, n_records=200, pages=20, words_per_page=300, vocab_size=3000, seed=42):
+        self.n_records = n_records
+        self.pages = pages
+        self.words_per_page = words_per_page
+        self.seed = seed
+        rng = random.Random(seed)
+        vocab = list(COMMON_WORDS)
+        while len(vocab) < vocab_size:
+            word = "".join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(2, 7)))
+            if word not in vocab:
+                vocab.append(word)
+        self.vocab = vocab
+        # Zipf-like weights so a few words dominate, as in real OCR text
+        self.weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+        self.pids = [f"{i:05d}-{(i * 7919) % 100000:05d}" for i in range(n_records)]
+        self._index = {pid: i for i, pid in enumerate(self.pids)}
+
+    def has(self, pid):
+        return pid in self._index
+
+    def record(self, pid):
+        i = self._index[pid]
+        rng = random.Random(f"{self.seed}:{pid}:meta")
+        year = 1850 + rng.randint(0, 150)
+        return {
+            "id": pid,
+            "created": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00+00:00",
+            "metadata": {
+                "title": f"{i + 1:03d}_تاريخ_نجد",
+                "resource_type": {"id": RESOURCE_TYPE["id"]},
+            },
+            "custom_fields": {
+                "turath:title": [f"تاريخ نجد {i + 1}"],
+                "turath:creator_arabic": [f"عبد الله بن {rng.choice(self.vocab[16:200])}"],
+                "turath:publisher": [rng.choice(["دار الملك عبد العزيز", "مطبعة مكة"])],
+                "turath:date": [str(year)],
+                "turath:language": [LANGUAGES[0]] + ([LANGUAGES[1]] if i % 5 == 0 else []),
+                "turath:description": [f"كتاب في تاريخ الجزيرة العربية رقم {i + 1}"],
+                "turath:resource_type": RESOURCE_TYPE,
+                "turath:coverage_temporal_start": [str(year - 100)],
+                "turath:coverage_temporal_end": [str(year)],
+                "turath:source": ["Chronicles of Arabia"],
+                "turath:rights": RIGHTS[i % len(RIGHTS)],
+                "turath:identifier": [f"coa-{i + 1:05d}"],
+                "turath:parent_id": f"book_{i + 1:05d}",
+            },
+        }
+
+    @lru_cache(maxsize=4096)
+    def page_words(self, pid, page_no):
+        """Return [(word, x, y, w, h), ...] laid out right-to-left in lines."""
+        rng = random.Random(f"{self.seed}:{pid}:{page_no}")
+        words = rng.choices(self.vocab, weights=self.weights, k=self.words_per_page)
+        out = []
+        x, y = PAGE_WIDTH - 100, 150
+        for word in words:
+            w = 18 * len(word) + 10
+            if x - w < 100:
+                x, y = PAGE_WIDTH - 100, y + 40
+            x -= w
+            out.append((word, x, y, w, 30))
+            x -= 12
+        return out
+
+    def page_text(self, pid, page_no):
+        return " ".join(w for w, *_ in self.page_words(pid, page_no))
+
+    def parent_id(self, pid):
+        return self.record(pid)["custom_fields"]["turath:parent_id"]
+
+    def write_hocr_tree(self, base_dir, pids=None):
+        """Write {base_dir}/{parent_id}/hocr/NNN.hocr for each record; returns {pid: parent_id}."""
+        mapping = {}
+        for pid in pids or self.pids:
+            parent_id = self.parent_id(pid)
+            directory = hocr_dir(parent_id, base_dir)
+            os.makedirs(directory, exist_ok=True)
+            for page_no in range(1, self.pages + 1):
+                with open(os.path.join(directory, f"{page_no:03d}.hocr"), "w", encoding="utf-8") as f:
+                    f.write(render_hocr(PAGE_WIDTH, PAGE_HEIGHT, self.page_words(pid, page_no), page_no))
+            mapping[pid] = parent_id
+        return mapping
+
+    def search_records(self, q, sort="bestmatch"):
+        """Very small stand-in for OpenSearch: substring match on title/fulltext."""
+        term = q
+        if ":" in term:
+            term = term.rsplit(":", 1)[-1]
+        term = term.strip().strip('"')
+        if not term:
+            return list(self.pids)
+        scored = []
+        for pid in self.pids:
+            i = self._index[pid]
+            score = (f"{i + 1:03d}_تاريخ_نجد".count(term)
+                     + sum(self.page_text(pid, p).count(term) for p in range(1, min(self.pages, 3) + 1)))
+            if score:
+                scored.append((score, pid))
+        if sort == "bestmatch":
+            scored.sort(key=lambda s: (-s[0], s[1]))
+        return [pid for _, pid in scored]
+
+
+def annotation(base, pid, page_id, n, word, x, y, w, h):
+    return {
+        "@id": f"{base}/annotations/{pid}/{page_id}/{n}",
+        "@type": "oa:Annotation",
+        "motivation": "sc:painting",
+        "resource": {"@type": "cnt:ContentAsText", "chars": word, "format": "text/plain"},
+        "on": f"{base}/records/{pid}/canvas/{page_id}#xywh={x},{y},{w},{h}",
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer wfile (flushed after each request) so headers and body leave in
+    # one write, and set TCP_NODELAY: with Nagle + delayed ACK on keep-alive
+    # connections, a separate small body write stalls every response ~40 ms
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    corpus = None
+    autocomplete_index = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        base = f"http://{self.headers.get('Host', 'localhost')}"
+        corpus = self.corpus
+
+        if not parts:
+            return self.send_json(200, {"status": "ok", "service": "Turath local stand-in"})
+        if parts[:2] == ["api", "records"]:
+            if len(parts) == 3:
+                if not corpus.has(parts[2]):
+                    return self.send_json(404, {"status": 404, "message": "Record not found"})
+                return self.send_json(200, corpus.record(parts[2]))
+            return self.records_search(params)
+        if len(parts) < 2 or not corpus.has(parts[1]):
+            return self.send_json(404, {"status": 404, "message": "Not found"})
+        pid = parts[1]
+        if parts[0] == "annotations" and len(parts) == 3:
+            return self.annotations(base, pid, parts[2])
+        if parts[0] == "search":
+            return self.iiif_search(base, pid, params.get("q", ""))
+        if parts[0] == "autocomplete":
+            return self.autocomplete(base, pid, params.get("q", ""))
+        return self.send_json(404, {"status": 404, "message": "Not found"})
+
+    def records_search(self, params):
+        q = params.get("q", "")
+        if q.count('"') % 2:
+            return self.send_json(400, {"status": 400, "message": "Invalid query string syntax."})
+        size = int(params.get("size", 10))
+        page = int(params.get("page", 1))
+        pids = self.corpus.search_records(q, params.get("sort", "bestmatch"))
+        if params.get("sort") == "newest":
+            pids = sorted(pids, reverse=True)
+        hits = [self.corpus.record(pid) for pid in pids[(page - 1) * size:page * size]]
+        self.send_json(200, {"hits": {"hits": hits, "total": len(pids)},
+                             "sortBy": params.get("sort", "bestmatch"),
+                             "links": {"self": self.path}})
+
+    def annotations(self, base, pid, page_id):
+        if len(page_id) < 2 or page_id[0] != "p" or not page_id[1:].isdigit():
+            return self.send_json(400, {"error": "page_id must be in pXXX format"})
+        page_no = int(page_id[1:])
+        if not 1 <= page_no <= self.corpus.pages:
+            return self.send_json(404, {"error": "HOCR file not found"})
+        resources = [annotation(base, pid, page_id, n, *word)
+                     for n, word in enumerate(self.corpus.page_words(pid, page_no))]
+        self.send_json(200, {"@context": "http://iiif.io/api/presentation/2/context.json",
+                             "@id": f"{base}/annotations/{pid}/{page_id}",
+                             "@type": "sc:AnnotationList", "resources": resources})
+
+    def iiif_search(self, base, pid, q):
+        resources, hits = [], []
+        for page_no in range(1, self.corpus.pages + 1):
+            page_id = f"p{page_no:03d}"
+            words = self.corpus.page_words(pid, page_no)
+            for n, (word, *box) in enumerate(words):
+                if q and q in word:
+                    anno = annotation(base, pid, page_id, n, word, *box)
+                    resources.append(anno)
+                    hits.append({"@type": "search:Hit", "annotations": [anno["@id"]], "match": word,
+                                 "before": " ".join(w[0] for w in words[max(0, n - 3):n]),
+                                 "after": " ".join(w[0] for w in words[n + 1:n + 4]),
+                                 "on": f"{base}/records/{pid}/canvas/{page_id}"})
+        self.send_json(200, {"@context": "http://iiif.io/api/search/1/context.json",
+                             "@id": f"{base}/search/{pid}?q={q}",
+                             "@type": "sc:AnnotationList", "resources": resources, "hits": hits})
+
+    def autocomplete(self, base, pid, q):
+        if self.autocomplete_index is not None:
+            return self.send_json(200, self.autocomplete_index.term_list(base, pid, q))
+        counts = {}
+        for page_no in range(1, min(self.corpus.pages, 5) + 1):
+            for word, *_ in self.corpus.page_words(pid, page_no):
+                if q and word.startswith(q):
+                    counts[word] = counts.get(word, 0) + 1
+        terms = [{"match": w, "url": f"{base}/search/{pid}?q={w}", "count": c}
+                 for w, c in sorted(counts.items(), key=lambda t: -t[1])[:10]]
+        self.send_json(200, {"@context": "http://iiif.io/api/search/1/context.json",
+                             "@id": f"{base}/autocomplete/{pid}?q={q}",
+                             "@type": "search:TermList", "terms": terms})
+
+
+def make_server(corpus, host="127.0.0.1", port=DEFAULT_PORT, autocomplete_index=None):
+    handler = type("BoundStandinHandler", (StandinHandler,),
+                   {"corpus": corpus, "autocomplete_index": autocomplete_index})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def free_port(host="127.0.0.1"):
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def serve(corpus, host="127.0.0.1", port=DEFAULT_PORT, processes=1, autocomplete_index=None):
+    """Serve forever; with processes > 1, forked children share the listening socket."""
+    server = make_server(corpus, host, port, autocomplete_index)
+    children = []
+    if processes > 1 and sys.platform.startswith("linux"):
+        import multiprocessing
+        ctx = multiprocessing.get_context("fork")
+        for _ in range(processes - 1):
+            child = ctx.Process(target=server.serve_forever, daemon=True)
+            child.start()
+            children.append(child)
+    # SIGTERM (Popen.terminate()) would kill this process without running the
+    # finally below and leave the children serving; exit through it instead.
+    # Installed after forking, so the children keep the default action.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Local Stand-in Server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--processes", type=int, default=1, help="forked server processes (Linux)")
+    parser.add_argument("--autocomplete-index", help="serve /autocomplete from an autocomplete_index.py file")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.records, args.pages, args.words, seed=args.seed)
+    print(f"Turath stand-in serving {args.records} records x {args.pages} pages "
+          f"on http://{args.host}:{args.port} ({args.processes} process(es))", flush=True)
+    index = None
+    if args.autocomplete_index:
+        from autocomplete_index import AutocompleteIndex
+        index = AutocompleteIndex(args.autocomplete_index)
+    serve(corpus, args.host, args.port, args.processes, index)
+
+
+if __name__ == "__main__":
+    main()
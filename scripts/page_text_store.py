@@ -0,0 +1,244 @@
+"""
+Turath Packed Page-Text Store
+==============================
+Supports: P2-2.1 (Mirador Text Overlay), P3-2.2 (RAG Feasibility Test)
+
+Every annotation request and every harvest re-reads and re-parses the
+per-page HOCR files. This store packs each book's pages once into a single
+binary file that is served with mmap and no parsing:
+
+    <store>/{parent_id}.pts
+        header      "TPT1", version, page count, word count, text bytes
+        page table  int64[pages, 7]  page_no, width, height,
+                                     first word, word count, text start, text length
+        spans       int32[words, 2]  byte start/end of each word in the text blob
+        bboxes      int32[words, 4]  x, y, w, h of each word
+        text        UTF-8 page texts (words joined by " ", pages by "\\n")
+    <store>/records.json             pid → parent_id
+
+PackedBook.page() returns the page text as a memoryview and the spans and
+bboxes as NumPy views of the mapping, so nothing is copied until a caller
+asks for Python strings. fetch_page_text_with_citations() in
+rag_feasibility_test.py reads from a store when given a file:// URL, so the
+harvester can run against local data:
+
+    python rag_harvest.py --base-url ... --iiif-url file:///data/page_store
+
+Packing is incremental like hocr_page_index.py: a book is repacked only
+when its hocr/ directory is newer than its .pts file.
+
+Usage:
+    python page_text_store.py pack --store page_store --mapping pid_parent.json
+    python page_text_store.py show --store page_store 7cxkj-kvp29 p001
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from hocr import HOCR_BASE_DIR, hocr_dir, page_files, page_id, page_number, read_hocr
+from hocr_page_index import fetch_mapping, load_mapping
+
+SEPARATOR = "=" * 65
+MAGIC = b"TPT1"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIQQ")  # magic, version, pages, reserved, words, text bytes
+PAGE_COLUMNS = 7
+MAPPING_NAME = "records.json"
+
+PackedPage = namedtuple("PackedPage", "page_id width height text spans bboxes")
+
+
+def pack_pages(pages):
+    """Serialize [(page_no, width, height, [(word, x, y, w, h), ...]), ...] to the .pts layout."""
+    table = np.zeros((len(pages), PAGE_COLUMNS), dtype="<i8")
+    n_words = sum(len(words) for *_, words in pages)
+    spans = np.zeros((n_words, 2), dtype="<i4")
+    bboxes = np.zeros((n_words, 4), dtype="<i4")
+    text = bytearray()
+    w = 0
+    for i, (page_no, width, height, words) in enumerate(pages):
+        if i:
+            text += b"\n"
+        text_start = len(text)
+        for j, (word, *box) in enumerate(words):
+            if j:
+                text += b" "
+            start = len(text)
+            text += word.encode("utf-8")
+            spans[w + j] = (start, len(text))
+            bboxes[w + j] = box
+        table[i] = (page_no, width, height, w, len(words), text_start, len(text) - text_start)
+        w += len(words)
+    header = HEADER.pack(MAGIC, VERSION, len(pages), 0, n_words, len(text))
+    return b"".join((header, table.tobytes(), spans.tobytes(), bboxes.tobytes(), bytes(text)))
+
+
+def pack_book(directory, out_path):
+    """Pack one book's hocr/ directory into out_path (atomically); returns (pages, words)."""
+    pages = []
+    for page_no, filename in page_files(directory):
+        width, height, words = read_hocr(os.path.join(directory, filename))
+        pages.append((page_no, width, height, words))
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pack_pages(pages))
+    os.replace(tmp, out_path)
+    return len(pages), sum(len(p[3]) for p in pages)
+
+
+class PackedBook:
+    """Read-only, memory-mapped view of one .pts file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_pages, _, n_words, text_bytes = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} page-text store file")
+        offset = HEADER.size
+        self.table = np.frombuffer(self.mm, dtype="<i8", count=n_pages * PAGE_COLUMNS,
+                                   offset=offset).reshape(n_pages, PAGE_COLUMNS)
+        offset += self.table.nbytes
+        self.spans = np.frombuffer(self.mm, dtype="<i4", count=n_words * 2, offset=offset).reshape(n_words, 2)
+        offset += self.spans.nbytes
+        self.bboxes = np.frombuffer(self.mm, dtype="<i4", count=n_words * 4, offset=offset).reshape(n_words, 4)
+        offset += self.bboxes.nbytes
+        self.text = memoryview(self.mm)[offset:offset + text_bytes]
+        self._rows = {int(page_no): i for i, page_no in enumerate(self.table[:, 0])}
+
+    @property
+    def page_numbers(self):
+        return self.table[:, 0]
+
+    def page(self, page_no):
+        """Zero-copy PackedPage (text memoryview, spans/bboxes arrays), or None."""
+        row = self._rows.get(page_no)
+        if row is None:
+            return None
+        _, width, height, first, count, start, length = self.table[row].tolist()
+        return PackedPage(page_id(page_no), width, height, self.text[start:start + length],
+                          self.spans[first:first + count], self.bboxes[first:first + count])
+
+    def text_with_citations(self, page_no):
+        """(page text, [(word, "x,y,w,h"), ...]) — the shape the annotations API path returns."""
+        page = self.page(page_no)
+        if page is None:
+            return None, []
+        raw = bytes(page.text)
+        # Page text starts at its first word, so spans are relative to that
+        base = int(page.spans[0, 0]) if len(page.spans) else 0
+        citations = [(raw[s - base:e - base].decode("utf-8"), f"{x},{y},{w},{h}")
+                     for (s, e), (x, y, w, h) in zip(page.spans.tolist(), page.bboxes.tolist())]
+        return raw.decode("utf-8"), citations
+
+
+class PageTextStore:
+    """A directory of .pts files plus the pid → parent_id mapping."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MAPPING_NAME), encoding="utf-8") as f:
+            self.mapping = json.load(f)
+
+    @lru_cache(maxsize=256)
+    def book(self, pid):
+        parent_id = self.mapping.get(pid)
+        path = os.path.join(self.store_dir, f"{parent_id}.pts")
+        return PackedBook(path) if parent_id and os.path.exists(path) else None
+
+    def page(self, pid, page_id_str):
+        book = self.book(pid)
+        return book.page(page_number(page_id_str)) if book else None
+
+    def text_with_citations(self, pid, page_id_str):
+        book = self.book(pid)
+        return book.text_with_citations(page_number(page_id_str)) if book else (None, [])
+
+
+@lru_cache(maxsize=8)
+def open_store(store_dir):
+    return PageTextStore(store_dir)
+
+
+def pack_tree(base_dir, store_dir, mapping=None, full=False, workers=8):
+    """Pack every book under base_dir that is new or changed; returns stats."""
+    os.makedirs(store_dir, exist_ok=True)
+    start = time.perf_counter()
+    mapping_path = os.path.join(store_dir, MAPPING_NAME)
+    if os.path.exists(mapping_path):
+        with open(mapping_path, encoding="utf-8") as f:
+            mapping = {**json.load(f), **(mapping or {})}
+    with open(f"{mapping_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(mapping or {}, f, ensure_ascii=False)
+    os.replace(f"{mapping_path}.tmp", mapping_path)
+
+    todo, books = [], 0
+    for entry in os.scandir(base_dir):
+        directory = hocr_dir(entry.name, base_dir)
+        if not entry.is_dir() or not os.path.isdir(directory):
+            continue
+        books += 1
+        out_path = os.path.join(store_dir, f"{entry.name}.pts")
+        if full or not os.path.exists(out_path) or \
+                os.stat(directory).st_mtime_ns > os.stat(out_path).st_mtime_ns:
+            todo.append((directory, out_path))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        packed = list(pool.map(lambda job: pack_book(*job), todo))
+    return {"books": books, "packed": len(todo), "pages": sum(p for p, _ in packed),
+            "words": sum(w for _, w in packed),
+            "bytes": sum(os.path.getsize(out) for _, out in todo),
+            "elapsed_s": round(time.perf_counter() - start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Packed Page-Text Store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack = sub.add_parser("pack", help="pack new or changed books")
+    pack.add_argument("--store", default="page_store", help="store directory")
+    pack.add_argument("--base-dir", default=HOCR_BASE_DIR, help="HOCR mount ({parent_id}/hocr/NNN.hocr)")
+    pack.add_argument("--mapping", help="pid → parent_id file (JSON, CSV or TSV)")
+    pack.add_argument("--base-url", help="fetch pid → parent_id from this InvenioRDM instance")
+    pack.add_argument("--full", action="store_true", help="repack every book")
+    pack.add_argument("--workers", type=int, default=8, help="books packed in parallel")
+
+    show = sub.add_parser("show", help="print one page's text and word boxes")
+    show.add_argument("--store", default="page_store")
+    show.add_argument("pid")
+    show.add_argument("page_id")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        mapping = load_mapping(args.mapping) if args.mapping else None
+        if args.base_url:
+            mapping = {**(mapping or {}), **fetch_mapping(args.base_url)}
+        stats = pack_tree(args.base_dir, args.store, mapping, full=args.full, workers=args.workers)
+        print(SEPARATOR)
+        print(f"Page-text store — {args.base_dir} → {args.store}/")
+        print(SEPARATOR)
+        print(f"  Books on disk      : {stats['books']} ({stats['packed']} packed)")
+        print(f"  Pages / words      : {stats['pages']} / {stats['words']}")
+        print(f"  Written            : {stats['bytes'] / 1e6:.1f} MB in {stats['elapsed_s']}s")
+        print(SEPARATOR)
+        return
+
+    text, citations = PageTextStore(args.store).text_with_citations(args.pid, args.page_id)
+    if text is None:
+        raise SystemExit(f"{args.pid}/{args.page_id}: not in store")
+    print(text)
+    for word, xywh in citations[:20]:
+        print(f"  {word}\t{xywh}")
+
+
+if __name__ == "__main__":
+    main()
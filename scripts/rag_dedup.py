@@ -0,0 +1,228 @@
+"""
+Turath RAG Near-Duplicate Page Detection
+=========================================
+Supports: P3-2.2 (RAG Feasibility Test)
+
+Chronicles of Arabia contains reprints and repeated front matter, so a
+harvest (rag_harvest.py) holds many near-identical pages. Embedding each of
+them costs money and clutters retrieval. This stage collapses them:
+
+  1. Normalize page text (arabic_text.py) and take word k-shingles
+  2. MinHash each page (NumPy, multiply-shift hashing)
+  3. Query an LSH index (bands x rows) for candidate pages seen earlier
+  4. Confirm with the estimated Jaccard similarity of the signatures
+
+Pages are processed one at a time straight from the shard files, so memory
+grows with the number of *canonical* pages (one signature each), not with
+the corpus text. Every near-duplicate is folded into its canonical chunk,
+which keeps the full provenance — all (pid, page_id) pairs it stands for.
+
+Outputs (in --out):
+    chunks.jsonl      canonical chunks: text, citations, metadata, provenance
+    duplicates.jsonl  one line per dropped page: duplicate_of, similarity, cross_record
+    dedup_report.json counts, reduction ratio, throughput
+
+Usage:
+    python rag_dedup.py rag_harvest_output/ --out rag_dedup_output/
+    python rag_dedup.py rag_harvest_output/ --threshold 0.85 --shingle 5
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from arabic_text import tokenize
+
+SEPARATOR = "=" * 65
+
+
+def iter_harvest_pages(harvest_dir):
+    """Yield (pid, metadata, page) for every page in every shard of a harvest."""
+    for path in sorted(glob.glob(os.path.join(harvest_dir, "shard-*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                doc = json.loads(line)
+                for page in doc["pages"]:
+                    yield doc["pid"], doc["metadata"], page
+
+
+def shingle_hashes(text, k=3):
+    """Return the set of 32-bit hashes of normalized word k-shingles."""
+    tokens = tokenize(text)
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    if len(tokens) <= k:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    """MinHash signatures using `num_perm` multiply-shift hash functions."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        # uint64 arithmetic wraps mod 2**64; the high 32 bits are the hash value
+        permuted = (hashes[:, None] * self.a + self.b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures: pages sharing any band are candidates."""
+
+    def __init__(self, bands=16, rows=8):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [{} for _ in range(bands)]
+
+    def _keys(self, sig):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def query(self, sig):
+        found = set()
+        for bucket, key in zip(self.buckets, self._keys(sig)):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def insert(self, item, sig):
+        for bucket, key in zip(self.buckets, self._keys(sig)):
+            bucket.setdefault(key, []).append(item)
+
+
+class PageDeduplicator:
+    """Streaming near-duplicate detector; feed pages with add()."""
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle=3, seed=1):
+        if bands * (num_perm // bands) != num_perm:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.shingle = shingle
+        self.hasher = MinHasher(num_perm, seed)
+        self.index = LSHIndex(bands, num_perm // bands)
+        self.signatures = []   # canonical id → signature
+        self.provenance = []   # canonical id → [(pid, page_id), ...]
+        self.pages_in = 0
+        self.empty = 0
+        self.cross_record = 0
+
+    def add(self, pid, page_id, text):
+        """
+        Register a page. Returns (canonical_id, is_new, similarity);
+        canonical_id is None for pages without any tokens.
+        """
+        self.pages_in += 1
+        hashes = shingle_hashes(text, self.shingle)
+        if not len(hashes):
+            self.empty += 1
+            return None, False, 0.0
+        sig = self.hasher.signature(hashes)
+        best, best_sim = None, 0.0
+        for cand in self.index.query(sig):
+            sim = float(np.count_nonzero(self.signatures[cand] == sig)) / len(sig)
+            if sim > best_sim:
+                best, best_sim = cand, sim
+        if best is not None and best_sim >= self.threshold:
+            if self.provenance[best][0][0] != pid:
+                self.cross_record += 1
+            self.provenance[best].append((pid, page_id))
+            return best, False, best_sim
+        canonical = len(self.signatures)
+        self.signatures.append(sig)
+        self.provenance.append([(pid, page_id)])
+        self.index.insert(canonical, sig)
+        return canonical, True, 1.0
+
+
+def run_dedup(harvest_dir, out_dir, threshold=0.8, num_perm=128, bands=16, shingle=3):
+    os.makedirs(out_dir, exist_ok=True)
+    dedup = PageDeduplicator(threshold, num_perm, bands, shingle)
+    staged_path = os.path.join(out_dir, "chunks.staged.jsonl")
+    start = time.time()
+    text_bytes = 0
+    duplicates = 0
+
+    # Pass 1: stream pages, stage canonical chunks, log duplicates as they are found
+    with open(staged_path, "w", encoding="utf-8") as staged, \
+            open(os.path.join(out_dir, "duplicates.jsonl"), "w", encoding="utf-8") as dups:
+        for pid, meta, page in iter_harvest_pages(harvest_dir):
+            text_bytes += len(page["text"].encode("utf-8"))
+            canonical, is_new, sim = dedup.add(pid, page["page_id"], page["text"])
+            if canonical is None:
+                continue
+            if is_new:
+                staged.write(json.dumps({"chunk_id": canonical, "pid": pid, "page_id": page["page_id"],
+                                         "metadata": meta, "text": page["text"],
+                                         "citations": page["citations"]}, ensure_ascii=False) + "\n")
+            else:
+                duplicates += 1
+                first_pid, first_page = dedup.provenance[canonical][0]
+                dups.write(json.dumps({"pid": pid, "page_id": page["page_id"],
+                                       "duplicate_of": f"{first_pid}/{first_page}",
+                                       "similarity": round(sim, 4),
+                                       "cross_record": first_pid != pid}, ensure_ascii=False) + "\n")
+
+    # Pass 2: attach final provenance to each canonical chunk
+    with open(staged_path, encoding="utf-8") as staged, \
+            open(os.path.join(out_dir, "chunks.jsonl"), "w", encoding="utf-8") as out:
+        for line in staged:
+            chunk = json.loads(line)
+            chunk["provenance"] = [{"pid": p, "page_id": pg} for p, pg in dedup.provenance[chunk["chunk_id"]]]
+            out.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+    os.remove(staged_path)
+
+    elapsed = time.time() - start
+    pages_kept = len(dedup.signatures)
+    report = {
+        "pages_in": dedup.pages_in,
+        "empty_pages": dedup.empty,
+        "canonical_chunks": pages_kept,
+        "duplicates": duplicates,
+        "cross_record_duplicates": dedup.cross_record,
+        "reduction_ratio": round(1 - pages_kept / max(dedup.pages_in - dedup.empty, 1), 4),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(dedup.pages_in / elapsed, 1) if elapsed else 0.0,
+        "mb_per_s": round(text_bytes / 1e6 / elapsed, 2) if elapsed else 0.0,
+        "params": {"threshold": threshold, "num_perm": num_perm, "bands": bands, "shingle": shingle},
+    }
+    with open(os.path.join(out_dir, "dedup_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath RAG Near-Duplicate Page Detection")
+    parser.add_argument("harvest_dir", help="output directory of rag_harvest.py")
+    parser.add_argument("--out", default="rag_dedup_output")
+    parser.add_argument("--threshold", type=float, default=0.8, help="min estimated Jaccard similarity")
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--shingle", type=int, default=3, help="words per shingle")
+    args = parser.parse_args()
+
+    report = run_dedup(args.harvest_dir, args.out, args.threshold, args.num_perm, args.bands, args.shingle)
+    print(SEPARATOR)
+    print("Turath RAG Near-Duplicate Detection")
+    print(SEPARATOR)
+    print(f"  Pages in                : {report['pages_in']} ({report['empty_pages']} empty)")
+    print(f"  Canonical chunks        : {report['canonical_chunks']}")
+    print(f"  Near-duplicates dropped : {report['duplicates']} ({report['cross_record_duplicates']} across records)")
+    print(f"  Reduction ratio         : {report['reduction_ratio']:.1%}")
+    print(f"  Throughput              : {report['pages_per_s']} pages/s ({report['mb_per_s']} MB/s)")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
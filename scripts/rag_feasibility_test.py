@@ -25,6 +25,8 @@ import urllib3
 import argparse
 import sys
 
+from stream_json import iter_response_items
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 SEPARATOR = "=" * 65
@@ -71,23 +73,28 @@ def fetch_page_text_with_citations(iiif_url, pid, page_id):
     Fetch OCR text for a single page via the IIIF Annotations endpoint.
     Returns (words_text, citation_list) where citation_list contains
     (word, xywh) pairs suitable for visual citation in an LLM response.
+
+    A file:// iiif_url reads the page from a local packed page-text store
+    (page_text_store.py) instead of calling the service.
     """
+    if iiif_url.startswith("file://"):
+        from page_text_store import open_store
+        return open_store(iiif_url[len("file://"):]).text_with_citations(pid, page_id)
     url = f"{iiif_url}/annotations/{pid}/{page_id}"
-    resp = requests.get(url, verify=False, timeout=15)
-    if resp.status_code == 404:
-        return None, []
-    resp.raise_for_status()
-    data = resp.json()
-    resources = data.get("resources", [])
     words = []
     citations = []
-    for r in resources:
-        chars = r.get("resource", {}).get("chars", "").strip()
-        on = r.get("on", "")
-        xywh = on.split("#xywh=")[-1] if "#xywh=" in on else ""
-        if chars:
-            words.append(chars)
-            citations.append((chars, xywh))
+    # Stream the AnnotationList: pages can carry thousands of word annotations
+    with requests.get(url, verify=False, timeout=15, stream=True) as resp:
+        if resp.status_code == 404:
+            return None, []
+        resp.raise_for_status()
+        for r in iter_response_items(resp, ("resources",)):
+            chars = r.get("resource", {}).get("chars", "").strip()
+            on = r.get("on", "")
+            xywh = on.split("#xywh=")[-1] if "#xywh=" in on else ""
+            if chars:
+                words.append(chars)
+                citations.append((chars, xywh))
     return " ".join(words), citations
 
 
@@ -0,0 +1,214 @@
+"""
+Turath RAG Harvester (sharded)
+===============================
+Supports: P3-2.2 (RAG Feasibility Test)
+
+Harvests page text and word-level bbox citations for every record matching
+a query, in the form an external RAG pipeline would ingest them.
+
+Records are hash-partitioned by PID across N worker processes. The
+coordinator streams the record listing and keeps only each record's
+compact metadata row and vocabulary ids (never full records or any
+fulltext payload), so its memory stays small. Each worker owns one
+partition, harvests several records at once on a small thread pool (I/O;
+each record's pages are fetched in turn) and does its own JSON decoding
+and string building (CPU), writing an independent shard:
+
+    <out>/shard-000-of-004.jsonl        one JSON line per record
+    <out>/shard-000-of-004.manifest.json
+
+Once the workers finish, the coordinator merges the shard manifests into
+<out>/manifest.json with aggregated stats.
+
+Shard line format:
+    {"pid": ..., "metadata": {...extract_turath_metadata..., "vocabulary_ids": {"language": ["ara"], ...}},
+     "pages": [{"page_id": "p001", "text": "...", "citations": [[word, "x,y,w,h"], ...]}]}
+
+Usage:
+    python rag_harvest.py --target local --out harvest/ --workers 4
+    python rag_harvest.py --base-url http://127.0.0.1:8765 --iiif-url http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import requests
+
+from batch_metadata import BatchMetadataExtractor, vocabulary_ids
+from rag_feasibility_test import iterate_pages
+from stream_json import iter_response_items
+
+SEPARATOR = "=" * 65
+LIST_PAGE_SIZE = 100
+# The coordinator's vocabulary label cache, shared by every listed record
+METADATA = BatchMetadataExtractor(("en",))
+
+
+def shard_of(pid, n_shards):
+    """Stable PID → shard mapping (crc32, identical in every process)."""
+    return zlib.crc32(pid.encode("utf-8")) % n_shards
+
+
+def shard_name(shard, n_shards):
+    return f"shard-{shard:03d}-of-{n_shards:03d}"
+
+
+def list_records(base_url, q="", sort="newest", limit=None):
+    """Page through /api/records, yielding hits without buffering each page body."""
+    page = 1
+    seen = 0
+    while True:
+        params = {"q": q, "size": LIST_PAGE_SIZE, "page": page, "sort": sort}
+        with requests.get(f"{base_url}/api/records", params=params,
+                          verify=False, timeout=30, stream=True) as resp:
+            resp.raise_for_status()
+            count = 0
+            for hit in iter_response_items(resp, ("hits", "hits")):
+                count += 1
+                yield hit
+                seen += 1
+                if limit and seen >= limit:
+                    return
+        if count < LIST_PAGE_SIZE:
+            return
+        page += 1
+
+
+def summarise_record(record):
+    """What a worker needs of a listed record: (MetadataRow, vocabulary ids)."""
+    # Labels alone cannot answer id filters such as resource_type:publication-book
+    return METADATA.extract_one(record), vocabulary_ids(record)
+
+
+def harvest_record(iiif_url, summary, max_pages):
+    row, ids = summary
+    meta = METADATA.as_dict(row)
+    meta["vocabulary_ids"] = ids
+    pages = iterate_pages(iiif_url, meta["pid"], max_pages=max_pages)
+    return {
+        "pid": meta["pid"],
+        "metadata": meta,
+        "pages": [{"page_id": page_id, "text": text, "citations": citations}
+                  for page_id, text, citations in pages],
+    }
+
+
+def harvest_shard(shard, n_shards, summaries, iiif_url, out_dir, max_pages=None, io_threads=4):
+    """Worker entry point: harvest one partition of summarise_record() results and write its shard + manifest."""
+    name = shard_name(shard, n_shards)
+    start = time.time()
+    stats = {"shard": shard, "file": f"{name}.jsonl", "records": 0, "pages": 0,
+             "words": 0, "bytes": 0, "errors": [], "pids": []}
+
+    with open(os.path.join(out_dir, stats["file"]), "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=io_threads) as pool:
+        futures = {pool.submit(harvest_record, iiif_url, summary, max_pages): summary[0].pid
+                   for summary in summaries}
+        for future in as_completed(futures):
+            pid = futures[future]
+            try:
+                doc = future.result()
+            except Exception as e:
+                stats["errors"].append({"pid": pid, "error": str(e)})
+                continue
+            line = json.dumps(doc, ensure_ascii=False) + "\n"
+            out.write(line)
+            stats["records"] += 1
+            stats["pages"] += len(doc["pages"])
+            stats["words"] += sum(len(p["citations"]) for p in doc["pages"])
+            stats["bytes"] += len(line.encode("utf-8"))
+            stats["pids"].append(pid)
+
+    stats["elapsed_s"] = round(time.time() - start, 3)
+    with open(os.path.join(out_dir, f"{name}.manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    return stats
+
+
+def merge_manifests(out_dir, shard_stats, workers, elapsed):
+    """Combine per-shard manifests into <out_dir>/manifest.json."""
+    shard_stats = sorted(shard_stats, key=lambda s: s["shard"])
+    totals = {key: sum(s[key] for s in shard_stats) for key in ("records", "pages", "words", "bytes")}
+    totals["errors"] = sum(len(s["errors"]) for s in shard_stats)
+    manifest = {
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "totals": totals,
+        "records_per_s": round(totals["records"] / elapsed, 2) if elapsed else 0.0,
+        "pages_per_s": round(totals["pages"] / elapsed, 2) if elapsed else 0.0,
+        "shards": [{k: v for k, v in s.items() if k != "pids"} | {"pid_count": len(s["pids"])}
+                   for s in shard_stats],
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def run_harvest(base_url, iiif_url, out_dir, workers=None, q="", limit=None,
+                max_pages=None, io_threads=4):
+    """Coordinator: list records, partition their summaries by PID, run shards in processes, merge."""
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.time()
+
+    partitions = [[] for _ in range(workers)]
+    for record in list_records(base_url, q=q, limit=limit):
+        partitions[shard_of(record.get("id", ""), workers)].append(summarise_record(record))
+
+    if workers == 1:
+        shard_stats = [harvest_shard(0, 1, partitions[0], iiif_url, out_dir, max_pages, io_threads)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(harvest_shard, shard, workers, part, iiif_url,
+                                   out_dir, max_pages, io_threads)
+                       for shard, part in enumerate(partitions)]
+            shard_stats = [f.result() for f in futures]
+
+    return merge_manifests(out_dir, shard_stats, workers, time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath RAG Harvester (sharded)")
+    parser.add_argument("--target", choices=["local", "prod"], default="local")
+    parser.add_argument("--base-url", help="override the InvenioRDM base URL")
+    parser.add_argument("--iiif-url", help="override the IIIF search service URL")
+    parser.add_argument("--out", default="rag_harvest_output")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--io-threads", type=int, default=4, help="records harvested concurrently per worker")
+    parser.add_argument("--query", default="", help="records search query (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="max records to harvest")
+    parser.add_argument("--max-pages", type=int, default=None, help="max pages per record")
+    args = parser.parse_args()
+
+    if args.target == "prod":
+        base_url = "https://invenio.turath-project.com"
+        iiif_url = "https://invenio.turath-project.com:5001"
+    else:
+        base_url = "https://127.0.0.1:5000"
+        iiif_url = "https://127.0.0.1:5001"
+    base_url = args.base_url or base_url
+    iiif_url = args.iiif_url or iiif_url
+
+    print(SEPARATOR)
+    print(f"Turath RAG Harvest — {base_url}")
+    print(SEPARATOR)
+    manifest = run_harvest(base_url, iiif_url, args.out, workers=args.workers, q=args.query,
+                           limit=args.limit, max_pages=args.max_pages, io_threads=args.io_threads)
+    totals = manifest["totals"]
+    print(f"  Workers            : {manifest['workers']}")
+    print(f"  Records harvested  : {totals['records']}")
+    print(f"  Pages harvested    : {totals['pages']}")
+    print(f"  Words (citations)  : {totals['words']}")
+    print(f"  Output size        : {totals['bytes'] / 1e6:.1f} MB in {args.out}/")
+    print(f"  Throughput         : {manifest['records_per_s']} records/s, {manifest['pages_per_s']} pages/s")
+    if totals["errors"]:
+        print(f"  ⚠️  {totals['errors']} record(s) failed — see shard manifests.")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Turath Offline RAG Retrieval
+=============================
+Supports: P3-2.2 (RAG Feasibility Test)
+
+Offline retrieval over exported page chunks, so RAG retrieval can be
+prototyped and measured without a live Lucene query per question.
+
+Input is either a harvest directory (rag_harvest.py shards) or a
+chunks.jsonl produced by rag_dedup.py. Each page chunk is embedded on
+the CPU with no model download:
+
+  1. Normalize and tokenize (arabic_text.py)
+  2. Weight terms with sublinear TF x IDF, hashing terms into a fixed
+     number of buckets (no vocabulary to store)
+  3. Project the sparse vector to `dim` dimensions with a seeded Gaussian
+     random projection and L2-normalize (cosine similarity = dot product)
+
+Queries are scored with batched NumPy matrix products, either exactly
+(brute force) or through an IVF index: spherical k-means centroids with
+inverted lists, probing the `nprobe` closest lists.
+
+Every hit carries the extract_turath_metadata fields of its record and
+the bbox citations of the query words found on the page.
+
+Index layout (--index directory):
+    config.json      dim, buckets, seed, chunk count, nlist
+    embeddings.npy   (N, dim) float32, memory-mapped at query time
+    idf.npy          (buckets,) float32
+    centroids.npy    (nlist, dim) float32
+    ivf_ids.npy / ivf_offsets.npy   inverted lists in CSR form
+    chunks.jsonl + chunk_offsets.npy   per-chunk metadata, byte-addressed
+
+Usage:
+    python rag_retrieval.py build rag_harvest_output/ --index rag_index/
+    python rag_retrieval.py query rag_index/ "تاريخ نجد" --k 5 --nprobe 8
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from arabic_text import normalize_arabic, tokenize
+
+SEPARATOR = "=" * 65
+# extract_turath_metadata() fields projected onto every hit ("" if missing); other
+# chunk metadata, such as the harvest's vocabulary_ids, stays out of results
+META_FIELDS = ("title", "creator_arabic", "publisher", "date", "language", "description",
+               "resource_type", "coverage_start", "coverage_end", "source", "rights", "identifier")
+
+
+def iter_chunks(source):
+    """Yield chunk dicts (pid, page_id, text, citations, metadata) from a harvest dir or chunks.jsonl."""
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "shard-*.jsonl")))
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    doc = json.loads(line)
+                    for page in doc["pages"]:
+                        yield {"pid": doc["pid"], "page_id": page["page_id"], "text": page["text"],
+                               "citations": page["citations"], "metadata": doc["metadata"]}
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                chunk = json.loads(line)
+                yield {k: chunk.get(k) for k in ("pid", "page_id", "text", "citations", "metadata", "provenance")}
+
+
+class HashingEmbedder:
+    """TF-IDF over hashed term buckets, randomly projected to a dense unit vector."""
+
+    def __init__(self, dim=256, buckets=2 ** 16, seed=13, idf=None):
+        self.dim = dim
+        self.buckets = buckets
+        self.seed = seed
+        self.idf = idf if idf is not None else np.ones(buckets, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        self.projection = rng.standard_normal((buckets, dim), dtype=np.float32) / np.float32(np.sqrt(dim))
+
+    def term_counts(self, text):
+        ids = np.fromiter((zlib.crc32(t.encode("utf-8")) % self.buckets for t in tokenize(text)),
+                          dtype=np.int64)
+        return np.unique(ids, return_counts=True)
+
+    def fit_idf(self, texts):
+        df = np.zeros(self.buckets, dtype=np.int64)
+        n = 0
+        for text in texts:
+            ids, _ = self.term_counts(text)
+            df[ids] += 1
+            n += 1
+        self.idf = (np.log((n + 1) / (df + 1)) + 1).astype(np.float32)
+        return n
+
+    def embed(self, text):
+        ids, counts = self.term_counts(text)
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if len(ids):
+            weights = (1 + np.log(counts)).astype(np.float32) * self.idf[ids]
+            vec = weights @ self.projection[ids]
+            norm = np.linalg.norm(vec)
+            if norm:
+                vec /= norm
+        return vec
+
+
+def top_k(scores, k):
+    """Indices of the k largest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def train_ivf(embeddings, nlist, iterations=10, seed=13, batch=8192):
+    """Spherical k-means; returns (centroids, ivf_ids, ivf_offsets)."""
+    n = len(embeddings)
+    nlist = max(1, min(nlist, n))
+    rng = np.random.default_rng(seed)
+    centroids = np.array(embeddings[rng.choice(n, nlist, replace=False)], dtype=np.float32)
+    assign = np.zeros(n, dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, n, batch):
+            block = embeddings[start:start + batch]
+            assign[start:start + batch] = np.argmax(block @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, embeddings)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]  # keep the old centroid for empty lists
+        norms[empty] = 1.0
+        centroids = sums / norms
+    order = np.argsort(assign, kind="stable")
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+    return centroids.astype(np.float32), order.astype(np.int64), offsets
+
+
+def build_index(source, index_dir, dim=256, buckets=2 ** 16, nlist=None, seed=13):
+    os.makedirs(index_dir, exist_ok=True)
+    start = time.time()
+    embedder = HashingEmbedder(dim, buckets, seed)
+    n = embedder.fit_idf(c["text"] for c in iter_chunks(source))
+    if n == 0:
+        raise ValueError(f"No page chunks found in {source}")
+
+    embeddings = np.lib.format.open_memmap(os.path.join(index_dir, "embeddings.npy"), mode="w+",
+                                           dtype=np.float32, shape=(n, dim))
+    offsets = np.zeros(n, dtype=np.int64)
+    with open(os.path.join(index_dir, "chunks.jsonl"), "wb") as out:
+        for i, chunk in enumerate(iter_chunks(source)):
+            embeddings[i] = embedder.embed(chunk["text"])
+            offsets[i] = out.tell()
+            out.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+    embeddings.flush()
+
+    nlist = nlist or max(1, int(np.sqrt(n)))
+    centroids, ivf_ids, ivf_offsets = train_ivf(embeddings, nlist, seed=seed)
+    np.save(os.path.join(index_dir, "idf.npy"), embedder.idf)
+    np.save(os.path.join(index_dir, "chunk_offsets.npy"), offsets)
+    np.save(os.path.join(index_dir, "centroids.npy"), centroids)
+    np.save(os.path.join(index_dir, "ivf_ids.npy"), ivf_ids)
+    np.save(os.path.join(index_dir, "ivf_offsets.npy"), ivf_offsets)
+    config = {"dim": dim, "buckets": buckets, "seed": seed, "chunks": n, "nlist": len(centroids),
+              "build_s": round(time.time() - start, 3)}
+    with open(os.path.join(index_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+class RetrievalIndex:
+    """Query-side view of an index directory built by build_index()."""
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "config.json"), encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(index_dir, name), mmap_mode="r")
+
+        self.embeddings = load("embeddings.npy")
+        self.centroids = np.asarray(load("centroids.npy"))
+        self.ivf_ids = load("ivf_ids.npy")
+        self.ivf_offsets = np.asarray(load("ivf_offsets.npy"))
+        self.chunk_offsets = load("chunk_offsets.npy")
+        self.embedder = HashingEmbedder(self.config["dim"], self.config["buckets"],
+                                        self.config["seed"], idf=np.asarray(load("idf.npy")))
+
+    def embed_queries(self, queries):
+        return np.stack([self.embedder.embed(q) for q in queries])
+
+    def search_brute(self, query_vecs, k=10, block=65536):
+        """Exact top-k for a batch of query vectors: returns [(ids, scores), ...]."""
+        n = len(self.embeddings)
+        best_scores = np.full((len(query_vecs), 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((len(query_vecs), 0), dtype=np.int64)
+        for start in range(0, n, block):
+            scores = query_vecs @ np.asarray(self.embeddings[start:start + block]).T
+            ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_ids = np.concatenate([best_ids, ids], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+        results = []
+        for ids, scores in zip(best_ids, best_scores):
+            order = np.argsort(-scores, kind="stable")
+            results.append((ids[order], scores[order]))
+        return results
+
+    def search_ivf(self, query_vecs, k=10, nprobe=8):
+        """Approximate top-k probing the `nprobe` nearest inverted lists per query."""
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(query_vecs @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results = []
+        for vec, probe in zip(query_vecs, lists):
+            # Sorted ids keep the gather from the memory-mapped matrix sequential
+            cand = np.sort(np.concatenate([self.ivf_ids[self.ivf_offsets[c]:self.ivf_offsets[c + 1]]
+                                           for c in probe]))
+            scores = np.asarray(self.embeddings[cand]) @ vec
+            best = top_k(scores, k)
+            results.append((cand[best], scores[best]))
+        return results
+
+    def chunk(self, chunk_id):
+        with open(os.path.join(self.index_dir, "chunks.jsonl"), "rb") as f:
+            f.seek(int(self.chunk_offsets[chunk_id]))
+            return json.loads(f.readline())
+
+    def hits(self, query, ids, scores):
+        """Turn (ids, scores) into result dicts with metadata and bbox citations."""
+        wanted = set(tokenize(query))
+        out = []
+        for chunk_id, score in zip(ids, scores):
+            chunk = self.chunk(int(chunk_id))
+            meta = chunk.get("metadata") or {}
+            citations = [(w, xywh) for w, xywh in chunk.get("citations") or []
+                         if normalize_arabic(w) in wanted]
+            out.append({
+                "score": round(float(score), 4),
+                "pid": chunk["pid"],
+                "page_id": chunk["page_id"],
+                **{field: meta.get(field, "") for field in META_FIELDS},
+                "citations": citations,
+                "provenance": chunk.get("provenance"),
+                "snippet": chunk["text"][:200],
+            })
+        return out
+
+    def query(self, query, k=10, nprobe=8, exact=False):
+        vecs = self.embed_queries([query])
+        ids, scores = (self.search_brute(vecs, k) if exact else self.search_ivf(vecs, k, nprobe))[0]
+        return self.hits(query, ids, scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turath Offline RAG Retrieval")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="embed chunks and build the IVF index")
+    build.add_argument("source", help="harvest directory or chunks.jsonl")
+    build.add_argument("--index", default="rag_index")
+    build.add_argument("--dim", type=int, default=256)
+    build.add_argument("--nlist", type=int, default=None, help="IVF lists (default: sqrt(N))")
+    query = sub.add_parser("query", help="retrieve chunks for a question")
+    query.add_argument("index")
+    query.add_argument("text")
+    query.add_argument("--k", type=int, default=5)
+    query.add_argument("--nprobe", type=int, default=8)
+    query.add_argument("--exact", action="store_true", help="brute-force instead of IVF")
+    args = parser.parse_args()
+
+    print(SEPARATOR)
+    if args.command == "build":
+        try:
+            config = build_index(args.source, args.index, dim=args.dim, nlist=args.nlist)
+        except ValueError as e:
+            print(f"❌ {e}")
+            print(SEPARATOR)
+            raise SystemExit(1)
+        print(f"✅ Indexed {config['chunks']} chunks ({config['dim']}-d, {config['nlist']} IVF lists) "
+              f"in {config['build_s']}s → {args.index}/")
+    else:
+        index = RetrievalIndex(args.index)
+        start = time.perf_counter()
+        hits = index.query(args.text, k=args.k, nprobe=args.nprobe, exact=args.exact)
+        elapsed = time.perf_counter() - start
+        print(f"Query: {args.text} — {len(hits)} hits in {elapsed * 1000:.1f} ms")
+        print(SEPARATOR)
+        for h in hits:
+            print(f"  {h['score']:.3f}  {h['pid']} {h['page_id']}  \"{h['title']}\" | {h['date']} | {h['language']}")
+            if h["citations"]:
+                print(f"         citations: {h['citations'][:3]}")
+    print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,8 @@ import urllib3
 import time
 import argparse
 
+from stream_json import iter_response_items
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 passed = 0
@@ -42,7 +44,7 @@ def result(ok, name, detail=""):
     return ok
 
 
-def search(base_url, q, **kwargs):
+def search_params(q, **kwargs):
     params = {"q": q, "size": kwargs.get("size", 10)}
     if "page" in kwargs:
         params["page"] = kwargs["page"]
@@ -50,15 +52,36 @@ def search(base_url, q, **kwargs):
         params["sort"] = kwargs["sort"]
     if "f" in kwargs:
         params["f"] = kwargs["f"]
+    return params
+
+
+def iter_search_hits(base_url, q, **kwargs):
+    """
+    Stream hits.hits[*] for a records search as they arrive.
+    Returns (stream, resp); once the stream is exhausted,
+    stream.envelope["hits"]["total"] holds the hit count.
+    The caller must close `resp`.
+    """
+    resp = requests.get(f"{base_url}/api/records", params=search_params(q, **kwargs),
+                        verify=False, timeout=15, stream=True)
+    try:
+        resp.raise_for_status()
+    except Exception:
+        resp.close()
+        raise
+    return iter_response_items(resp, ("hits", "hits")), resp
+
+
+def search(base_url, q, **kwargs):
     start = time.time()
-    resp = requests.get(f"{base_url}/api/records", params=params, verify=False, timeout=15)
+    stream, resp = iter_search_hits(base_url, q, **kwargs)
+    with resp:
+        hits = list(stream)
     elapsed = time.time() - start
-    resp.raise_for_status()
-    data = resp.json()
-    total = data.get("hits", {}).get("total", 0)
+    total = stream.envelope.get("hits", {}).get("total", 0)
     if isinstance(total, dict):
         total = total.get("value", 0)
-    return total, data.get("hits", {}).get("hits", []), elapsed
+    return total, hits, elapsed
 
 
 def run_tests(base_url, iiif_url):
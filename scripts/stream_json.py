@@ -0,0 +1,274 @@
+"""
+Turath Streaming JSON Decoder
+==============================
+Supports: P3-2.2 (RAG Feasibility Test), P3-3.2 (Search Robustness Tests)
+
+Incrementally decodes one array inside a streamed JSON document, yielding
+its items as soon as each one has fully arrived. Used for the two large
+payloads the scripts consume:
+
+  - /api/records          → hits.hits[*]   (hits may carry OCR fulltext)
+  - /annotations/{pid}/…  → resources[*]   (one annotation per OCR word)
+
+Only the current item is ever buffered, so peak memory per request is
+bounded by the largest single item instead of the whole body plus its
+decoded tree. Everything outside the target array (e.g. hits.total,
+links, @context) is decoded normally and kept on `StreamingArray.envelope`.
+
+Items already fully buffered are decoded in place by the stdlib C scanner.
+Items spanning several chunks (e.g. hits carrying fulltext) are delimited
+first and then decoded with orjson when it is installed, falling back to
+the standard library `json` module.
+
+Usage:
+    with requests.get(url, stream=True) as resp:
+        stream = iter_response_items(resp, ("hits", "hits"))
+        for hit in stream:
+            ...
+        total = stream.envelope["hits"]["total"]
+"""
+
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+# A scalar ending this close to the buffer end may be a number cut by a chunk boundary
+_NUMBER_TAIL = 32
+_STRUCT_RE = re.compile(r'["\[\]{}]')
+_IN_STRING_RE = re.compile(r'["\\]')
+_decoder = json.JSONDecoder()
+
+
+def get_loads(backend="auto"):
+    """Return the item decoder for `backend` ("auto", "orjson" or "json")."""
+    if backend == "json":
+        return json.loads
+    if backend == "orjson" or (backend == "auto" and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("orjson backend requested but orjson is not installed")
+        return orjson.loads
+    if backend != "auto":
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    return json.loads
+
+
+class StreamingArray:
+    """
+    Iterate the items of the array at `path` inside a streamed JSON object.
+
+    `chunks` is any iterable of bytes (or str) pieces, e.g.
+    `resp.iter_content(CHUNK_SIZE)`. The instance can be iterated once;
+    after iteration `envelope` holds the rest of the document with the
+    target array replaced by an empty list.
+    """
+
+    def __init__(self, chunks, path, backend="auto"):
+        self.path = tuple(path)
+        self.envelope = {}
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._loads = get_loads(backend)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("StreamingArray can only be iterated once")
+        self._started = True
+        self._expect("{")
+        yield from self._object(self.path, self.envelope)
+
+    # ── Buffer management ───────────────────────────────────────────
+
+    def _fill(self):
+        """
+        Append more decoded text to the buffer, dropping consumed text.
+        Reads at least as much as is still pending so that an item spanning
+        many chunks is rescanned a logarithmic number of times only.
+        Returns False once the input is exhausted.
+        """
+        if self._eof:
+            return False
+        pending = self._buf[self._pos:]
+        pieces = [pending]
+        wanted = max(len(pending), 1)
+        got = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+            if text:
+                pieces.append(text)
+                got += len(text)
+                if got >= wanted:
+                    break
+        else:
+            tail = self._utf8.decode(b"", final=True)
+            if tail:
+                pieces.append(tail)
+                got += len(tail)
+            self._eof = True
+        self._buf = "".join(pieces)
+        self._pos = 0
+        return got > 0
+
+    def _peek(self):
+        """Skip whitespace and return the next significant character."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("Truncated JSON document")
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r} in JSON stream")
+        self._pos += 1
+
+    # ── Grammar ─────────────────────────────────────────────────────
+
+    def _object(self, path, out):
+        """Decode object members into `out`, descending along `path`."""
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise ValueError("Expected object key in JSON stream")
+            key = self._string()
+            self._expect(":")
+            head = self._peek()
+            if path and key == path[0] and head == ("[" if len(path) == 1 else "{"):
+                self._pos += 1
+                if len(path) == 1:
+                    out[key] = []
+                    yield from self._array()
+                else:
+                    out[key] = {}
+                    yield from self._object(path[1:], out[key])
+            else:
+                out[key] = self._value()
+            sep = self._peek()
+            self._pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {sep!r} in JSON stream")
+
+    def _array(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            sep = self._peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or ']' but found {sep!r} in JSON stream")
+
+    def _string(self):
+        while True:
+            try:
+                value, end = json.decoder.scanstring(self._buf, self._pos + 1)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            self._pos = end
+            return value
+
+    def _value(self):
+        if self._peek() in "{[":
+            # Fast path: items that are already fully buffered decode in one
+            # C-scanner call; only items spanning chunks pay for the scan below
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                pass
+            else:
+                self._pos = end
+                return value
+            end = self._container_end()
+            text = self._buf[self._pos:end]
+            self._pos = end
+            return self._loads(text)
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number near the end of the buffer may continue in the next chunk
+            # ("-2." + "5e10"); refill and decode it again from the rebased buffer
+            if not self._eof and isinstance(value, (int, float)):
+                rest = self._buf[end:end + _NUMBER_TAIL]
+                if len(rest) < _NUMBER_TAIL and not rest.strip(_NUMBER_CHARS):
+                    self._fill()
+                    continue
+            self._pos = end
+            return value
+
+    def _container_end(self):
+        """Return the buffer index just past the object/array starting at _pos."""
+        rel = 0
+        depth = 0
+        in_string = False
+        while True:
+            buf = self._buf
+            i = self._pos + rel
+            match = (_IN_STRING_RE if in_string else _STRUCT_RE).search(buf, i)
+            if match is None:
+                rel = len(buf) - self._pos
+                if not self._fill():
+                    raise ValueError("Truncated JSON document")
+                continue
+            char = match.group()
+            i = match.end()
+            if in_string:
+                if char == '"':
+                    in_string = False
+                elif i >= len(buf):
+                    # Escape sequence split across chunks: rescan from the backslash
+                    rel = match.start() - self._pos
+                    if not self._fill():
+                        raise ValueError("Truncated JSON document")
+                    continue
+                else:
+                    i += 1
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i
+            rel = i - self._pos
+
+
+def iter_json_items(chunks, path, backend="auto"):
+    """Return a StreamingArray over the array at `path` in `chunks`."""
+    return StreamingArray(chunks, path, backend=backend)
+
+
+def iter_response_items(resp, path, backend="auto", chunk_size=CHUNK_SIZE):
+    """Stream the array at `path` out of a `requests` response opened with stream=True."""
+    return StreamingArray(resp.iter_content(chunk_size), path, backend=backend)
@@ -0,0 +1,55 @@
+"""
+Tests for batch_metadata.py (run with `python -m pytest` from this directory).
+"""
+
+import itertools
+import unittest
+
+from batch_metadata import BatchMetadataExtractor
+from rag_feasibility_test import extract_turath_metadata
+
+ARABIC = {"id": "ara", "title": {"en": "Arabic", "ar": "العربية"}}
+ENGLISH = {"id": "eng", "title": {"en": "English", "ar": "الإنجليزية"}}
+BOOK = {"id": "book", "title": {"en": "Book", "ar": "كتاب"}}
+CC_BY = {"id": "cc-by-4.0", "title": {"en": "CC BY 4.0"}}
+
+VOCABULARY_VALUES = {
+    "turath:language": [
+        [ARABIC], [ARABIC, ENGLISH], [ENGLISH, ARABIC], ARABIC, [],
+        [{"id": "ara"}],                                   # no title
+        [{"id": "ara", "title": {"ar": "ع"}}, "eng"],      # title only in ar, plus a bare string
+        [{"id": "ara", "title": {}}], [{"title": {"en": "Arabic"}}],
+    ],
+    "turath:resource_type": [BOOK, {"id": "book"}, {"id": "book", "title": {"ar": "كتاب"}}, "book", None],
+    "turath:rights": [CC_BY, {"id": "cc-by-4.0"}, {"id": "cc-by-4.0", "title": {"ar": "رخصة"}}, None],
+}
+
+
+def records():
+    """One record per combination of vocabulary values, in several orders."""
+    combos = list(itertools.product(*VOCABULARY_VALUES.values()))
+    base = [{"id": f"r{i}", "metadata": {"title": f"Record {i}"},
+             "custom_fields": {field: value for field, value in zip(VOCABULARY_VALUES, combo) if value is not None}}
+            for i, combo in enumerate(combos)]
+    return [base, base[::-1], base[1::2] + base[::2]]
+
+
+class BatchMetadataEquivalenceTest(unittest.TestCase):
+    def test_rows_match_per_record_extraction(self):
+        for order in records():
+            for langs in (("en",), ("en", "ar")):
+                extractor = BatchMetadataExtractor(langs)
+                for record, row in zip(order, extractor.extract(order)):
+                    self.assertEqual(extractor.as_dict(row, "en"), extract_turath_metadata(record), record)
+
+    def test_untitled_entry_keeps_its_own_fallback(self):
+        extractor = BatchMetadataExtractor()
+        titled = {"custom_fields": {"turath:language": [ARABIC]}}
+        untitled = {"custom_fields": {"turath:language": [{"id": "ara"}]}}
+        first, second = extractor.extract([titled, untitled])
+        self.assertEqual(first.language, ("Arabic", "العربية"))
+        self.assertEqual(second.language, ("{'id': 'ara'}", "{'id': 'ara'}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Turath Ops Entry Point
+=======================
+Supports: P2-3.1 / P3-3.2 (ECS one-off tasks)
+
+One entry point for the routine operations run as ECS one-off tasks:
+
+    search-tests   run_search_tests.py         search robustness tests
+    rag-harvest    rag_harvest.py              sharded RAG harvest
+    prewarm        iiif_prewarm.py             Cantaloupe cache pre-warming
+    roles          setup_production_roles.py   admin/curator role setup
+    curators       create_curator_user.py      create a curator user
+
+Everything after the subcommand is passed to that script's own CLI. This
+module imports only the standard library; requests, urllib3 and friends
+are imported by the chosen subcommand alone, so `--help` and argument
+errors return immediately and an unused dependency never slows a task.
+
+The role subcommands run the `invenio` CLI once per step. Inside the
+instance's virtualenv (VIRTUAL_ENV set, e.g. the ECS image) they call its
+`invenio` script directly instead of going through `pipenv run`, which
+costs a second or more per call; set INVENIO_CMD to override.
+
+`startup` measures, with `python -X importtime`, this module's import cost
+and the import cost of every subcommand's module — what a one-off task
+pays before it does any work — and exits non-zero if any is over budget.
+Run it in CI after changing imports in any of these scripts.
+
+Usage:
+    python turath_ops.py search-tests --target prod
+    python turath_ops.py rag-harvest --target local --out harvest/ --workers 4
+    python turath_ops.py prewarm 7cxkj-kvp29 --target prod
+    python turath_ops.py roles
+    python turath_ops.py curators curator@turath-project.com
+    python turath_ops.py startup --budget-ms 50 --command-budget-ms 250
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+SEPARATOR = "=" * 65
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLES_DIR = os.environ.get("TURATH_ROLES_DIR",
+                           os.path.join(os.path.dirname(SCRIPTS_DIR), "P2-3.1-User-Roles-Permissions"))
+STARTUP_BUDGET_MS = 50
+COMMAND_BUDGET_MS = 250
+
+# subcommand → (directory, module, description); modules are imported on dispatch only
+COMMANDS = {
+    "search-tests": (SCRIPTS_DIR, "run_search_tests", "search robustness tests"),
+    "rag-harvest": (SCRIPTS_DIR, "rag_harvest", "sharded RAG harvest"),
+    "prewarm": (SCRIPTS_DIR, "iiif_prewarm", "Cantaloupe cache pre-warming"),
+    "roles": (ROLES_DIR, "setup_production_roles", "admin/curator role setup"),
+    "curators": (ROLES_DIR, "create_curator_user", "create a curator user"),
+}
+
+
+def dispatch(command, argv):
+    """Import the subcommand's module and run its main() with `argv` as its arguments."""
+    directory, module_name, _ = COMMANDS[command]
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if os.environ.get("TURATH_OPS_TIMING"):
+        print(f"[turath-ops] {module_name} imported in {(time.perf_counter() - start) * 1000:.0f} ms",
+              file=sys.stderr)
+    sys.argv = [f"turath_ops.py {command}"] + argv
+    return module.main()
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_cost(module, directory=SCRIPTS_DIR):
+    """(cumulative ms, [(child, ms)] heaviest first) for importing `module` in a fresh interpreter."""
+    import subprocess
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(dict.fromkeys([directory, SCRIPTS_DIR])),
+               PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, check=True)
+    rows = parse_importtime(proc.stderr)
+    at = next(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    first = max((i for i in range(at) if rows[i][3] == 0), default=-1) + 1
+    children = sorted((r for r in rows[first:at] if r[3] == 1), key=lambda r: -r[2])
+    return rows[at][2] / 1000, [(name, cumulative / 1000) for name, _, cumulative, _ in children]
+
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, command_budget_ms=COMMAND_BUDGET_MS):
+    """
+    Measure what a one-off task pays before doing any work: importing this
+    module, then importing the chosen subcommand's module. Returns True if
+    every import is within its budget.
+    """
+    import subprocess
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "turath_ops.py"), "--help"],
+                   capture_output=True, check=True)
+    help_ms = (time.perf_counter() - start) * 1000
+
+    results = [("turath_ops", "turath_ops", budget_ms, *import_cost("turath_ops"))]
+    for command, (directory, module_name, _) in COMMANDS.items():
+        results.append((command, module_name, command_budget_ms, *import_cost(module_name, directory)))
+
+    print(SEPARATOR)
+    print("Turath Ops — startup check")
+    print(SEPARATOR)
+    print(f"  {'Import':<40}{'ms':>8}{'budget':>8}  heaviest")
+    ok = True
+    for label, module_name, budget, cost, children in results:
+        within = cost <= budget
+        ok &= within
+        name = label if label == module_name else f"{label} ({module_name})"
+        heaviest = ", ".join(f"{child} {ms:.0f}" for child, ms in children[:2])
+        print(f"  {name:<40}{cost:>8.1f}{budget:>8.0f}  {heaviest}{'' if within else '  ⚠️'}")
+    print(f"\n  turath_ops --help  : {help_ms:.0f} ms wall, process start to exit")
+    print(f"\n  {'✅ Within budget.' if ok else '⚠️  Over budget — make the heavy import lazy or drop it.'}")
+    print(SEPARATOR)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="turath_ops.py", description="Turath Ops Entry Point",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="subcommands:\n" + "\n".join(f"  {name:<14}{desc}" for name, (_, _, desc) in COMMANDS.items())
+        + "\n  startup       check this entry point's and each subcommand's import time\n\n"
+          "Arguments after the subcommand go to its own CLI (e.g. `search-tests --help`).")
+    parser.add_argument("command", choices=[*COMMANDS, "startup"], metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        startup = argparse.ArgumentParser(prog="turath_ops.py startup")
+        startup.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                             help="import time budget for this module")
+        startup.add_argument("--command-budget-ms", type=float, default=COMMAND_BUDGET_MS,
+                             help="import time budget for each subcommand's module")
+        budgets = startup.parse_args(args.args)
+        sys.exit(0 if check_startup(budgets.budget_ms, budgets.command_budget_ms) else 1)
+    result = dispatch(args.command, args.args)
+    if isinstance(result, int):
+        sys.exit(result)
+
+
+if __name__ == "__main__":
+    main()